@@ -1,14 +1,25 @@
 import streamlit as st
 import json
-import base64
-import requests
-import urllib.parse
-import re
 import time
+import uuid
 from datetime import datetime
-from openai import OpenAI
 import streamlit.components.v1 as components
 
+from sis.annotate import annotate_markdown
+from sis.biblio import BiblioPrefetch, split_authors
+from sis.component import COMPONENT_ENABLED, missing_assets, render_graph_component
+from sis.graph import graph_elements
+from sis.ingest import MAX_UPLOAD_BYTES, ingest_context
+from sis.metrics import observe, record_error, snapshot, span, start_metrics_server, start_trace
+from sis.ontology import load_ontology
+from sis.ratelimit import estimate_tokens
+from sis.scheduler import get_scheduler
+from sis.static import APP_CSS, LOGO_HTML, USER_GUIDE, explorer_sections
+from sis.store import get_graph_store
+from sis.synthesis import GROQ_BASE_URL
+# NumPy/SciPy moduli (cevovod, povezovanje, analitika, postavitev, tezaver) se uvozijo šele,
+# ko jih sinteza ali izris grafa res potrebuje; navadni ponovni zagoni jih ne nalagajo
+
 # =========================================================
 # 0. KONFIGURACIJA IN NAPREDNI STILI (CSS)
 # =========================================================
@@ -19,87 +30,28 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Integracija CSS za vizualne poudarke, Google linke in gladko navigacijo
-st.markdown("""
-<style>
-    .semantic-node-highlight {
-        color: #2a9d8f;
-        font-weight: bold;
-        border-bottom: 2px solid #2a9d8f;
-        padding: 0 2px;
-        background-color: #f0fdfa;
-        border-radius: 4px;
-        transition: all 0.3s ease;
-        text-decoration: none !important;
-    }
-    .semantic-node-highlight:hover {
-        background-color: #ccfbf1;
-        color: #264653;
-        border-bottom: 2px solid #e76f51;
-    }
-    .author-search-link {
-        color: #1d3557;
-        font-weight: bold;
-        text-decoration: none;
-        border-bottom: 1px double #457b9d;
-        padding: 0 1px;
-    }
-    .author-search-link:hover {
-        color: #e63946;
-        background-color: #f1faee;
-    }
-    .google-icon {
-        font-size: 0.75em;
-        vertical-align: super;
-        margin-left: 2px;
-        color: #457b9d;
-        opacity: 0.8;
-    }
-    .stMarkdown {
-        line-height: 1.8;
-        font-size: 1.05em;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-def get_svg_base64(svg_str):
-    """Pretvori SVG v base64 format za prikaz slike."""
-    return base64.b64encode(svg_str.encode('utf-8')).decode('utf-8')
-
-# --- LOGOTIP: 3D RELIEF (Embedded SVG) ---
-SVG_3D_RELIEF = """
-<svg width="240" height="240" viewBox="0 0 240 240" xmlns="http://www.w3.org/2000/svg">
-    <defs>
-        <filter id="reliefShadow" x="-20%" y="-20%" width="150%" height="150%">
-            <feDropShadow dx="4" dy="4" stdDeviation="3" flood-color="#000" flood-opacity="0.4"/>
-        </filter>
-        <linearGradient id="pyramidSide" x1="0%" y1="0%" x2="100%" y2="100%">
-            <stop offset="0%" style="stop-color:#e0e0e0;stop-opacity:1" />
-            <stop offset="100%" style="stop-color:#bdbdbd;stop-opacity:1" />
-        </linearGradient>
-        <linearGradient id="treeGrad" x1="0%" y1="0%" x2="0%" y2="100%">
-            <stop offset="0%" style="stop-color:#66bb6a;stop-opacity:1" />
-            <stop offset="100%" style="stop-color:#2e7d32;stop-opacity:1" />
-        </linearGradient>
-    </defs>
-    <circle cx="120" cy="120" r="100" fill="#f0f0f0" stroke="#000000" stroke-width="4" filter="url(#reliefShadow)" />
-    <path d="M120 40 L50 180 L120 200 Z" fill="url(#pyramidSide)" />
-    <path d="M120 40 L190 180 L120 200 Z" fill="#9e9e9e" />
-    <rect x="116" y="110" width="8" height="70" rx="2" fill="#5d4037" />
-    <circle cx="120" cy="85" r="30" fill="url(#treeGrad)" filter="url(#reliefShadow)" />
-    <circle cx="95" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
-    <circle cx="145" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
-    <rect x="70" y="170" width="20" height="12" rx="2" fill="#1565c0" filter="url(#reliefShadow)" />
-    <rect x="150" y="170" width="20" height="12" rx="2" fill="#c62828" filter="url(#reliefShadow)" />
-    <rect x="110" y="185" width="20" height="12" rx="2" fill="#f9a825" filter="url(#reliefShadow)" />
-</svg>
-"""
+# Integracija CSS za vizualne poudarke, Google linke in gladko navigacijo (niz je zgrajen enkrat na proces)
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# Pakirana komponenta brez lokalne knjižnice ne deluje brez povezave, zato se ob zagonu glasno ustavimo
+if COMPONENT_ENABLED and missing_assets():
+    st.error(f"❌ Graph component assets are missing: {', '.join(missing_assets())}. Run `python -m sis.component "
+             "--fetch-assets` on this host (or set SIS_GRAPH_COMPONENT=0 to use the legacy CDN renderer).")
+    st.stop()
 
 # --- CYTOSCAPE RENDERER Z DINAMIČNIMI OBLIKAMI IN IZVOZOM + LUPA ---
-def render_cytoscape_network(elements, container_id="cy"):
+def render_cytoscape_network(elements, container_id="cy", positions=None):
     """
     Izriše interaktivno omrežje Cytoscape.js s podporo za oblike, shranjevanje slike in funkcijo lupe.
+    Če so podane vnaprej izračunane pozicije, brskalnik ne poganja simulacije (preset postavitev).
     """
+    if positions:
+        for el in elements:
+            xy = positions.get(el["data"].get("id"))
+            if xy: el["position"] = {"x": xy[0], "y": xy[1]}
+        layout_js = "{ name: 'preset', padding: 50 }"
+    else:
+        layout_js = "{ name: 'cose', padding: 50, animate: true, nodeRepulsion: 25000, idealEdgeLength: 120 }"
     cyto_html = f"""
     <div style="position: relative;">
         <button id="save_btn" style="position: absolute; top: 10px; right: 10px; z-index: 100; padding: 8px 12px; background: #2a9d8f; color: white; border: none; border-radius: 5px; cursor: pointer; font-family: sans-serif; font-size: 12px; box-shadow: 0 2px 4px rgba(0,0,0,0.2);">💾 Export Graph as PNG</button>
@@ -147,7 +99,7 @@ def render_cytoscape_network(elements, container_id="cy"):
                         style: {{ 'opacity': 0.15, 'text-opacity': 0 }}
                     }}
                 ],
-                layout: {{ name: 'cose', padding: 50, animate: true, nodeRepulsion: 25000, idealEdgeLength: 120 }}
+                layout: {layout_js}
             }});
 
             /* LOGIKA LUPE (Fokusiranje na sosesko ob prehodu z miško) */
@@ -185,84 +137,59 @@ def render_cytoscape_network(elements, container_id="cy"):
     """
     components.html(cyto_html, height=650)
 
-# --- PRIDOBIVANJE BIBLIOGRAFIJ Z LETNICAMI ---
-def fetch_author_bibliographies(author_input):
-    """Zajame bibliografske podatke z letnicami preko ORCID in Scholar API baz."""
-    if not author_input: return ""
-    author_list = [a.strip() for a in author_input.split(",")]
-    comprehensive_biblio = ""
-    headers = {"Accept": "application/json"}
-    
-    for auth in author_list:
-        orcid_id = None
-        try:
-            search_url = f"https://pub.orcid.org/v3.0/search/?q={auth}"
-            s_res = requests.get(search_url, headers=headers, timeout=5).json()
-            if s_res.get('result'):
-                orcid_id = s_res['result'][0]['orcid-identifier']['path']
-        except: pass
-
-        if orcid_id:
-            try:
-                record_url = f"https://pub.orcid.org/v3.0/{orcid_id}/record"
-                r_res = requests.get(record_url, headers=headers, timeout=5).json()
-                works = r_res.get('activities-summary', {}).get('works', {}).get('group', [])
-                comprehensive_biblio += f"\n--- ORCID BIBLIOGRAPHY: {auth.upper()} ({orcid_id}) ---\n"
-                if works:
-                    for work in works[:5]:
-                        summary = work.get('work-summary', [{}])[0]
-                        title = summary.get('title', {}).get('title', {}).get('value', 'N/A')
-                        pub_date = summary.get('publication-date')
-                        year = pub_date.get('year').get('value', 'n.d.') if pub_date and pub_date.get('year') else "n.d."
-                        comprehensive_biblio += f"- [{year}] {title}\n"
-                else: comprehensive_biblio += "No public works found.\n"
-            except: pass
+# --- NIVO PODROBNOSTI: SKUPNOSTI KOT STRNJENA VOZLIŠČA (fragment se ob kliku izvede sam) ---
+@st.fragment
+def render_semantic_graph(graph, server_layout=True, lod=True, key="semantic_viz_full"):
+    """Izriše graf z velikostmi po PageRanku; veliki grafi so strnjeni po skupnostih, ki se razširijo ob kliku.
+
+    Analitika je shranjena v stanju seje skupaj s hashem grafa, postavitev pa v
+    predpomnilniku postavitev, zato ponovni zagon brez spremembe grafa ne računa ničesar znova.
+    Interakcije (klik, izbira, gumb) upoštevamo pred strnitvijo, zato ni potreben
+    `st.rerun`, ki bi ob zagonu celotne aplikacije (ne le fragmenta) odpovedal.
+    """
+    from sis.analytics import LOD_MIN_NODES, analyze_graph, collapse_communities, expandable_clusters, node_sizes
+    from sis.layout import compute_layout, graph_hash
+    with span("analytics", nodes=len(graph.nodes)):
+        gkey = graph_hash(graph)
+        state = st.session_state.get(f"{key}_lod")
+        if not state or state["graph"] != gkey:
+            state = st.session_state[f"{key}_lod"] = {"graph": gkey, "expanded": set(), "seen": None, "view": None,
+                                                      "analytics": analyze_graph(graph)}
+        analytics = state["analytics"]
+        if lod and len(graph.nodes) >= LOD_MIN_NODES:
+            if COMPONENT_ENABLED:
+                # Vrednost komponente ostane tudi ob naslednjih zagonih; upoštevamo le nov klik na zadnji izrisan pogled
+                clicked = st.session_state.get(key)
+                if clicked and clicked.get("graph") == state["view"] and clicked.get("n") != state["seen"]:
+                    state["seen"] = clicked.get("n")
+                    state["expanded"] ^= {clicked["toggle"]}
+            else:
+                # Ključ vsebuje hash grafa: nov graf z enakimi id-ji skupin dobi nov gradnik
+                state["expanded"] = set(st.multiselect("Expand clusters:", expandable_clusters(analytics),
+                                                       default=sorted(state["expanded"]), key=f"{key}_lod_pick_{gkey}"))
+            view, sizes = collapse_communities(graph, analytics, state["expanded"])
+            st.caption(f"🧩 {analytics.n_communities} communities · showing {len(view.nodes)} of {len(graph.nodes)} nodes"
+                       + (" (click a cluster to expand it)" if COMPONENT_ENABLED else ""))
         else:
-            try:
-                ss_url = f"https://api.semanticscholar.org/graph/v1/paper/search?query=author:\"{auth}\"&limit=3&fields=title,year"
-                ss_res = requests.get(ss_url, timeout=5).json()
-                papers = ss_res.get("data", [])
-                if papers:
-                    comprehensive_biblio += f"\n--- SCHOLAR BIBLIOGRAPHY: {auth.upper()} ---\n"
-                    for p in papers:
-                        comprehensive_biblio += f"- [{p.get('year','n.d.')}] {p['title']}\n"
-            except: pass
-    return comprehensive_biblio
+            view, sizes = graph, node_sizes(graph, analytics)
+    with span("layout", nodes=len(view.nodes)):
+        positions = compute_layout(view) if server_layout else None
+    with span("render", nodes=len(view.nodes)):
+        state["view"] = graph_hash(view)
+        if COMPONENT_ENABLED:
+            render_graph_component(graph_elements(view, sizes), positions, graph_key=state["view"], key=key)
+        else:
+            render_cytoscape_network(graph_elements(view, sizes), key, positions)
+    if view is not graph and COMPONENT_ENABLED and state["expanded"]:
+        # Povratni klic teče pred naslednjim zagonom, zato strnitev ne potrebuje `st.rerun`
+        st.button("Collapse all clusters", key=f"{key}_lod_reset", on_click=state["expanded"].clear)
 
 # =========================================================
 # 1. POPOLNA MULTIDIMENZIONALNA ONTOLOGIJA (IMAGE LOGIC)
 # =========================================================
-KNOWLEDGE_BASE = {
-    "mental approaches": ["Perspective shifting", "Induction", "Deduction", "Hierarchy", "Mini-max", "Whole and part", "Addition and composition", "Balance", "Abstraction and elimination", "Openness and closedness", "Bipolarity and dialectics", "Framework and foundation", "Pleasure and displeasure", "Similarity and difference", "Core (Attraction & Repulsion)", "Condensation", "Constant", "Associativity"],
-    "User profiles": {"Adventurers": {"description": "Explorers of hidden patterns."}, "Applicators": {"description": "Efficiency focused."}, "Know-it-alls": {"description": "Systemic clarity."}, "Observers": {"description": "System monitors."}},
-    "Scientific paradigms": {"Empiricism": "Sensory experience.", "Rationalism": "Deductive logic.", "Constructivism": "Social build.", "Positivism": "Strict facts.", "Pragmatism": "Practical utility."},
-    "Structural models": {"Causal Connections": "Causality.", "Principles & Relations": "Fundamental laws.", "Episodes & Sequences": "Time-flow.", "Facts & Characteristics": "Raw data.", "Generalizations": "Frameworks.", "Glossary": "Definitions.", "Concepts": "Abstract constructs."},
-    "Science fields": {
-        "Mathematics": {"cat": "Formal", "methods": ["Formal Proof", "Axiomatization", "Statistical Inference", "Mathematical Modeling"], "tools": ["MATLAB", "Mathematica", "LaTeX", "Calculus"], "facets": ["Topology", "Algebra", "Analysis", "Number Theory"]},
-        "Physics": {"cat": "Natural", "methods": ["Modeling", "Simulation"], "tools": ["Accelerator", "Spectrometer"], "facets": ["Quantum", "Relativity"]},
-        "Chemistry": {"cat": "Natural", "methods": ["Synthesis", "Spectroscopy"], "tools": ["NMR", "Chromatography"], "facets": ["Organic", "Molecular"]},
-        "Biology": {"cat": "Natural", "methods": ["Sequencing", "CRISPR"], "tools": ["Microscope", "Bio-Incubator"], "facets": ["Genetics", "Ecology"]},
-        "Ecology": {"cat": "Natural", "methods": ["Ecosystem Modeling", "Field Sampling", "Biodiversity Assessment"], "tools": ["GIS", "Satellite Imagery", "Environmental Sensors"], "facets": ["Conservation", "Sustainability", "Ecosystem Services"]},
-        "Neuroscience": {"cat": "Natural", "methods": ["Neuroimaging", "Electrophys"], "tools": ["fMRI", "EEG"], "facets": ["Plasticity", "Synaptic"]},
-        "Psychology": {"cat": "Social", "methods": ["Double-Blind Trials", "Psychometrics"], "tools": ["fMRI", "Testing Kits"], "facets": ["Behavioral", "Cognitive"]},
-        "Sociology": {"cat": "Social", "methods": ["Ethnography", "Surveys"], "tools": ["Data Analytics", "Archives"], "facets": ["Stratification", "Dynamics"]},
-        "Legal science": {"cat": "Social", "methods": ["Legal Research", "Normative Analysis", "Comparative Law"], "tools": ["Legal Databases", "Case Archives", "Constitutional Texts"], "facets": ["Jurisprudence", "Human Rights", "Policy Analysis"]},
-        "Computer Science": {"cat": "Formal", "methods": ["Algorithm Design", "Verification"], "tools": ["LLMGraphTransformer", "GPU Clusters", "Git"], "facets": ["AI", "Cybersecurity"]},
-        "Medicine": {"cat": "Applied", "methods": ["Clinical Trials", "Epidemiology"], "tools": ["MRI/CT", "Bio-Markers"], "facets": ["Immunology", "Pharmacology"]},
-        "Engineering": {"cat": "Applied", "methods": ["Prototyping", "FEA Analysis"], "tools": ["3D Printers", "CAD Software"], "facets": ["Robotics", "Nanotech"]},
-        "Library Science": {"cat": "Applied", "methods": ["Taxonomy", "Appraisal"], "tools": ["OPAC", "Metadata"], "facets": ["Retrieval", "Knowledge Org"]},
-        "Philosophy": {"cat": "Humanities", "methods": ["Socratic Method", "Phenomenology"], "tools": ["Logic Mapping", "Critical Analysis"], "facets": ["Epistemology", "Metaphysics"]},
-        "Linguistics": {"cat": "Humanities", "methods": ["Corpus Analysis", "Syntactic Parsing"], "tools": ["Praat", "NLTK Toolkit"], "facets": ["Socioling", "CompLing"]},
-        "Geography": {"cat": "Natural/Social", "methods": ["Spatial Analysis", "GIS"], "tools": ["ArcGIS"], "facets": ["Human Geo", "Physical Geo"]},
-        "Geology": {"cat": "Natural", "methods": ["Stratigraphy", "Mineralogy"], "tools": ["Seismograph"], "facets": ["Tectonics", "Petrology"]},
-        "Climatology": {"cat": "Natural", "methods": ["Climate Modeling"], "tools": ["Weather Stations"], "facets": ["Change Analysis"]},
-        "History": {"cat": "Humanities", "methods": ["Archives"], "tools": ["Archives"], "facets": ["Social History"]},
-        "Economics": {"cat": "Social", "methods": ["Econometrics", "Game Theory", "Market Modeling"], "tools": ["Stata", "R", "Bloomberg"], "facets": ["Macroeconomics", "Behavioral Economics"]},
-        "Politics": {"cat": "Social", "methods": ["Policy Analysis", "Comparative Politics"], "tools": ["Polls", "Legislative Databases"], "facets": ["International Relations", "Governance"]},
-        "Criminology": {"cat": "Social", "methods": ["Case Studies", "Statistical Analysis", "Profiling"], "tools": ["NCVS", "Crime Mapping Software"], "facets": ["Victimology", "Penology", "Criminal Behavior"]},
-        "Forensic sciences": {"cat": "Applied/Natural", "methods": ["DNA Profiling", "Ballistics", "Trace Analysis"], "tools": ["Mass Spectrometer", "Luminol", "Comparison Microscope"], "facets": ["Toxicology", "Pathology", "Digital Forensics"]}
-    }
-}
+# Vir: sis/data/knowledge_base.json (ali SIS_ONTOLOGY -> JSON/SQLite); prevede se enkrat na proces
+ONTOLOGY = load_ontology()
+KNOWLEDGE_BASE = ONTOLOGY.knowledge_base
 
 # =========================================================
 # 2. STREAMLIT INTERFACE KONSTRUKCIJA
@@ -270,10 +197,17 @@ KNOWLEDGE_BASE = {
 
 if 'expertise_val' not in st.session_state: st.session_state.expertise_val = "Expert"
 if 'show_user_guide' not in st.session_state: st.session_state.show_user_guide = False
+if 'sis_session_id' not in st.session_state: st.session_state.sis_session_id = uuid.uuid4().hex
+if 'biblio_prefetch' not in st.session_state: st.session_state.biblio_prefetch = BiblioPrefetch()
+
+# Meritve: sled tega zagona skripte + (po želji) HTTP točka /metrics za cel proces
+RUN_TRACE = start_trace()
+RUN_STARTED = time.perf_counter()
+start_metrics_server()
 
 # --- STRANSKA VRSTICA ---
 with st.sidebar:
-    st.markdown(f'<div style="text-align:center"><img src="data:image/svg+xml;base64,{get_svg_base64(SVG_3D_RELIEF)}" width="220"></div>', unsafe_allow_html=True)
+    st.markdown(LOGO_HTML, unsafe_allow_html=True)
     st.header("⚙️ Control Panel")
     
     api_key = st.text_input(
@@ -281,34 +215,27 @@ with st.sidebar:
         type="password", 
         help="Security: Your key is held only in volatile RAM and is never stored on our servers."
     )
+    stream_output = st.toggle("⚡ Stream Synthesis Output", value=True, help="Render the dissertation progressively as tokens arrive.")
+    server_layout = st.toggle("📐 Server-side Graph Layout", value=True, help="Precompute node positions on the server (cached per graph) instead of running the force simulation in the browser.")
+    lod_graph = st.toggle("🧩 Level-of-Detail Graph", value=True, help="Size nodes by PageRank and collapse large graphs into community clusters that expand on click.")
+    fanout = st.toggle("🔀 Fan-out Synthesis", value=False, help="One shorter parallel generation per selected user profile (or science field), merged into one document and one deduplicated graph.")
+    accumulate_graph = st.toggle("🗃️ Accumulate Knowledge Graph", value=False, help="Merge every synthesized graph into a persistent, cumulative knowledge graph shared by this server. Concepts and relations are visible to all sessions; your inquiries and authors are shown only in this session.")
+    bypass_cache = st.checkbox("🔄 Bypass Synthesis Cache", value=False, help="Always query the model, even if an identical configuration was already synthesized.")
+    st.toggle("🔮 Prefetch Bibliographies", value=True, key="prefetch_biblio", help="Start author lookups as soon as the author field changes, so results are ready when you press Execute.")
+    show_diagnostics = st.checkbox("🩺 Show Diagnostics", value=False, help="Per-stage timings of this run and process-wide counters (swallowed errors, cache hits, graph parsing).")
     
     if st.button("📖 User Guide"):
         st.session_state.show_user_guide = not st.session_state.show_user_guide
         st.rerun()
     if st.session_state.show_user_guide:
-        st.info("""
-        1. **API Key**: Enter your key to connect the AI engine. It is NOT stored on the server.
-        2. **Minimal Config**: Physics, CS, and Linguistics are pre-selected.
-        3. **Authors**: Provide author names to fetch ORCID metadata.
-        4. **Inquiry**: Submit a complex query for an exhaustive dissertation.
-        5. **Semantic Graph**: Explore colorful nodes interconnected via TT, BT, NT logic.
-        6. **Shapes & 3D**: Request triangles, rectangles or 3D bodies in your inquiry.
-        7. **Export PNG**: Use the 💾 button to save the graph to your local disk.
-        """)
+        st.info(USER_GUIDE)
+
         if st.button("Close Guide ✖️"): st.session_state.show_user_guide = False; st.rerun()
 
     st.divider()
     st.subheader("📚 Knowledge Explorer")
-    with st.expander("👤 User Profiles"):
-        for p, d in KNOWLEDGE_BASE["User profiles"].items(): st.write(f"**{p}**: {d['description']}")
-    with st.expander("🧠 mental approaches"):
-        for a in KNOWLEDGE_BASE["mental approaches"]: st.write(f"• {a}")
-    with st.expander("🌍 Scientific paradigms"):
-        for p, d in KNOWLEDGE_BASE["Scientific paradigms"].items(): st.write(f"**{p}**: {d}")
-    with st.expander("🔬 Science fields"):
-        for s in sorted(KNOWLEDGE_BASE["Science fields"].keys()): st.write(f"• **{s}**")
-    with st.expander("🏗️ Structural models"):
-        for m, d in KNOWLEDGE_BASE["Structural models"].items(): st.write(f"**{m}**: {d}")
+    for title, body in explorer_sections(ONTOLOGY):
+        with st.expander(title): st.markdown(body)
     
     st.divider()
     if st.button("♻️ Reset Session", use_container_width=True):
@@ -327,47 +254,47 @@ st.markdown("Advanced Multi-dimensional synthesis with **Geometrical Exportable
 
 st.markdown("### 🛠️ Configure Your Multi-Dimensional Cognitive Build")
 
+# Špekulativno: iskanja avtorjev začnejo teči ob spremembi polja, ne šele ob zagonu sinteze
+def prefetch_bibliographies():
+    if st.session_state.get("prefetch_biblio", True):
+        st.session_state.biblio_prefetch.update(st.session_state.get("target_authors_key", ""))
+
 # ROW 1: AUTHORS
 r1_c1, r1_c2, r1_c3 = st.columns([1, 2, 1])
 with r1_c2:
-    target_authors = st.text_input("👤 Research Authors:", placeholder="Karl Petrič, Samo Kralj, Teodor Petrič", key="target_authors_key")
+    target_authors = st.text_input("👤 Research Authors:", placeholder="Karl Petrič, Samo Kralj, Teodor Petrič", key="target_authors_key",
+                                   on_change=prefetch_bibliographies)
     st.caption("Active bibliographic analysis via ORCID (includes publication years).")
 
 # ROW 2: CORE CONFIG (Minimal settings, specific fields)
 r2_c1, r2_c2, r2_c3 = st.columns(3)
 with r2_c1:
-    sel_profiles = st.multiselect("1. User Profiles:", list(KNOWLEDGE_BASE["User profiles"].keys()), default=["Adventurers"])
+    sel_profiles = st.multiselect("1. User Profiles:", ONTOLOGY.profiles, default=["Adventurers"])
 with r2_c2:
-    all_sciences = sorted(list(KNOWLEDGE_BASE["Science fields"].keys()))
     # PRIVZETO: Physics, Computer science in Linguistics
-    sel_sciences = st.multiselect("2. Science Fields:", all_sciences, default=["Physics", "Computer Science", "Linguistics"])
+    sel_sciences = st.multiselect("2. Science Fields:", ONTOLOGY.fields, default=["Physics", "Computer Science", "Linguistics"])
 with r2_c3:
     expertise = st.select_slider("3. Expertise Level:", options=["Novice", "Intermediate", "Expert"], value=st.session_state.expertise_val)
 
 # ROW 3: PARADIGMS & MODELS (Minimal settings)
 r3_c1, r3_c2, r3_c3 = st.columns(3)
 with r3_c1:
-    sel_models = st.multiselect("4. Structural Models:", list(KNOWLEDGE_BASE["Structural models"].keys()), default=["Concepts"])
+    sel_models = st.multiselect("4. Structural Models:", ONTOLOGY.models, default=["Concepts"])
 with r3_c2:
-    sel_paradigms = st.multiselect("5. Scientific Paradigms:", list(KNOWLEDGE_BASE["Scientific paradigms"].keys()), default=["Rationalism"])
+    sel_paradigms = st.multiselect("5. Scientific Paradigms:", ONTOLOGY.paradigms, default=["Rationalism"])
 with r3_c3:
     goal_context = st.selectbox("6. Context / Goal:", ["Scientific Research", "Problem Solving", "Educational", "Policy Making"])
 
 # ROW 4: APPROACHES, METHODS, TOOLS (RESTORED - Minimal settings)
 r4_c1, r4_c2, r4_c3 = st.columns(3)
 with r4_c1:
-    sel_approaches = st.multiselect("7. mental approaches:", KNOWLEDGE_BASE["mental approaches"], default=["Perspective shifting"])
-
-agg_meth, agg_tool = [], []
-for s in sel_sciences:
-    if s in KNOWLEDGE_BASE["Science fields"]:
-        agg_meth.extend(KNOWLEDGE_BASE["Science fields"][s]["methods"])
-        agg_tool.extend(KNOWLEDGE_BASE["Science fields"][s]["tools"])
+    sel_approaches = st.multiselect("7. mental approaches:", ONTOLOGY.approaches, default=["Perspective shifting"])
 
+# Metode in orodja iz inverznih indeksov ontologije (brez ponovnega pregleda slovarja)
 with r4_c2:
-    sel_methods = st.multiselect("8. Methodologies:", sorted(list(set(agg_meth))), default=[])
+    sel_methods = st.multiselect("8. Methodologies:", ONTOLOGY.methods_for(sel_sciences), default=[])
 with r4_c3:
-    sel_tools = st.multiselect("9. Specific Tools:", sorted(list(set(agg_tool))), default=[])
+    sel_tools = st.multiselect("9. Specific Tools:", ONTOLOGY.tools_for(sel_sciences), default=[])
 
 st.divider()
 
@@ -378,152 +305,210 @@ with r5_c1:
                              placeholder="Create a synergy for global problems using triangle shapes for causes and 3D geometric bodies for solutions.",
                              height=150, key="user_query_key")
 with r5_c2:
-    uploaded_txt = st.file_uploader("📂 Attach .TXT Context", type=["txt"], help="Upload additional context (Limit: 200 KB).")
-    txt_content = ""
+    uploaded_txt = st.file_uploader("📂 Attach .TXT Context", type=["txt"],
+                                    help=f"Upload additional context (Limit: {MAX_UPLOAD_BYTES // (1024 * 1024)} MB; large files are condensed chunk by chunk).")
     if uploaded_txt is not None:
-        if uploaded_txt.size > 200 * 1024:
-            st.error("File size exceeds 200 KB limit.")
+        if uploaded_txt.size > MAX_UPLOAD_BYTES:
+            st.error(f"File size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit.")
+            uploaded_txt = None
         else:
-            txt_content = uploaded_txt.getvalue().decode("utf-8")
             st.success("File context attached.")
 
 # =========================================================
 # 3. JEDRO SINTEZE: GROQ AI + INTERCONNECTED 18D GRAPH
 # =========================================================
-if st.button("🚀 Execute Multi-Dimensional Synthesis", use_container_width=True):
+execute = st.button("🚀 Execute Multi-Dimensional Synthesis", use_container_width=True)
+output_area = st.container()
+if execute:
     if not api_key: st.error("Missing Groq API Key. Please provide your own key in the sidebar.")
     elif not user_query: st.warning("Please provide an inquiry.")
     else:
+        from sis.fanout import perspectives, run_fanout
+        from sis.layout import graph_hash
+        from sis.pipeline import SynthesisConfig, is_cached, run_synthesis
+        from sis.thesaurus import load_thesaurus
+        st.session_state.pop("sis_output", None)
+        live = output_area.empty()
         try:
-            # Merge text content if present
-            final_query = user_query
-            if txt_content:
-                final_query += f"\n\n--- ADDITIONAL CONTEXT FROM UPLOADED FILE ---\n{txt_content}"
-                
-            biblio = fetch_author_bibliographies(target_authors) if target_authors else ""
-            client = OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
-            
-            # --- DODAJANJE HIERARHIČNE ASOCIATIVNE LOGIKE ---
-            q_lower = final_query.lower()
-            is_strict_hier = "striktna hierarhična logika" in q_lower
-            is_relational_only = "relacijska logika" in q_lower
-
-            if is_strict_hier:
-                logic_type = "Strict hierarchical logic"
-                logic_desc = "Uporabi IZKLJUČNO hierarhične relacije: TT (Top Term), BT (Broader Term), NT (Narrower Term). Fokus na vertikalni taksonomiji."
-            elif is_relational_only:
-                logic_type = "Relational logic"
-                logic_desc = "Uporabi IZKLJUČNO lateralne relacije: AS (Associative), EQ (Equivalent), IN (Inheritance/Class). Fokus na mrežni povezanosti."
-            else:
-                logic_type = "Hierarchical associative logic"
-                logic_desc = "Integriraj CELOTEN nabor relacij: Hierarhične (TT, BT, NT) za strukturo in asociativne (AS, EQ, IN) za lateralne povezave."
-
-            # SISTEMSKO NAVODILO (Z INTEGRIRANO LOGIKO IN POVEČANIM ŠTEVILOM VOZLIŠČ)
-            sys_prompt = f"""
-            You are the SIS Synthesizer. Perform an exhaustive dissertation (1500+ words).
-            
-            MANDATORY ARCHITECTURAL LOGIC: {logic_type}
-            {logic_desc}
-
-            STRUCTURE (MANDATORY IMAGE LOGIC): 
-            1. Root: Authors --TT--> User profiles, Science fields, Expertise level.
-            2. Science fields --BT--> Expertise level --NT--> Structural models.
-            3. Structural models --AS--> Scientific paradigms.
-            4. Scientific paradigms --RT--> mental approaches, methodologies in specific tools.
-            5. Scientific paradigms --AS--> Context/Goal.
-            6. In all graph edges, use the correct tags: TT, BT, NT, AS, EQ, IN.
-            
-            FIELDS: {", ".join(sel_sciences)}. CONTEXT AUTHORS: {biblio}.
-            
-            THESAURUS ALGORITHM & UML LOGIC.
-
-            GEOMETRICAL VISUALIZATION TASK:
-            - Analyze user inquiry for shape preferences (triangle, rectangle, hexagon, 3D/diamond).
-            - Default shape is 'ellipse'.
-            
-            STRICT FORMATTING & SPACE ALLOCATION:
-            - Focus 100% of the textual content on deep research, causal analysis, and innovative problem-solving synergy.
-            - ABSOLUTELY PROHIBITED: Do not list nodes, edges, properties, shapes, or colors in text.
-            - DO NOT explain the visualization or JSON schema in the text.
-            - End with '### SEMANTIC_GRAPH_JSON' followed by valid JSON only.
-            
-            GRAPH DENSITY REQUIREMENT:
-            - GENERATE A DENSE SEMANTIC NETWORK WITH APPROXIMATELY 30 INTERCONNECTED NODES.
-            - Ensure every scientific field and structural model is represented by multiple specific leaf nodes.
-            
-            JSON schema: {{"nodes": [{{"id": "n1", "label": "Text", "type": "Root|Branch|Leaf|Class", "color": "#hex", "shape": "triangle|rectangle|ellipse|diamond"}}], "edges": [{{"source": "n1", "target": "n2", "rel_type": "BT|NT|AS|Inheritance|EQ|TT|IN"}}]}}
-            """
-            
-            with st.spinner('Synthesizing exhaustive interdisciplinary synergy (8–40s)...'):
-                response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "system", "content": sys_prompt}, {"role": "user", "content": final_query}],
-                    temperature=0.6, max_tokens=4000
+            with live.container():
+                # Priloga: kratka gre dobesedno, dolga skozi vzporedni povzetek kosov (map) in združevanje (reduce)
+                txt_content, notes = "", []
+                if uploaded_txt is not None:
+                    uploaded_txt.seek(0)
+                    ingest_slot = st.empty()
+                    with st.spinner("Condensing attached context..."):
+                        # Klici povzetkov gredo skozi isto pravično vrsto kot sinteze (en posel na kos)
+                        txt_content, n_chunks = ingest_context(
+                            uploaded_txt, None,
+                            on_progress=lambda n: ingest_slot.caption(f"📄 Condensed {n} chunks of the attached file..."),
+                            submit=lambda job: get_scheduler().submit(st.session_state.sis_session_id, api_key, GROQ_BASE_URL,
+                                                                      lambda client, t: job(client)),
+                        )
+                    if n_chunks: notes.append(f"📄 Attached file condensed from {n_chunks} chunks into ~{estimate_tokens(txt_content)} tokens.")
+                    ingest_slot.empty()
+                cfg = SynthesisConfig(
+                    query=user_query, authors=target_authors, profiles=sel_profiles, sciences=sel_sciences,
+                    expertise=expertise, models=sel_models, paradigms=sel_paradigms, goal=goal_context,
+                    approaches=sel_approaches, methods=sel_methods, tools=sel_tools, context_text=txt_content,
                 )
-                
-                text_out = response.choices[0].message.content
-                parts = text_out.split("### SEMANTIC_GRAPH_JSON")
-                main_markdown = parts[0]
-                
-                # --- PROCESIRANJE BESEDILA (Google Search + Authors + Anchors) ---
-                if len(parts) > 1:
-                    try:
-                        g_json = json.loads(re.search(r'\{.*\}', parts[1], re.DOTALL).group())
-                        # 1. Koncepti -> Google Search + ID značka
-                        for n in g_json.get("nodes", []):
-                            lbl, nid = n["label"], n["id"]
-                            g_url = urllib.parse.quote(lbl)
-                            pattern = re.compile(re.escape(lbl), re.IGNORECASE)
-                            replacement = f'<span id="{nid}"><a href="https://www.google.com/search?q={g_url}" target="_blank" class="semantic-node-highlight">{lbl}<i class="google-icon">↗</i></a></span>'
-                            main_markdown = pattern.sub(replacement, main_markdown, count=1)
-                        
-                        # 2. Avtorji -> Google Search Link
-                        if target_authors:
-                            for auth_name in target_authors.split(","):
-                                auth_stripped = auth_name.strip()
-                                if auth_stripped:
-                                    a_url = urllib.parse.quote(auth_stripped)
-                                    a_pattern = re.compile(re.escape(auth_stripped), re.IGNORECASE)
-                                    a_rep = f'<a href="https://www.google.com/search?q={a_url}" target="_blank" class="author-search-link">{auth_stripped}<i class="google-icon">↗</i></a>'
-                                    main_markdown = a_pattern.sub(a_rep, main_markdown)
-                    except: pass
+                biblio = st.session_state.biblio_prefetch.result(target_authors)
 
                 st.subheader("📊 Synthesis Output")
-                st.markdown(main_markdown, unsafe_allow_html=True)
-
-                # --- VIZUALIZACIJA (Interconnected Graph) ---
-                if len(parts) > 1:
-                    try:
-                        g_json = json.loads(re.search(r'\{.*\}', parts[1], re.DOTALL).group())
-                        st.subheader("🕸️ LLMGraphTransformer: Unified Interdisciplinary Network")
-                        st.caption(f"{logic_type}")
-                        
-                        elements = []
-                        for n in g_json.get("nodes", []):
-                            level = n.get("type", "Branch")
-                            size = 100 if level == "Class" else (90 if level == "Root" else (70 if level == "Branch" else 50))
-                            color = n.get("color", "#2a9d8f")
-                            shape = n.get("shape", "ellipse")
-                            elements.append({"data": {
-                                "id": n["id"], "label": n["label"], "color": color,
-                                "size": size, "shape": shape, "z_index": 10 if level in ["Root", "Class"] else 1
-                            }})
-                        for e in g_json.get("edges", []):
-                            elements.append({"data": {
-                                "source": e["source"], "target": e["target"], "rel_type": e.get("rel_type", "AS")
-                            }})
-                        render_cytoscape_network(elements, "semantic_viz_full")
-                    except: st.warning("Graph data could not be parsed.")
-
-                if biblio:
-                    with st.expander("📚 View Metadata Fetched from Research Databases"):
-                        st.text(biblio)
-                
+                queue_slot = st.empty()
+                output_slot = st.empty()
+
+                # Poziv (logika, tezaver, rangirni fokus) -> predpomnilnik ali skupna vrsta procesa (s pretakanjem ali brez)
+                spinner_text = 'Streaming synthesis...' if stream_output else 'Synthesizing exhaustive interdisciplinary synergy (8–40s)...'
+                with st.spinner(spinner_text):
+                    if not fanout and not bypass_cache and is_cached(cfg, biblio, ONTOLOGY):
+                        result = run_synthesis(cfg, None, biblio=biblio, ontology=ONTOLOGY)
+                    elif fanout and len(perspectives(cfg)) > 1:
+                        # Vsak krak je lasten posel v vrsti ključa; zaključene krake slikamo iz niti skripte
+                        scheduler = get_scheduler()
+                        if stream_output: queue_slot.caption("🔀 Fan-out shows each perspective as it completes (no token streaming).")
+                        result = run_fanout(
+                            cfg, None, biblio=biblio, use_cache=not bypass_cache, on_text=output_slot.markdown, ontology=ONTOLOGY,
+                            submit=lambda job: scheduler.submit(st.session_state.sis_session_id, api_key, GROQ_BASE_URL,
+                                                                lambda client, t: job(client)),
+                        )
+                        queue_slot.empty()
+                    else:
+                        scheduler = get_scheduler()
+                        # Delavec le zapisuje delno besedilo v listek; slikamo ga iz niti skripte
+                        ticket = scheduler.submit(
+                            st.session_state.sis_session_id, api_key, GROQ_BASE_URL,
+                            lambda client, t: run_synthesis(cfg, client, biblio=biblio, use_cache=not bypass_cache,
+                                                            stream=stream_output, on_text=t.set_partial, ontology=ONTOLOGY),
+                        )
+                        painted = None
+                        while not ticket.wait(0.1):
+                            if ticket.state == "queued":
+                                queue_slot.info(f"⏳ Queued: position {scheduler.position(ticket)} · "
+                                                f"estimated wait ~{scheduler.estimated_wait(ticket):.0f}s")
+                            elif ticket.state == "retrying":
+                                queue_slot.info(f"⏳ Provider rate limit reached, retrying (attempt {ticket.attempts})...")
+                            else:
+                                queue_slot.empty()
+                                if ticket.partial and ticket.partial is not painted:
+                                    painted = ticket.partial
+                                    output_slot.markdown(painted)
+                        queue_slot.empty()
+                        result = ticket.result()
+
+                # --- PROCESIRANJE BESEDILA (Google Search + Authors + Anchors) in zlivanje grafa: enkrat na sintezo ---
+                main_markdown, graph, edge_check, kg_merge = result.markdown, result.graph, {}, None
+                if graph is not None:
+                    # Koncepti -> Google Search + ID značka, avtorji -> Google Search Link (en prehod)
+                    with span("annotate"):
+                        main_markdown = annotate_markdown(main_markdown, graph.node_pairs(), split_authors(target_authors))
+                    edge_check = load_thesaurus(ONTOLOGY).validate_graph(graph)
+                    if accumulate_graph:
+                        _, new_nodes, new_edges = get_graph_store().merge(graph, inquiry=user_query, authors=target_authors,
+                                                                          graph_key=graph_hash(graph),
+                                                                          session=st.session_state.sis_session_id)
+                        kg_merge = (new_nodes, new_edges, get_graph_store().stats()["nodes"])
+            # Rezultat ostane v stanju seje: sprememba gradnika ga samo ponovno prikaže (brez sinteze in postavitve)
+            st.session_state.sis_output = {"result": result, "markdown": main_markdown, "edge_check": edge_check,
+                                           "kg_merge": kg_merge, "notes": notes}
+            live.empty()
         except Exception as e:
-            st.error(f"Synthesis failed: {e}")
+            record_error("synthesis")
+            st.error(f"Synthesis failed: {type(e).__name__}: {e}")
+
+if st.session_state.get("sis_output"):
+    output = st.session_state.sis_output
+    result, graph = output["result"], output["result"].graph
+    with output_area:
+        for note in output["notes"]: st.caption(note)
+        st.subheader("📊 Synthesis Output")
+        if result.cached:
+            st.caption("⚡ Served from synthesis cache (enable 'Bypass Synthesis Cache' for a fresh generation).")
+        if result.perspectives:
+            st.caption(f"🔀 Fan-out: {len(result.perspectives)} parallel perspectives merged in {result.elapsed:.1f}s.")
+        if result.prompt:
+            trimmed = ", ".join(f"{k} {v}" for k, v in result.prompt["trimmed"].items())
+            st.caption(f"🧾 Prompt: {result.prompt['system_tokens']} system + {result.prompt['user_tokens']} inquiry tokens "
+                       f"(system budget {result.prompt['budget']})" + (f" · trimmed: {trimmed}" if trimmed else ""))
+        st.markdown(output["markdown"], unsafe_allow_html=True)
+
+        # --- VIZUALIZACIJA (Interconnected Graph) ---
+        if graph is not None:
+            st.subheader("🕸️ LLMGraphTransformer: Unified Interdisciplinary Network")
+            st.caption(f"{result.logic_type}")
+            linked = sum(1 for n in graph.nodes if n.concept)
+            if linked:
+                st.caption(f"🔗 Ontology linking: {linked} of {len(graph.nodes)} nodes mapped to canonical concepts.")
+            edge_check = output["edge_check"]
+            if edge_check.get("confirmed") or edge_check.get("inverted"):
+                st.caption(f"🧭 Thesaurus check: {edge_check.get('confirmed', 0)} edges confirmed, "
+                           f"{edge_check.get('inverted', 0)} inverted, {edge_check.get('new', 0)} new.")
+            if graph.salvaged:
+                st.caption(f"⚠️ Graph JSON was incomplete; recovered {len(graph.nodes)} nodes and {len(graph.edges)} edges.")
+            render_semantic_graph(graph, server_layout, lod_graph)
+            if output["kg_merge"]:
+                new_nodes, new_edges, total_nodes = output["kg_merge"]
+                st.caption(f"🗃️ Cumulative knowledge graph: +{new_nodes} nodes, +{new_edges} edges "
+                           f"({total_nodes} nodes in total).")
+        elif result.graph_tail is not None:
+            st.warning("Graph data could not be parsed.")
+
+        with st.expander("📈 Multi-Dimensional Rank Thesaurus Focus"):
+            for kind, items in result.ranked.items():
+                st.write(f"**{kind.title()}**: " + ", ".join(f"{name} ({score:.2f})" for name, score in items))
+
+        if result.biblio:
+            with st.expander("📚 View Metadata Fetched from Research Databases"):
+                st.text(result.biblio)
+
+# =========================================================
+# 4. KUMULATIVNI GRAF ZNANJA (poizvedbe po soseščinah)
+# =========================================================
+with st.expander("🗃️ Cumulative Knowledge Graph Explorer"):
+    store = get_graph_store()
+    totals = store.stats()
+    st.caption(f"{totals['nodes']} concepts · {totals['edges']} relations · {totals['syntheses']} syntheses merged")
+    kg_query = st.text_input("Find concept:", key="kg_query")
+    if kg_query:
+        matches = store.search(kg_query)
+        if not matches:
+            st.info("No matching concepts in the cumulative graph.")
+        else:
+            kg_focus = st.selectbox("Concept:", [label for label, _ in matches],
+                                    format_func=lambda l: f"{l} ({dict(matches)[l]}×)")
+            kg_depth = st.slider("Neighborhood depth:", 1, 3, 1)
+            sub = store.neighborhood([kg_focus], depth=kg_depth)
+            st.caption(f"{len(sub.nodes)} nodes, {len(sub.edges)} edges around '{kg_focus}'.")
+            render_semantic_graph(sub, server_layout, lod_graph, key="knowledge_graph_view")
+            # Isti pojem ontologije je le predlog: sopomenka nastane šele s potrditvijo uporabnika
+            related = store.same_concept(kg_focus)
+            if related:
+                alias = st.selectbox("Same ontology concept:", related, key="kg_alias")
+                if st.button(f"Merge '{alias}' into '{kg_focus}' in future syntheses", key="kg_alias_confirm"):
+                    store.add_synonym(alias, kg_focus)
+                    st.success(f"'{alias}' is now a synonym of '{kg_focus}'.")
+            for inquiry, authors, created in store.provenance(kg_focus, session=st.session_state.sis_session_id, limit=5):
+                st.caption(f"↳ {datetime.fromtimestamp(created):%Y-%m-%d %H:%M} · {inquiry[:120]}" + (f" · {authors}" if authors else ""))
+
+# =========================================================
+# 5. DIAGNOSTIKA (razponi faz in števci procesa)
+# =========================================================
+if show_diagnostics:
+    with st.expander("🩺 Diagnostics", expanded=True):
+        st.caption("This run")
+        if RUN_TRACE:
+            st.dataframe([{"stage": r["name"], "value": r.get("value"), "detail": ", ".join(f"{k}={v}" for k, v in r.items() if k not in ("name", "value"))}
+                          for r in RUN_TRACE], hide_index=True)
+        else:
+            st.write("No instrumented stages ran in this script run.")
+        metrics = snapshot()
+        st.caption("Process totals")
+        st.dataframe([{"stage": name, **h} for name, h in sorted(metrics["histograms"].items())], hide_index=True)
+        st.json(metrics["counters"], expanded=False)
 
 st.divider()
 st.caption("SIS Universal Knowledge Synthesizer | v18.0 Comprehensive 18D Geometrical Export Edition | 2026")
+# Trajanje celotnega zagona skripte (proračun ponovnega zagona meri bench/rerun.py)
+observe("app.rerun.ms", (time.perf_counter() - RUN_STARTED) * 1000.0)
 
 
 
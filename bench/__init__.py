@@ -0,0 +1 @@
+"""SIS meritve: ponovljiv zagon cevovoda brez omrežja (lokalni nadomestki storitev)."""
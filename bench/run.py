@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# =========================================================
+# MERITVE CEVOVODA PO FAZAH (brez omrežja, z lokalnimi nadomestki)
+# =========================================================
+STAGES = ("biblio", "prompt", "llm_ttft", "llm", "split", "parse", "annotate", "analytics", "serialize", "layout", "merge",
+          "total")
+PERCENTILES = (50, 90, 95, 99)
+BASELINE = {"authors": 3, "nodes": 30, "words": 1500}
+SWEEPS = {
+    "authors": (0, 1, 5, 10, 20),
+    "nodes": (30, 300, 1000, 5000),
+    "words": (500, 3000, 8000, 15000),
+}
+QUICK_SWEEPS = {"authors": (0, 5), "nodes": (30, 1000), "words": (500, 8000)}
+
+
+def scenarios(sweeps):
+    """Osnovni scenarij in za vsako dimenzijo niz vrednosti ob ostalih osnovnih (brez podvojitev)."""
+    seen, out = set(), []
+    for dim, values in sweeps.items():
+        for value in values:
+            params = dict(BASELINE, **{dim: value})
+            key = tuple(sorted(params.items()))
+            if key in seen: continue
+            seen.add(key)
+            out.append((f"{dim}={value}" if params != BASELINE else "baseline", params))
+    return out
+
+
+def summarize(samples):
+    """Percentili, povprečje in maksimum v milisekundah."""
+    arr = np.asarray(samples, dtype=np.float64) * 1000.0
+    out = {f"p{p}": round(float(np.percentile(arr, p)), 3) for p in PERCENTILES}
+    out.update(mean=round(float(arr.mean()), 3), max=round(float(arr.max()), 3), n=int(arr.size))
+    return out
+
+
+def run_once(params, client, store, stream, retries):
+    """En prehod cevovoda; vrne {faza: sekunde} in število ponovnih poskusov."""
+    from sis.analytics import LOD_MIN_NODES, analyze_graph, collapse_communities, node_sizes
+    from sis.annotate import annotate_markdown
+    from sis.biblio import fetch_author_bibliographies, split_authors
+    from sis.component import compact_payload
+    from sis.graph import extract_graph, graph_elements
+    from sis.layout import compute_layout, graph_hash
+    from sis.pipeline import SynthesisConfig, build_messages, complete
+    from sis.ratelimit import call_with_retries
+    from sis.synthesis import split_synthesis_output
+
+    spans, retried = {}, [0]
+    authors = ", ".join(f"Author{i} Benchmark" for i in range(params["authors"]))
+    cfg = SynthesisConfig(query="How do semantic hierarchies shape interdisciplinary synthesis?", authors=authors)
+    started = t = time.perf_counter()
+
+    def lap(name):
+        nonlocal t
+        now = time.perf_counter()
+        spans[name] = now - t
+        t = now
+
+    biblio = fetch_author_bibliographies(authors) if authors else ""
+    lap("biblio")
+    messages, _, _ = build_messages(cfg, biblio)
+    lap("prompt")
+    first = []
+    on_text = (lambda _: first or first.append(time.perf_counter())) if stream else None
+    text_out = call_with_retries(lambda: complete(client, messages, stream=stream, on_text=on_text), retries=retries,
+                                 on_retry=lambda *_: retried.__setitem__(0, retried[0] + 1))
+    if first: spans["llm_ttft"] = first[0] - t
+    lap("llm")
+    markdown, tail = split_synthesis_output(text_out)
+    lap("split")
+    graph = extract_graph(tail)
+    lap("parse")
+    if graph is not None:
+        annotate_markdown(markdown, graph.node_pairs(), split_authors(authors))
+        lap("annotate")
+        # Kot v vmesniku: veliki grafi gredo v izris strnjeni po skupnostih
+        analytics = analyze_graph(graph)
+        if len(graph.nodes) >= LOD_MIN_NODES: view, sizes = collapse_communities(graph, analytics)
+        else: view, sizes = graph, node_sizes(graph, analytics)
+        lap("analytics")
+        json.dumps({"payload": compact_payload(graph_elements(view, sizes))})
+        lap("serialize")
+        compute_layout(view)
+        lap("layout")
+        store.merge(graph, inquiry=cfg.query, authors=authors, graph_key=graph_hash(graph))
+        lap("merge")
+    spans["total"] = time.perf_counter() - started
+    return spans, retried[0]
+
+
+def run_scenario(name, params, server, client, store, iterations, warmup, stream, retries, log):
+    """Ponovi scenarij; nadomestek vsakič vrne drug graf, zato predpomnilniki postavitve in anotacije ne zadenejo."""
+    server.profile.nodes, server.profile.words = params["nodes"], params["words"]
+    samples = {s: [] for s in STAGES}
+    retries_total = errors = 0
+    for i in range(warmup + iterations):
+        try:
+            spans, retried = run_once(params, client, store, stream, retries)
+        except Exception as exc:
+            errors += 1
+            log(f"  [error] {name}: {type(exc).__name__}: {exc}")
+            continue
+        if i < warmup: continue
+        retries_total += retried
+        for stage, value in spans.items(): samples[stage].append(value)
+
+    # Pomnilnik merimo v ločenem prehodu, ker tracemalloc upočasni izvajanje
+    tracemalloc.start()
+    try:
+        run_once(params, client, store, stream, retries)
+    except Exception: pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "name": name, "params": params,
+        "stages": {s: summarize(v) for s, v in samples.items() if v},
+        "memory": {"peak_traced_mb": round(peak / 2 ** 20, 2)},
+        "retries": retries_total, "errors": errors,
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Faze, katerih p50 je glede na osnovno datoteko počasnejši za več kot `threshold`."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        old_results = json.load(fh)
+    base = {s["name"]: s for s in old_results["scenarios"]}
+    regressions = []
+    before = old_results.get("rerun", {}).get("interaction_script", {}).get("p50")
+    after = results.get("rerun", {}).get("interaction_script", {}).get("p50")
+    if before and after and before >= 1.0 and after > before * (1 + threshold):
+        regressions.append(f"rerun script: p50 {before:.1f} -> {after:.1f} ms")
+    for scenario in results["scenarios"]:
+        old = base.get(scenario["name"])
+        if not old: continue
+        for stage, stats in scenario["stages"].items():
+            before = old["stages"].get(stage, {}).get("p50")
+            if before and before >= 1.0 and stats["p50"] > before * (1 + threshold):
+                regressions.append(f"{scenario['name']} {stage}: p50 {before:.1f} -> {stats['p50']:.1f} ms")
+    return regressions
+
+
+def run_rerun_budget(iterations, log):
+    """Čas ponovnega zagona aplikacije (bench/rerun.py) v ločenem procesu z istim okoljem nadomestkov."""
+    proc = subprocess.run([sys.executable, "-m", "bench.rerun", str(iterations)], capture_output=True, text=True,
+                          env=dict(os.environ), timeout=600)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode or not lines:
+        log(f"  [error] rerun: {(proc.stderr or proc.stdout).strip()[-300:]}")
+        return {"error": proc.returncode, "within_budget": False}
+    rerun = json.loads(lines[-1])
+    log(f"[rerun] script p50 {rerun['interaction_script']['p50']:.1f} ms · p95 {rerun['interaction_script']['p95']:.1f} ms "
+        f"(budget {rerun['budget_ms']:.0f} ms) · first run {rerun['first_ms']:.0f} ms · "
+        f"result persisted: {rerun['result_persisted']}")
+    return rerun
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline SIS pipeline benchmark with local ORCID/Scholar/LLM stand-ins.")
+    parser.add_argument("-o", "--output", default=os.path.join(tempfile.gettempdir(), "sis-bench-results.json"),
+                        help="results JSON (default outside the source tree)")
+    parser.add_argument("-n", "--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--quick", action="store_true", help="smaller sweep (for CI / pre-review runs)")
+    parser.add_argument("--no-stream", action="store_true", help="measure the non-streaming completion path")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub responses that are HTTP 500")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="every n-th LLM call returns 429")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="delay between streamed chunks in seconds")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--baseline", help="previous results JSON to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative p50 slowdown reported as regression")
+    parser.add_argument("--no-rerun", action="store_true", help="skip the Streamlit rerun-time budget measurement")
+    args = parser.parse_args(argv)
+
+    # Predpomnilniki bi merili zadetke namesto dela, zato jih izklopimo pred uvozom `sis`
+    workdir = tempfile.mkdtemp(prefix="sis-bench-")
+    os.environ.update(SIS_CACHE_DIR=workdir, SIS_BIBLIO_TTL="0", SIS_SYNTHESIS_TTL="0", SIS_INGEST_TTL="0",
+                      SIS_LAYOUT_MAX_ENTRIES="0", SIS_GRAPH_STORE=os.path.join(workdir, "knowledge_graph.sqlite"))
+    from bench.stubs import StubProfile, StubServer
+    profile = StubProfile(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                          rate_limit_every=args.rate_limit_every, token_delay=args.token_delay)
+    server = StubServer(profile).start()
+    os.environ.update(server.endpoints())
+
+    from openai import OpenAI
+    from sis.store import get_graph_store
+    client = OpenAI(api_key="bench", base_url=os.environ["SIS_LLM_BASE_URL"], max_retries=0)
+    store = get_graph_store()
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "iterations": args.iterations, "stream": not args.no_stream,
+            "stub": vars(profile), "units": "ms",
+        },
+        "scenarios": [],
+    }
+    try:
+        if not args.no_rerun:
+            # Najprej, dokler nadomestki mirujejo: proračun 50 ms ne prenese obremenitve ostalih meritev
+            server.profile.nodes, server.profile.words = BASELINE["nodes"], BASELINE["words"]
+            results["rerun"] = run_rerun_budget(args.iterations, print)
+        for name, params in scenarios(QUICK_SWEEPS if args.quick else SWEEPS):
+            print(f"[{name}] authors={params['authors']} nodes={params['nodes']} words={params['words']}")
+            scenario = run_scenario(name, params, server, client, store, args.iterations, args.warmup,
+                                    not args.no_stream, args.retries, print)
+            results["scenarios"].append(scenario)
+            total = scenario["stages"].get("total")
+            if total: print(f"  total p50 {total['p50']:.1f} ms · p95 {total['p95']:.1f} ms · "
+                            f"peak {scenario['memory']['peak_traced_mb']} MB")
+    finally:
+        server.stop()
+    results["meta"]["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    results["meta"]["stub_counters"] = server.counters
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"results written to {args.output}")
+
+    over_budget = "rerun" in results and not results["rerun"].get("within_budget")
+    if over_budget: print(f"[budget] rerun p95 exceeds {results['rerun'].get('budget_ms')} ms or result was not persisted")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for line in regressions: print(f"[regression] {line}")
+        return 1 if regressions or over_budget else 0
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
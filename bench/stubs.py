@@ -0,0 +1,177 @@
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from sis.graph import NODE_SHAPES, NODE_TYPES, REL_TYPES
+from sis.synthesis import GRAPH_MARKER
+
+# =========================================================
+# LOKALNI NADOMESTKI STORITEV (ORCID, Semantic Scholar, Groq)
+# =========================================================
+COLORS = ("#e63946", "#2a9d8f", "#264653", "#f4a261", "#8338ec", "#3a86ff")
+WORDS = ("synthesis", "structure", "semantic", "theory", "method", "network", "evidence", "model",
+         "hierarchy", "interdisciplinary", "relation", "concept", "analysis", "framework", "system")
+
+
+class StubProfile:
+    """Nastavitve obnašanja nadomestkov (spreminjajo se med scenariji)."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, rate_limit_every=0, retry_after=0.1,
+                 nodes=30, words=1500, token_delay=0.0, chunk_chars=40, seed=0):
+        self.latency = latency                  # osnovna zakasnitev odgovora (s)
+        self.jitter = jitter                    # enakomerno naključje okoli zakasnitve (s)
+        self.failure_rate = failure_rate        # delež odgovorov 500
+        self.rate_limit_every = rate_limit_every  # vsak n-ti klic LLM dobi 429 (0 = nikoli)
+        self.retry_after = retry_after
+        self.nodes = nodes                      # velikost grafa v odgovoru modela
+        self.words = words                      # dolžina disertacije v besedah
+        self.token_delay = token_delay          # zakasnitev med kosi pretoka (s)
+        self.chunk_chars = chunk_chars
+        self.seed = seed
+
+
+def synthetic_graph(nodes, rng):
+    """Graf z `nodes` vozlišči: drevo (TT/NT) plus ~50 % dodatnih asociativnih povezav."""
+    out_nodes = [{"id": f"n{i}", "label": f"Concept {i} {rng.choice(WORDS)}",
+                  "type": NODE_TYPES[0] if i == 0 else rng.choice(NODE_TYPES[1:]),
+                  "color": rng.choice(COLORS), "shape": rng.choice(NODE_SHAPES)} for i in range(nodes)]
+    edges = [{"source": f"n{rng.randrange(i)}", "target": f"n{i}", "rel_type": "NT"} for i in range(1, nodes)]
+    edges += [{"source": f"n{rng.randrange(nodes)}", "target": f"n{rng.randrange(nodes)}",
+               "rel_type": rng.choice(REL_TYPES)} for _ in range(nodes // 2)]
+    return {"nodes": out_nodes, "edges": edges}
+
+
+def synthetic_synthesis(profile, request_no):
+    """Disertacija z `words` besedami, ki omenja oznake vozlišč, in graf za oznako."""
+    rng = random.Random(profile.seed * 1_000_003 + request_no)
+    graph = synthetic_graph(profile.nodes, rng)
+    labels = [n["label"] for n in graph["nodes"]]
+    paragraphs, count = [], 0
+    while count < profile.words:
+        sentence = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        sentence.insert(rng.randrange(len(sentence)), rng.choice(labels))
+        paragraphs.append(" ".join(sentence).capitalize() + ".")
+        count += len(sentence)
+    body = "\n\n".join(f"## Section {i // 5 + 1}\n\n{p}" if i % 5 == 0 else p for i, p in enumerate(paragraphs))
+    return f"# Dissertation\n\n{body}\n\n{GRAPH_MARKER}\n```json\n{json.dumps(graph)}\n```"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args): pass
+
+    def _delay(self):
+        p = self.server.profile
+        wait = p.latency + (random.uniform(-p.jitter, p.jitter) if p.jitter else 0.0)
+        if wait > 0: time.sleep(wait)
+
+    def _json(self, code, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _maybe_fail(self):
+        if self.server.profile.failure_rate and random.random() < self.server.profile.failure_rate:
+            self.server.count("failures")
+            self._json(500, {"error": {"message": "stub failure"}})
+            return True
+        return False
+
+    # --- ORCID in Semantic Scholar ---
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self._delay()
+        if self._maybe_fail(): return
+        if url.path.startswith("/orcid/search"):
+            self.server.count("orcid_search")
+            name = query.get("q", [""])[0]
+            # Vsak tretji avtor nima ORCID zapisa, zato gre v rezervo Semantic Scholar
+            if zlib.crc32(name.encode("utf-8")) % 3 == 0: return self._json(200, {"result": []})
+            orcid = f"0000-0000-{zlib.crc32(name.encode('utf-8')) % 10000:04d}-0000"
+            return self._json(200, {"result": [{"orcid-identifier": {"path": orcid}}]})
+        if url.path.startswith("/orcid/") and url.path.endswith("/record"):
+            self.server.count("orcid_record")
+            group = [{"work-summary": [{"title": {"title": {"value": f"Work {i} on {WORDS[i]}"}},
+                                        "publication-date": {"year": {"value": str(2010 + i)}}}]} for i in range(8)]
+            return self._json(200, {"activities-summary": {"works": {"group": group}}})
+        if url.path.startswith("/scholar/paper/search"):
+            self.server.count("scholar_search")
+            return self._json(200, {"data": [{"title": f"Paper {i}", "year": 2015 + i} for i in range(3)]})
+        self._json(404, {"error": "not found"})
+
+    # --- Groq (OpenAI združljiv chat completions) ---
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        p = self.server.profile
+        n = self.server.count("llm")
+        if p.rate_limit_every and n % p.rate_limit_every == 0:
+            self.server.count("rate_limited")
+            return self._json(429, {"error": {"message": "rate limit"}}, {"Retry-After": str(p.retry_after)})
+        self._delay()
+        if self._maybe_fail(): return
+        text = synthetic_synthesis(p, n)
+        headers = {"x-ratelimit-remaining-requests": "1000", "x-ratelimit-remaining-tokens": "100000"}
+        if not body.get("stream"):
+            return self._json(200, {
+                "id": f"stub-{n}", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(text) // 4, "total_tokens": len(text) // 4},
+            }, headers)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        for k, v in headers.items(): self.send_header(k, v)
+        self.end_headers()
+        for i in range(0, len(text), p.chunk_chars):
+            chunk = {"id": f"stub-{n}", "object": "chat.completion.chunk", "created": 0, "model": body.get("model"),
+                     "choices": [{"index": 0, "delta": {"content": text[i:i + p.chunk_chars]}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            if p.token_delay: time.sleep(p.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class StubServer(ThreadingHTTPServer):
+    """En lokalni strežnik za vse tri storitve: /orcid, /scholar in /v1 (LLM)."""
+    daemon_threads = True
+
+    def __init__(self, profile=None, port=0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.profile = profile or StubProfile()
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def endpoints(self):
+        """Okoljske spremenljivke, ki usmerijo `sis` na nadomestke."""
+        return {"SIS_ORCID_API": f"{self.base}/orcid", "SIS_SCHOLAR_API": f"{self.base}/scholar",
+                "SIS_LLM_BASE_URL": f"{self.base}/v1"}
+
+    def count(self, key):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="sis-bench-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1 @@
+"""SIS jedro: moduli sinteze znanja, ki delujejo tudi izven Streamlit vmesnika."""
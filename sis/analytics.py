@@ -0,0 +1,193 @@
+import os
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+
+from sis.graph import GraphEdge, GraphNode, SemanticGraph
+
+# =========================================================
+# ANALITIKA GRAFA (stopnja, PageRank, skupnosti) + NIVO PODROBNOSTI
+# =========================================================
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOL = 1e-8
+PAGERANK_MAX_ITER = 100
+PROPAGATION_MAX_ITER = 30
+NODE_SIZE_RANGE = (40.0, 110.0)
+
+# Nivo podrobnosti: manjši grafi se izrišejo v celoti, večji kot skupine
+LOD_MIN_NODES = int(os.environ.get("SIS_LOD_MIN_NODES", 60))
+LOD_MAX_CLUSTERS = int(os.environ.get("SIS_LOD_MAX_CLUSTERS", 40))
+LOD_MAX_MEMBERS = int(os.environ.get("SIS_LOD_MAX_MEMBERS", 60))
+CLUSTER_PREFIX = "cluster:"
+CLUSTER_COLOR = "#264653"
+
+
+@dataclass
+class GraphAnalytics:
+    """Metrike vozlišč v vrstnem redu `graph.nodes` (NumPy polja)."""
+    degree: np.ndarray
+    pagerank: np.ndarray
+    community: np.ndarray
+
+    @property
+    def n_communities(self):
+        return int(self.community.max()) + 1 if self.community.size else 0
+
+    def sizes(self, low=NODE_SIZE_RANGE[0], high=NODE_SIZE_RANGE[1]):
+        """Velikost vozlišča po PageRanku (logaritemsko razpeta med `low` in `high`)."""
+        return _scale(self.pagerank, low, high)
+
+
+def _scale(values, low, high):
+    if values.size == 0: return values
+    logs = np.log(values + 1e-12)
+    span = logs.max() - logs.min()
+    if span <= 1e-9: return np.full(values.shape, (low + high) / 2.0)
+    return low + (logs - logs.min()) / span * (high - low)
+
+
+def adjacency(graph):
+    """Usmerjena matrika sosednosti (CSR, n × n) z večkratnostjo povezav kot utežjo."""
+    index = {n.id: i for i, n in enumerate(graph.nodes)}
+    pairs = [(index[e.source], index[e.target]) for e in graph.edges
+             if e.source in index and e.target in index and e.source != e.target]
+    n = len(graph.nodes)
+    if not pairs: return sparse.csr_matrix((n, n), dtype=np.float64)
+    src, dst = np.asarray(pairs).T
+    return sparse.csr_matrix((np.ones(len(pairs)), (src, dst)), shape=(n, n))
+
+
+def pagerank(adj, damping=PAGERANK_DAMPING, tol=PAGERANK_TOL, max_iter=PAGERANK_MAX_ITER):
+    """PageRank s potenčno metodo; masa vozlišč brez izhodnih povezav se razdeli enakomerno."""
+    n = adj.shape[0]
+    if n == 0: return np.zeros(0)
+    out = np.asarray(adj.sum(axis=1)).ravel()
+    dangling = out == 0
+    inv = np.divide(1.0, out, out=np.zeros(n), where=~dangling)
+    transition = (sparse.diags(inv) @ adj).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        nxt = damping * (transition @ rank + rank[dangling].sum() / n) + (1.0 - damping) / n
+        if np.abs(nxt - rank).sum() < tol:
+            rank = nxt
+            break
+        rank = nxt
+    return rank / rank.sum()
+
+
+def _row_argmax(matrix):
+    """Stolpec največje vrednosti v vsaki vrstici redke matrike (ob enakosti najmanjši; prazne vrstice -1)."""
+    matrix = matrix.tocsr()
+    matrix.sum_duplicates()
+    lengths = np.diff(matrix.indptr)
+    out = np.full(matrix.shape[0], -1, dtype=np.int64)
+    rows = np.flatnonzero(lengths)
+    if rows.size == 0: return out
+    row_max = np.maximum.reduceat(matrix.data, matrix.indptr[rows])
+    owner = np.repeat(np.arange(matrix.shape[0]), lengths)
+    hits = np.flatnonzero(matrix.data == np.repeat(row_max, lengths[rows]))
+    first_rows, first = np.unique(owner[hits], return_index=True)
+    out[first_rows] = matrix.indices[hits[first]]
+    return out
+
+
+def communities(sym, max_iter=PROPAGATION_MAX_ITER):
+    """Skupnosti s širjenjem oznak: vsako vozlišče prevzame oznako z največjo težo sosedov.
+
+    En korak je produkt redke simetrične matrike z redko matriko oznak
+    (n × k); majhna teža lastne oznake prepreči nihanje na dvodelnih delih.
+    Oznake so na koncu prevedene v 0..k-1 po velikosti skupnosti.
+    """
+    n = sym.shape[0]
+    if n == 0: return np.zeros(0, dtype=np.int64)
+    labels = np.arange(n)
+    weights = (sym + sparse.identity(n, format="csr") * 0.5).tocsr()
+    rows = np.arange(n)
+    for _ in range(max_iter):
+        onehot = sparse.csr_matrix((np.ones(n), (rows, labels)), shape=(n, n))
+        votes = (weights @ onehot).tocsr()
+        best = _row_argmax(votes)
+        if np.array_equal(best, labels): break
+        labels = best
+    _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return rank[inverse]
+
+
+def analyze_graph(graph):
+    """Stopnja, PageRank in skupnosti za `SemanticGraph` v enem prehodu nad redko matriko."""
+    adj = adjacency(graph)
+    sym = ((adj + adj.T) > 0).astype(np.float64)
+    degree = np.asarray(sym.sum(axis=1)).ravel().astype(np.int64)
+    return GraphAnalytics(degree=degree, pagerank=pagerank(adj), community=communities(sym))
+
+
+def node_sizes(graph, analytics=None):
+    """{id: velikost} za izris; brez povezav ostanejo velikosti po tipu vozlišča (None)."""
+    if graph is None or not graph.edges: return None
+    analytics = analytics or analyze_graph(graph)
+    return {n.id: round(float(s), 1) for n, s in zip(graph.nodes, analytics.sizes())}
+
+
+def cluster_id(community):
+    return f"{CLUSTER_PREFIX}{community}"
+
+
+def expandable_clusters(analytics, max_clusters=LOD_MAX_CLUSTERS):
+    """Id-ji skupin, ki jih `collapse_communities` strne (skupnosti z več kot enim članom)."""
+    comm = np.minimum(analytics.community, max_clusters)
+    counts = np.bincount(comm, minlength=max_clusters + 1)
+    return [cluster_id(int(c)) for c in np.flatnonzero(counts > 1)]
+
+
+def collapse_communities(graph, analytics, expanded=(), max_clusters=LOD_MAX_CLUSTERS, max_members=LOD_MAX_MEMBERS):
+    """Pogled nivoja podrobnosti: vsaka skupnost je eno vozlišče, razen razširjenih.
+
+    Vrne (graf pogleda, {id: velikost}). Velikost pogleda je omejena ne glede
+    na velikost grafa: največ `max_clusters` skupnosti (ostale gredo v skupino
+    'Other') in največ `max_members` članov na razširjeno skupnost (ostanek
+    ostane strnjen). Povezave med skupinami so združene po paru vozlišč.
+    """
+    nodes, pr, comm = graph.nodes, analytics.pagerank, analytics.community.copy()
+    other = max_clusters
+    comm[comm >= max_clusters] = other
+    expanded = {int(c[len(CLUSTER_PREFIX):]) if isinstance(c, str) else int(c) for c in expanded}
+    mass = np.bincount(comm, weights=pr, minlength=other + 1)
+    members = {c: np.flatnonzero(comm == c) for c in np.unique(comm)}
+
+    owner, view_nodes, sizes = {}, [], {}
+    for c, idx in members.items():
+        idx = idx[np.argsort(-pr[idx], kind="stable")]
+        shown = idx[:max_members] if c in expanded or len(idx) == 1 else idx[:0]
+        for i in shown:
+            owner[nodes[i].id] = nodes[i].id
+            view_nodes.append(nodes[i])
+        rest = idx[len(shown):]
+        if rest.size == 0: continue
+        cid = cluster_id(c)
+        head = nodes[rest[0]].label
+        label = "Other concepts" if c == other else head
+        view_nodes.append(GraphNode(cid, f"{label} (+{rest.size - (c != other)})" if rest.size > 1 else label,
+                                    "Class", CLUSTER_COLOR, "round-rectangle"))
+        for i in rest: owner[nodes[i].id] = cid
+
+    rels = {}
+    for e in graph.edges:
+        s, t = owner.get(e.source), owner.get(e.target)
+        if s and t and s != t: rels.setdefault((s, t), Counter())[e.rel_type] += 1
+    # En rob na par vozlišč pogleda, z najpogostejšo relacijo
+    view = SemanticGraph(nodes=view_nodes, edges=[GraphEdge(s, t, c.most_common(1)[0][0]) for (s, t), c in rels.items()])
+
+    scaled = analytics.sizes()
+    index = {n.id: i for i, n in enumerate(nodes)}
+    present = mass[mass > 0]
+    cluster_sizes = _scale(np.where(mass > 0, mass, present.min() if present.size else 1.0),
+                           NODE_SIZE_RANGE[0] + 10, NODE_SIZE_RANGE[1] + 30)
+    for n in view_nodes:
+        if n.id.startswith(CLUSTER_PREFIX): sizes[n.id] = round(float(cluster_sizes[int(n.id[len(CLUSTER_PREFIX):])]), 1)
+        else: sizes[n.id] = round(float(scaled[index[n.id]]), 1)
+    return view, sizes
@@ -0,0 +1,99 @@
+import html
+import re
+import urllib.parse
+from collections import deque
+from functools import lru_cache
+
+# =========================================================
+# ANOTACIJA BESEDILA: VOZLIŠČA IN AVTORJI V ENEM PREHODU
+# =========================================================
+GOOGLE_SEARCH_URL = "https://www.google.com/search?q="
+
+# Obstoječe oznake (HTML, povezave, koda) preskočimo v celoti; '<' v prozi (npr. "x < y") ni oznaka
+_SKIP_PATTERN = r"<a\b[^>]*>.*?</a>|<[A-Za-z/!][^>]*>|`[^`\n]*`|\[[^\]\n]*\]\([^)\n]*\)"
+_WORD_END = re.compile(r"\w+")
+
+
+def _trie_regex(terms):
+    """Zgradi regex iz predponskega drevesa izrazov; daljši zadetek ima prednost."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches: return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+@lru_cache(maxsize=64)
+def _compile_annotator(terms):
+    return re.compile(
+        rf"(?P<skip>{_SKIP_PATTERN})|(?<!\w)(?P<term>{_trie_regex(terms)})(?!\w)",
+        re.IGNORECASE | re.DOTALL,
+    )
+
+
+def _node_anchor(node_id, label):
+    g_url = urllib.parse.quote(label)
+    return (f'<span id="{html.escape(node_id)}"><a href="{GOOGLE_SEARCH_URL}{g_url}" target="_blank" '
+            f'class="semantic-node-highlight">{html.escape(label)}<i class="google-icon">↗</i></a></span>')
+
+
+def _author_link(name):
+    a_url = urllib.parse.quote(name)
+    return (f'<a href="{GOOGLE_SEARCH_URL}{a_url}" target="_blank" '
+            f'class="author-search-link">{html.escape(name)}<i class="google-icon">↗</i></a>')
+
+
+def annotate_markdown(markdown, nodes, authors=()):
+    """Poveže koncepte grafa in avtorje v besedilu z enim samim prehodom.
+
+    `nodes` je zaporedje parov (id, oznaka): vsako vozlišče dobi sidro ob
+    prvi pojavitvi svoje oznake, avtorji pa Google povezavo ob vsaki pojavitvi.
+    Vse oznake so zbrane v en regex (predponsko drevo), ki ima raje daljši
+    zadetek in ne posega v že obstoječe HTML/markdown oznake. Vrste so ločene
+    po oznaki (ujemanje brez velikosti črk ima prednost pri enaki pisavi); ko
+    je daljša oznaka že zasidrana, njen zadetek ponudimo krajšim oznakam.
+    """
+    pending = {}
+    for node_id, label in nodes:
+        label = (label or "").strip()
+        if label: pending.setdefault(label.lower(), {}).setdefault(label, deque()).append((str(node_id), label))
+    author_names = {}
+    for name in authors:
+        name = name.strip()
+        if name: author_names.setdefault(name.lower(), name)
+    if not pending and not author_names: return markdown
+
+    pattern = _compile_annotator(tuple(sorted(set(pending) | set(author_names))))
+
+    def take(text):
+        queues = pending.get(text.lower())
+        if not queues: return None
+        queue = queues.get(text) or next((q for q in queues.values() if q), None)
+        return _node_anchor(*queue.popleft()) if queue else None
+
+    def annotate_term(text):
+        anchor = take(text)
+        if anchor: return anchor
+        if text.lower() in author_names: return _author_link(author_names[text.lower()])
+        # Izčrpan daljši zadetek: preostanek za krajše oznake (najdaljša predpona, sicer brez prve besede)
+        first = _WORD_END.match(text)
+        if first is None or first.end() == len(text): return text
+        for end in sorted((w.end() for w in _WORD_END.finditer(text) if w.end() < len(text)), reverse=True):
+            anchor = take(text[:end])
+            if anchor: return anchor + pattern.sub(replace, text[end:])
+        return text[:first.end()] + pattern.sub(replace, text[first.end():])
+
+    def replace(m):
+        if m.group("skip") is not None: return m.group(0)
+        return annotate_term(m.group("term"))
+
+    return pattern.sub(replace, markdown)
@@ -0,0 +1,143 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sis.biblio import fetch_author_bibliographies
+from sis.pipeline import SynthesisConfig, build_messages, run_synthesis
+from sis.ratelimit import TokenBucket, call_with_retries, estimate_tokens
+from sis.synthesis import GROQ_BASE_URL, SYNTHESIS_MAX_TOKENS
+
+# =========================================================
+# PAKETNA SINTEZA BREZ VMESNIKA (JSONL -> JSONL, z nadaljevanjem)
+# =========================================================
+
+
+def job_id(record):
+    """Id posla: polje `id` ali stabilen hash konfiguracije."""
+    if record.get("id"): return str(record["id"])
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def read_jobs(path):
+    """Prebere vhodni JSONL (prazne vrstice in komentarje '#' preskoči)."""
+    jobs = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                jobs.append(json.loads(line))
+    return jobs
+
+
+def completed_ids(output_path):
+    """Id-ji že uspešno zaključenih poslov iz obstoječega izhoda (za nadaljevanje)."""
+    done = set()
+    if not os.path.exists(output_path): return done
+    with open(output_path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # delno zapisana zadnja vrstica ob sesutju
+            if rec.get("status") == "ok": done.add(rec.get("id"))
+    return done
+
+
+class ResultWriter:
+    """Dodaja rezultate v JSONL takoj, ko so na voljo (flush + fsync za vsak zapis)."""
+
+    def __init__(self, path, graphs_dir=None):
+        self.path = path
+        self.graphs_dir = graphs_dir
+        self._lock = threading.Lock()
+        if graphs_dir: os.makedirs(graphs_dir, exist_ok=True)
+
+    def write(self, record, graph=None):
+        with self._lock:
+            if graph is not None and self.graphs_dir:
+                with open(os.path.join(self.graphs_dir, f"{record['id']}.json"), "w", encoding="utf-8") as gh:
+                    json.dump(graph, gh, ensure_ascii=False)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+
+
+def run_job(record, client, bucket=None, retries=5, use_cache=True):
+    """Izvede en posel s ponovnimi poskusi; vrne (zapis, graf)."""
+    cfg = SynthesisConfig.from_dict(record)
+    biblio = fetch_author_bibliographies(cfg.authors) if cfg.authors else ""
+    messages, _, _ = build_messages(cfg, biblio)
+    cost = sum(estimate_tokens(m["content"]) for m in messages) + SYNTHESIS_MAX_TOKENS
+
+    def attempt():
+        if bucket is not None: bucket.acquire(cost)
+        return run_synthesis(cfg, client, biblio=biblio, use_cache=use_cache)
+
+    result = call_with_retries(attempt, retries=retries)
+    graph = result.graph.as_dict() if result.graph is not None else None
+    record_out = {
+        "id": job_id(record), "status": "ok", "query": cfg.query, "logic_type": result.logic_type,
+        "markdown": result.markdown, "graph": graph, "cached": result.cached,
+        "elapsed": round(result.elapsed, 3),
+    }
+    return record_out, graph
+
+
+def run_batch(input_path, output_path, client, concurrency=4, tokens_per_minute=None, retries=5,
+              graphs_dir=None, use_cache=True, log=print):
+    """Izvede vse nezaključene posle z omejeno vzporednostjo; vrne (ok, napake, preskočeni)."""
+    jobs = read_jobs(input_path)
+    done = completed_ids(output_path)
+    pending = [j for j in jobs if job_id(j) not in done]
+    writer = ResultWriter(output_path, graphs_dir)
+    bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    ok = failed = 0
+    log(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already done, {len(pending)} to run")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(run_job, j, client, bucket, retries, use_cache): j for j in pending}
+        for fut in as_completed(futures):
+            jid = job_id(futures[fut])
+            try:
+                record, graph = fut.result()
+                writer.write(record, graph)
+                ok += 1
+                log(f"[ok] {jid} ({record['elapsed']}s{', cached' if record['cached'] else ''})")
+            except Exception as exc:
+                writer.write({"id": jid, "status": "error", "error": f"{type(exc).__name__}: {exc}"})
+                failed += 1
+                log(f"[error] {jid}: {exc}")
+    return ok, failed, len(jobs) - len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless SIS batch synthesis (JSONL in, JSONL out).")
+    parser.add_argument("input", help="JSONL file: one configuration + inquiry per line")
+    parser.add_argument("-o", "--output", default="sis_batch_results.jsonl", help="results JSONL (appended, resumable)")
+    parser.add_argument("--graphs-dir", help="also write each graph as <id>.json into this directory")
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("--tokens-per-minute", type=int, default=None, help="client-side token rate limit")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--no-cache", action="store_true", help="bypass the synthesis result cache")
+    parser.add_argument("--api-key", default=os.environ.get("GROQ_API_KEY"))
+    parser.add_argument("--base-url", default=GROQ_BASE_URL)
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("missing API key (--api-key or GROQ_API_KEY)")
+
+    from openai import OpenAI
+    # Ponovne poskuse vodimo sami (Retry-After, jitter), zato jih odjemalec ne podvaja
+    client = OpenAI(api_key=args.api_key, base_url=args.base_url, max_retries=0)
+    ok, failed, skipped = run_batch(args.input, args.output, client, args.concurrency, args.tokens_per_minute,
+                                    args.retries, args.graphs_dir, use_cache=not args.no_cache)
+    print(f"done: {ok} ok, {failed} failed, {skipped} skipped (already completed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import contextvars
+import os
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sis.cache import DiskCache, cache_path
+from sis.metrics import count, record_error, span
+
+# =========================================================
+# PRIDOBIVANJE BIBLIOGRAFIJ (ORCID + SEMANTIC SCHOLAR)
+# =========================================================
+ORCID_API = os.environ.get("SIS_ORCID_API", "https://pub.orcid.org/v3.0")
+SCHOLAR_API = os.environ.get("SIS_SCHOLAR_API", "https://api.semanticscholar.org/graph/v1")
+JSON_HEADERS = {"Accept": "application/json"}
+
+REQUEST_TIMEOUT = 5        # sekunde na posamezen HTTP klic
+MAX_WORKERS = 8            # zgornja meja vzporednih avtorjev (za cel proces)
+FETCH_DEADLINE = 12.0      # skupni rok; kar ne prispe do tedaj, izpustimo
+
+# Trajni predpomnilnik bibliografij (TTL 0 ga izklopi)
+BIBLIO_CACHE_TTL = float(os.environ.get("SIS_BIBLIO_TTL", 24 * 3600))
+BIBLIO_CACHE_MAX_ENTRIES = int(os.environ.get("SIS_BIBLIO_MAX_ENTRIES", 5000))
+
+_session = None
+_executor = None
+_cache = None
+_init_lock = threading.Lock()
+
+
+def get_http_session():
+    """Vrne deljeno HTTP sejo s keep-alive bazenom povezav."""
+    global _session
+    if _session is None:
+        with _init_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="sis-biblio")
+    return _executor
+
+
+def get_biblio_cache():
+    """Vrne procesno deljen SQLite predpomnilnik bibliografij (ali None, če je izklopljen)."""
+    global _cache
+    if _cache is None and BIBLIO_CACHE_TTL > 0:
+        with _init_lock:
+            if _cache is None:
+                _cache = DiskCache(cache_path("biblio.sqlite"), ttl=BIBLIO_CACHE_TTL, max_entries=BIBLIO_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def normalize_author(auth):
+    """Normalizira ime avtorja za ključ predpomnilnika (NFC, male črke, enojni presledki)."""
+    return " ".join(unicodedata.normalize("NFC", auth).casefold().split())
+
+
+def _extract_orcid_works(r_res):
+    works = r_res.get('activities-summary', {}).get('works', {}).get('group', [])
+    items = []
+    for work in works[:5]:
+        summary = work.get('work-summary', [{}])[0]
+        title = summary.get('title', {}).get('title', {}).get('value', 'N/A')
+        pub_date = summary.get('publication-date')
+        year = pub_date.get('year').get('value', 'n.d.') if pub_date and pub_date.get('year') else "n.d."
+        items.append([year, title])
+    return {"works": items}
+
+
+def _extract_scholar_papers(ss_res):
+    return {"papers": [[p.get('year', 'n.d.'), p['title']] for p in ss_res.get("data", [])]}
+
+
+def _format_orcid_works(auth, orcid_id, works):
+    block = f"\n--- ORCID BIBLIOGRAPHY: {auth.upper()} ({orcid_id}) ---\n"
+    if works:
+        for year, title in works:
+            block += f"- [{year}] {title}\n"
+    else: block += "No public works found.\n"
+    return block
+
+
+def _format_scholar_papers(auth, papers):
+    if not papers: return ""
+    block = f"\n--- SCHOLAR BIBLIOGRAPHY: {auth.upper()} ---\n"
+    for year, title in papers:
+        block += f"- [{year}] {title}\n"
+    return block
+
+
+def _cached_json(session, cache, key, url, extract, headers=None, params=None, stage="biblio"):
+    """GET z upoštevanjem predpomnilnika: svež vnos vrne brez omrežja, zastarelega pogojno osveži."""
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and entry.is_fresh:
+        count(f"{stage}.cache_hit")
+        return entry.value
+
+    req_headers = dict(headers or {})
+    if entry is not None:
+        if entry.etag: req_headers["If-None-Match"] = entry.etag
+        if entry.last_modified: req_headers["If-Modified-Since"] = entry.last_modified
+    try:
+        with span(stage):
+            res = session.get(url, headers=req_headers, params=params, timeout=REQUEST_TIMEOUT)
+        if res.status_code == 304 and entry is not None:
+            count(f"{stage}.not_modified")
+            cache.touch(key)
+            return entry.value
+        res.raise_for_status()
+        value = extract(res.json())
+    except:
+        # Omrežje ni dosegljivo ali ponudnik vrne napako (429/5xx): raje zastarel podatek kot nič
+        if entry is not None:
+            record_error(f"{stage}.stale_fallback")
+            return entry.value
+        raise
+    if cache is not None:
+        cache.set(key, value, etag=res.headers.get("ETag"), last_modified=res.headers.get("Last-Modified"))
+    return value
+
+
+def _resolve_orcid_id(session, cache, norm_auth, auth):
+    key = f"author:{norm_auth}"
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and entry.is_fresh:
+        count("biblio.orcid_search.cache_hit")
+        return entry.value.get("orcid_id")
+    try:
+        with span("biblio.orcid_search"):
+            res = session.get(f"{ORCID_API}/search/", params={"q": auth}, headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
+        res.raise_for_status()
+        s_res = res.json()
+    except:
+        record_error("biblio.orcid_search")
+        return entry.value.get("orcid_id") if entry is not None else None
+    orcid_id = s_res['result'][0]['orcid-identifier']['path'] if s_res.get('result') else None
+    if cache is not None:
+        cache.set(key, {"orcid_id": orcid_id})
+    return orcid_id
+
+
+def _cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        count("biblio.lookup_cancelled")
+        return True
+    return False
+
+
+def lookup_author(auth, session=None, cache=None, cancel=None):
+    """Razreši enega avtorja: ORCID iskanje, nato zapis ali Semantic Scholar kot rezerva.
+
+    Razrešeni iD, povzetek del in rezervni Scholar zadetki se hranijo v
+    trajnem predpomnilniku, zato ponovljene poizvedbe ne gredo na omrežje.
+    `cancel` (threading.Event) preverimo med HTTP klici: nastavljen dogodek
+    ustavi iskanje pred naslednjim klicem (tekočega ne prekine) in vrne "".
+    """
+    session = session or get_http_session()
+    cache = (get_biblio_cache() if cache is None else cache) or None
+    norm_auth = normalize_author(auth)
+    orcid_id = None
+    if _cancelled(cancel): return ""
+    try:
+        orcid_id = _resolve_orcid_id(session, cache, norm_auth, auth)
+    except: record_error("biblio.orcid_resolve")
+    if _cancelled(cancel): return ""
+
+    if orcid_id:
+        try:
+            record = _cached_json(session, cache, f"orcid:{orcid_id}", f"{ORCID_API}/{orcid_id}/record",
+                                  _extract_orcid_works, headers=JSON_HEADERS, stage="biblio.orcid_record")
+            return _format_orcid_works(auth, orcid_id, record["works"])
+        except:
+            record_error("biblio.orcid_record")
+            return ""
+    try:
+        found = _cached_json(session, cache, f"scholar:{norm_auth}", f"{SCHOLAR_API}/paper/search",
+                             _extract_scholar_papers,
+                             params={"query": f'author:"{auth}"', "limit": 3, "fields": "title,year"},
+                             stage="biblio.scholar_search")
+        return _format_scholar_papers(auth, found["papers"])
+    except:
+        record_error("biblio.scholar_search")
+        return ""
+
+
+def split_authors(author_input):
+    """Razbije z vejicami ločen seznam avtorjev (prazne vnose izpusti)."""
+    return [a.strip() for a in (author_input or "").split(",") if a.strip()]
+
+
+def _submit_lookup(auth, cancel=None, context=None):
+    # Privzeto kopija konteksta, da razponi iz delovnih niti pristanejo v sledi klicatelja
+    context = contextvars.copy_context() if context is None else context  # prazen Context je neresničen
+    return _get_executor().submit(context.run, lookup_author, auth, cancel=cancel)
+
+
+def _collect(futures, deadline):
+    """Počaka na prispele rezultate do roka in jih sestavi v izvirnem vrstnem redu.
+
+    Zamudnih iskanj ne prekličemo: so deljena s predpomnjenjem med tipkanjem
+    in se dokončajo v predpomnilnik, kjer jih najde naslednji zagon.
+    """
+    wait(futures, timeout=max(0.0, deadline))
+    comprehensive_biblio = ""
+    for fut in futures:
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            comprehensive_biblio += fut.result()
+        else:
+            count("biblio.deadline_dropped")
+    return comprehensive_biblio
+
+
+def fetch_author_bibliographies(author_input, deadline=FETCH_DEADLINE):
+    """Zajame bibliografske podatke z letnicami preko ORCID in Scholar API baz.
+
+    Avtorji se razrešujejo vzporedno prek deljenega bazena povezav; po izteku
+    roka `deadline` vrnemo vse, kar je že prispelo, v izvirnem vrstnem redu.
+    """
+    author_list = split_authors(author_input)
+    if not author_list: return ""
+    with span("biblio.fetch", authors=len(author_list)):
+        return _collect([_submit_lookup(auth) for auth in author_list], deadline)
+
+
+class BiblioPrefetch:
+    """Špekulativno pridobivanje bibliografij med tipkanjem (eno na sejo).
+
+    Vsaka sprememba seznama avtorjev odda iskanja za nove avtorje, obdrži
+    tista, ki so še na seznamu, in prekliče zastarela (čakajoča takoj, tekoča
+    pred naslednjim HTTP klicem); `result` nato vrne bibliografijo, ki je ob
+    zagonu sinteze praviloma že na voljo. Iskanja tečejo v praznem kontekstu:
+    `update` se kliče iz povratnega klica pred novo sledjo zagona, zato njihovi
+    razponi ne smejo pristati v sledi prejšnjega zagona (zagon, ki rezultat
+    porabi, zabeleži `biblio.fetch`).
+    """
+
+    def __init__(self):
+        self.author_input = None
+        self.futures = {}
+        self.cancels = {}
+        self.started = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, auth):
+        self.cancels[auth] = threading.Event()
+        self.futures[auth] = _submit_lookup(auth, self.cancels[auth], contextvars.Context())
+        self.started[auth] = time.monotonic()
+
+    def update(self, author_input):
+        """Uskladi iskanja z vnosom; vrne število novo oddanih avtorjev."""
+        authors = split_authors(author_input)
+        with self._lock:
+            self.author_input = author_input
+            for auth in list(self.futures):
+                if auth not in authors:
+                    fut, cancel = self.futures.pop(auth), self.cancels.pop(auth)
+                    if fut.cancel(): count("biblio.prefetch_cancelled")
+                    elif not fut.done(): cancel.set()
+                    self.started.pop(auth, None)
+            fresh = [a for a in authors if a not in self.futures or self.futures[a].cancelled()]
+            for auth in fresh: self._submit(auth)
+        count("biblio.prefetch_started", len(fresh))
+        return len(fresh)
+
+    def ready(self):
+        with self._lock:
+            return all(f.done() for f in self.futures.values())
+
+    def result(self, author_input, deadline=FETCH_DEADLINE):
+        """Bibliografija za `author_input`; uporabi oddana iskanja, manjkajoča odda zdaj.
+
+        Rok teče od zadnje oddaje, zato že prispeli rezultati ne čakajo.
+        """
+        authors = split_authors(author_input)
+        if not authors: return ""
+        if author_input != self.author_input: self.update(author_input)
+        with self._lock:
+            # Preklicano ali manjkajoče iskanje oddamo znova, sicer bi avtor ostal prazen do naslednje spremembe vnosa
+            for auth in authors:
+                fut = self.futures.get(auth)
+                if fut is None or fut.cancelled():
+                    self._submit(auth)
+                    count("biblio.prefetch_resubmitted")
+            futures = [self.futures[a] for a in authors]
+            newest = max(self.started[a] for a in authors)
+        count("biblio.prefetch_hit" if all(f.done() for f in futures) else "biblio.prefetch_wait")
+        with span("biblio.fetch", authors=len(authors), prefetched=True):
+            return _collect(futures, deadline - (time.monotonic() - newest))
@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+# =========================================================
+# TRAJNI PREDPOMNILNIK NA DISKU (SQLite, TTL + LRU)
+# =========================================================
+CACHE_DIR = os.environ.get("SIS_CACHE_DIR", ".sis_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+"""
+
+
+def cache_path(filename):
+    """Vrne pot do datoteke v skupni mapi predpomnilnikov (mapo po potrebi ustvari)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    value: object
+    etag: str = None
+    last_modified: str = None
+    stored_at: float = 0.0
+    ttl: float = None
+
+    @property
+    def is_fresh(self):
+        return self.ttl is None or (time.time() - self.stored_at) < self.ttl
+
+
+class DiskCache:
+    """Ključ/vrednost shramba v SQLite, deljena med sejami in ponovnimi zagoni procesa.
+
+    Vrednosti so JSON; zastareli vnosi ostanejo na voljo za pogojno
+    osveževanje (ETag / Last-Modified), presežek pa odrežemo po LRU vrstnem redu.
+    """
+
+    def __init__(self, path, ttl=None, max_entries=None, max_bytes=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Vrne `CacheEntry` (tudi zastarel) ali None; zadetek osveži LRU čas."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None: return None
+        with conn:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(key, json.loads(row[0]), row[1], row[2], row[3], self.ttl)
+
+    def get_fresh(self, key):
+        """Vrne vrednost samo, če vnos obstaja in še ni pretekel."""
+        entry = self.get(key)
+        return entry.value if entry is not None and entry.is_fresh else None
+
+    def set(self, key, value, etag=None, last_modified=None):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, payload, etag, last_modified, now, now, len(payload)),
+            )
+        self.evict()
+
+    def touch(self, key):
+        """Označi vnos kot ponovno potrjen (npr. po odgovoru 304 Not Modified)."""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def delete(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries")
+
+    def evict(self, max_age=None):
+        """Odstrani vnose, starejše od `max_age`, in najdlje neuporabljene nad mejami velikosti."""
+        conn = self._conn()
+        with conn:
+            if max_age is not None:
+                conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - max_age,))
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            if self.max_bytes is not None:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+                        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        total -= size
+                        if total <= self.max_bytes: break
+
+    def stats(self):
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": row[0], "bytes": row[1]}
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import streamlit.components.v1 as components
+
+# =========================================================
+# PAKIRANA CYTOSCAPE KOMPONENTA (statična sredstva iz aplikacije)
+# =========================================================
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+CYTOSCAPE_URL = "https://cdnjs.cloudflare.com/ajax/libs/cytoscape/3.26.0/cytoscape.min.js"
+CYTOSCAPE_FILE = os.path.join(FRONTEND_DIR, "cytoscape.min.js")
+COMPONENT_ENABLED = os.environ.get("SIS_GRAPH_COMPONENT", "1") != "0"
+
+# Streamlit mapo postreže kot statične datoteke: index.html z `Cache-Control: no-cache`, .js/.css pa s
+# `Cache-Control: public`; iframe komponente ostane med ponovnimi zagoni, podatki grafa gredo po sporočilu
+_sis_cytoscape = components.declare_component("sis_cytoscape", path=FRONTEND_DIR)
+
+
+def compact_payload(elements, positions=None):
+    """Pretvori Cytoscape elemente v stolpčni paket (brez ponavljanja ključev za vsak element)."""
+    nodes = {"id": [], "label": [], "color": [], "size": [], "shape": [], "z": []}
+    edges = {"s": [], "t": [], "r": []}
+    pos = [] if positions else None
+    for el in elements:
+        d = el["data"]
+        if "source" in d:
+            edges["s"].append(d["source"]); edges["t"].append(d["target"]); edges["r"].append(d.get("rel_type", "AS"))
+            continue
+        nodes["id"].append(d["id"]); nodes["label"].append(d["label"]); nodes["color"].append(d["color"])
+        nodes["size"].append(d["size"]); nodes["shape"].append(d["shape"]); nodes["z"].append(d["z_index"])
+        if pos is not None: pos.extend(positions.get(d["id"]) or (None, None))
+    return {"nodes": nodes, "edges": edges, "pos": pos}
+
+
+def render_graph_component(elements, positions=None, graph_key=None, height=650, key="semantic_viz_full"):
+    """Izriše graf s pakirano komponento; pri enakem `graph_key` brskalnik obdrži obstoječi izris."""
+    return _sis_cytoscape(payload=compact_payload(elements, positions), graph_key=graph_key,
+                          height=height, key=key, default=None)
+
+
+def missing_assets():
+    """Statična sredstva, ki jih v mapi komponente ni (brez njih graf ne deluje brez povezave)."""
+    return [] if os.path.isfile(CYTOSCAPE_FILE) else [os.path.basename(CYTOSCAPE_FILE)]
+
+
+def fetch_assets():
+    """Enkrat prenese pripeto različico cytoscape.min.js v mapo komponente (za delovanje brez povezave)."""
+    import requests
+    res = requests.get(CYTOSCAPE_URL, timeout=30)
+    res.raise_for_status()
+    if b"cytoscape" not in res.content[:4096].lower() or len(res.content) < 100 * 1024:
+        raise RuntimeError(f"unexpected response from {CYTOSCAPE_URL} ({len(res.content)} bytes)")
+    with open(CYTOSCAPE_FILE, "wb") as fh:
+        fh.write(res.content)
+    return CYTOSCAPE_FILE
+
+
+if __name__ == "__main__":
+    # Namestitveni korak: --fetch-assets prenese knjižnico, --check-assets (npr. v CI) glasno odpove, če manjka
+    if "--fetch-assets" in sys.argv[1:]:
+        print(f"Saved {fetch_assets()}")
+    elif "--check-assets" in sys.argv[1:]:
+        missing = missing_assets()
+        if missing: sys.exit(f"Missing graph component assets in {FRONTEND_DIR}: {', '.join(missing)} "
+                             "(run: python -m sis.component --fetch-assets)")
+        print("Graph component assets present.")
+    else:
+        print("Usage: python -m sis.component --fetch-assets | --check-assets")
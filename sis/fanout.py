@@ -0,0 +1,157 @@
+import contextvars
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from sis.biblio import fetch_author_bibliographies
+from sis.graph import GraphEdge, GraphNode, SemanticGraph, extract_graph
+from sis.linking import link_graph, load_concept_index
+from sis.metrics import count, span
+from sis.ontology import load_ontology
+from sis.pipeline import SynthesisResult, build_messages, compile_messages, complete, run_synthesis
+from sis.prompt import perspective_directive
+from sis.ratelimit import call_with_retries
+from sis.scheduler import LANE_CONCURRENCY
+from sis.store import canonical_label
+from sis.synthesis import load_cached_synthesis, split_synthesis_output, store_synthesis
+
+# =========================================================
+# RAZVEJANA SINTEZA: EN KRAJŠI KLIC NA PERSPEKTIVO + ZLIVANJE
+# =========================================================
+MAX_PERSPECTIVES = int(os.environ.get("SIS_FANOUT_MAX", 6))
+FANOUT_MAX_TOKENS = int(os.environ.get("SIS_FANOUT_MAX_TOKENS", 1600))
+FANOUT_WORDS = 600
+FANOUT_NODES = 12
+_HEADING = re.compile(r"^(#{1,4})(?=\s)", re.MULTILINE)
+
+
+def perspectives(cfg, by="auto"):
+    """Kraki razvejanja: [(vrsta, ime, pod-konfiguracija)].
+
+    `auto` razveja po uporabniških profilih, če jih je izbranih več, sicer po
+    znanstvenih poljih; vsak krak obdrži vse ostale dimenzije konfiguracije.
+    """
+    if by == "auto": by = "profiles" if len(cfg.profiles) > 1 else "sciences"
+    kind = "User profile" if by == "profiles" else "Science field"
+    return [(kind, name, replace(cfg, **{by: [name]})) for name in getattr(cfg, by)[:MAX_PERSPECTIVES]]
+
+
+def _branch(kind, name, sub_cfg, client, biblio, use_cache, ontology, retry=True):
+    """En krak: sporočila s perspektivo, predpomnilnik ali klic modela; vrne (besedilo, cached, messages).
+
+    `retry=False`, kadar krak teče kot lasten posel razporejevalnika, ki ga ob napaki ponovi sam.
+    """
+    messages, _, _ = build_messages(sub_cfg, biblio, ontology)
+    messages[0] = dict(messages[0], content=messages[0]["content"] + perspective_directive(kind, name, FANOUT_WORDS, FANOUT_NODES))
+    text_out = load_cached_synthesis(messages) if use_cache else None
+    cached = text_out is not None
+    count("synthesis.cache_hit" if cached else "synthesis.cache_miss")
+    if not cached:
+        call = lambda: complete(client, messages, max_tokens=FANOUT_MAX_TOKENS)
+        text_out = call_with_retries(call) if retry else call()
+        store_synthesis(messages, text_out)
+    return text_out, cached, messages
+
+
+def merge_graphs(subgraphs, hub_label="Synthesis"):
+    """Zlije podgrafe v enega: vozlišča po kanonični oznaki, povezave po (izvor, cilj, relacija).
+
+    Korenska vozlišča vseh krakov povežemo s skupnim vozliščem `hub_label`,
+    da je rezultat povezan tudi, kadar kraki nimajo skupnih pojmov.
+    """
+    nodes, index, edges, seen = [], {}, [], set()
+    hub = GraphNode("n0", hub_label, "Class", "#264653", "star")
+    nodes.append(hub)
+    index[canonical_label(hub_label)] = hub.id
+
+    def link(source, target, rel):
+        if source != target and (source, target, rel) not in seen:
+            seen.add((source, target, rel))
+            edges.append(GraphEdge(source, target, rel))
+
+    for graph in subgraphs:
+        if graph is None: continue
+        local = {}
+        for n in graph.nodes:
+            canon = canonical_label(n.label)
+            if canon not in index:
+                index[canon] = f"n{len(nodes)}"
+                nodes.append(replace(n, id=index[canon]))
+            local[n.id] = index[canon]
+        for e in graph.edges:
+            link(local[e.source], local[e.target], e.rel_type)
+        roots = [local[n.id] for n in graph.nodes if n.type == "Root"]
+        if not roots and graph.nodes: roots = [local[graph.nodes[0].id]]
+        for root in roots: link(hub.id, root, "TT")
+    return SemanticGraph(nodes=nodes, edges=edges, salvaged=any(g is not None and g.salvaged for g in subgraphs))
+
+
+def merge_documents(sections):
+    """Poglavja krakov v en dokument; naslovi vsakega kraka se zamaknejo pod naslov perspektive."""
+    parts = ["# Multi-Perspective Synthesis\n", "Perspectives: " + ", ".join(f"**{name}**" for name, _ in sections) + "\n"]
+    for name, markdown in sections:
+        parts.append(f"## Perspective: {name}\n\n" + _HEADING.sub(lambda m: m.group(1) + "##", markdown.strip()) + "\n")
+    return "\n".join(parts)
+
+
+def run_fanout(cfg, client, biblio=None, use_cache=True, on_text=None, ontology=None, by="auto", workers=None,
+               stream=False, submit=None):
+    """Razvejana sinteza: kraki tečejo vzporedno, rezultat je en dokument in en graf brez podvojitev.
+
+    `submit(fn)` odda krak `fn(client)` kot lasten posel (v aplikaciji v vrsto
+    razporejevalnika: pravični red, omejitev hkratnosti in pavze ključa veljajo
+    za vsak krak, neuspel krak se ponovi sam) in vrne objekt z `.done()` in
+    `.result()`; brez njega kraki tečejo v lastnem bazenu z `client`.
+    Kraki se ne pretakajo po žetonih: `on_text` dobi dokument ob vsakem
+    zaključenem kraku (v niti klicatelja), `stream` velja le za običajno sintezo,
+    ki teče, kadar sta kraka manj kot dva.
+    """
+    started = time.monotonic()
+    if biblio is None:
+        biblio = fetch_author_bibliographies(cfg.authors) if cfg.authors else ""
+    branches = perspectives(cfg, by)
+    if len(branches) < 2:
+        count("fanout.fallback")
+        if submit is not None:
+            return submit(lambda c: run_synthesis(cfg, c, biblio=biblio, use_cache=use_cache, ontology=ontology)).result()
+        return run_synthesis(cfg, client, biblio=biblio, use_cache=use_cache, stream=stream, on_text=on_text,
+                             ontology=ontology)
+    # Logika in razvrstitev za celotno konfiguracijo (kraki imajo vsak svojo ožjo)
+    _, logic_type, ranked, prompt = compile_messages(cfg, biblio, ontology)
+    done = {}
+    with span("fanout.total", branches=len(branches)):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or len(branches), LANE_CONCURRENCY))) as pool:
+            retry = submit is None
+            send = submit or (lambda job: pool.submit(contextvars.copy_context().run, job, client))
+            pending = {name: send(lambda c, kind=kind, name=name, sub=sub: _branch(kind, name, sub, c, biblio, use_cache,
+                                                                                  ontology, retry))
+                       for kind, name, sub in branches}
+            while pending:
+                finished = [name for name, job in pending.items() if job.done()]
+                if not finished: time.sleep(0.05)
+                for name in finished:
+                    done[name] = pending.pop(name).result()
+                if finished and on_text:
+                    # Sproti prikažemo že zaključene krake v izvirnem vrstnem redu
+                    on_text(merge_documents([(n, split_synthesis_output(done[n][0])[0])
+                                             for _, n, _ in branches if n in done]))
+
+    with span("graph.parse"):
+        ordered = [(name, done[name]) for _, name, _ in branches]
+        splits = [(name, split_synthesis_output(out[0])) for name, out in ordered]
+        subgraphs = [extract_graph(tail) for _, (_, tail) in splits]
+    with span("fanout.merge"):
+        markdown = merge_documents([(name, md) for name, (md, _) in splits])
+        graph = merge_graphs(subgraphs, hub_label=cfg.query[:60] or "Synthesis")
+    with span("graph.link"):
+        graph = link_graph(graph, load_concept_index(ontology or load_ontology()))
+    tails = [tail for _, (_, tail) in splits if tail is not None]
+    return SynthesisResult(
+        markdown=markdown, graph_tail="\n".join(tails) if tails else None,
+        graph=graph if len(graph.nodes) > 1 else None, biblio=biblio,
+        logic_type=logic_type, ranked=ranked, messages=[m for _, out in ordered for m in out[2]],
+        cached=bool(ordered) and all(out[1] for _, out in ordered), elapsed=time.monotonic() - started,
+        perspectives=[name for name, _ in ordered], prompt=prompt,
+    )
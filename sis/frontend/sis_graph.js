@@ -0,0 +1,125 @@
+/* SIS Cytoscape komponenta: statični del (oznake, stili, logika lupe) se naloži enkrat,
+   podatki grafa pa prispejo kot kompakten stolpčni paket prek Streamlit sporočil. */
+(function () {
+    var cy = null;
+    var currentKey = null;
+    var clicks = 0;
+
+    var GRAPH_STYLE = [
+        {
+            selector: 'node',
+            style: {
+                'label': 'data(label)', 'text-valign': 'center', 'color': '#333',
+                'background-color': 'data(color)', 'width': 'data(size)', 'height': 'data(size)',
+                'shape': 'data(shape)',
+                'font-size': '12px', 'font-weight': 'bold', 'text-outline-width': 2,
+                'text-outline-color': '#fff', 'z-index': 'data(z_index)'
+            }
+        },
+        {
+            selector: 'edge',
+            style: {
+                'width': 3, 'line-color': '#adb5bd', 'label': 'data(rel_type)',
+                'font-size': '10px', 'font-weight': 'bold', 'color': '#2a9d8f',
+                'target-arrow-color': '#adb5bd', 'target-arrow-shape': 'triangle',
+                'curve-style': 'bezier', 'text-rotation': 'autorotate',
+                'text-background-opacity': 1, 'text-background-color': '#ffffff',
+                'text-background-padding': '2px', 'text-background-shape': 'roundrectangle'
+            }
+        },
+        /* DODATNI STILI ZA LOGIKO LUPE */
+        {
+            selector: 'node.highlighted',
+            style: { 'border-width': 4, 'border-color': '#e76f51', 'z-index': 9999, 'font-size': '18px' }
+        },
+        {
+            selector: 'node[id ^= "cluster:"]',
+            style: { 'border-width': 3, 'border-style': 'double', 'border-color': '#e9c46a', 'color': '#264653' }
+        },
+        {
+            selector: '.dimmed',
+            style: { 'opacity': 0.15, 'text-opacity': 0 }
+        }
+    ];
+
+    function send(type, data) {
+        var msg = { isStreamlitMessage: true, type: type };
+        for (var k in data) { msg[k] = data[k]; }
+        window.parent.postMessage(msg, '*');
+    }
+
+    /* Stolpčni paket -> Cytoscape elementi */
+    function expand(payload) {
+        var els = [], n = payload.nodes, e = payload.edges, pos = payload.pos;
+        for (var i = 0; i < n.id.length; i++) {
+            var el = { data: {
+                id: n.id[i], label: n.label[i], color: n.color[i],
+                size: n.size[i], shape: n.shape[i], z_index: n.z[i]
+            } };
+            if (pos && pos[2 * i] !== null) { el.position = { x: pos[2 * i], y: pos[2 * i + 1] }; }
+            els.push(el);
+        }
+        for (var j = 0; j < e.s.length; j++) {
+            els.push({ data: { source: e.s[j], target: e.t[j], rel_type: e.r[j] } });
+        }
+        return els;
+    }
+
+    function draw(payload) {
+        if (cy) { cy.destroy(); }
+        cy = cytoscape({
+            container: document.getElementById('cy'),
+            elements: expand(payload),
+            style: GRAPH_STYLE,
+            layout: payload.pos
+                ? { name: 'preset', padding: 50 }
+                : { name: 'cose', padding: 50, animate: true, nodeRepulsion: 25000, idealEdgeLength: 120 }
+        });
+
+        /* LOGIKA LUPE (Fokusiranje na sosesko ob prehodu z miško) */
+        cy.on('mouseover', 'node', function (evt) {
+            var sel = evt.target;
+            cy.elements().addClass('dimmed');
+            sel.neighborhood().add(sel).removeClass('dimmed').addClass('highlighted');
+        });
+        cy.on('mouseout', 'node', function () {
+            cy.elements().removeClass('dimmed highlighted');
+        });
+        cy.on('tap', 'node', function (evt) {
+            /* Strnjena skupnost: zahtevamo razširitev (Python ob naslednjem zagonu fragmenta) */
+            if (evt.target.id().indexOf('cluster:') === 0) {
+                clicks += 1;
+                send('streamlit:setComponentValue', { value: { toggle: evt.target.id(), n: clicks, graph: currentKey }, dataType: 'json' });
+                return;
+            }
+            var target = window.parent.document.getElementById(evt.target.id());
+            if (target) {
+                target.scrollIntoView({ behavior: 'smooth', block: 'center' });
+                target.style.backgroundColor = '#ffffcc';
+                setTimeout(function () { target.style.backgroundColor = 'transparent'; }, 2500);
+            }
+        });
+    }
+
+    document.getElementById('save_btn').addEventListener('click', function () {
+        if (!cy) { return; }
+        var link = document.createElement('a');
+        link.href = cy.png({ full: true, bg: 'white' });
+        link.download = 'sis_knowledge_graph.png';
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+    });
+
+    window.addEventListener('message', function (event) {
+        if (!event.data || event.data.type !== 'streamlit:render') { return; }
+        var args = event.data.args;
+        send('streamlit:setFrameHeight', { height: args.height });
+        /* Enak graf ob ponovnem zagonu skripte: ohranimo obstoječi izris */
+        if (args.graph_key && args.graph_key === currentKey) { return; }
+        currentKey = args.graph_key;
+        draw(args.payload);
+    });
+
+    send('streamlit:componentReady', { apiVersion: 1 });
+})();
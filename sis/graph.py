@@ -0,0 +1,192 @@
+import json
+import re
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+
+# =========================================================
+# SEMANTIČNI GRAF: ENKRATNO IZLUŠČENJE IN VALIDACIJA
+# =========================================================
+NODE_TYPES = ("Root", "Branch", "Leaf", "Class")
+NODE_SHAPES = ("ellipse", "triangle", "rectangle", "diamond", "hexagon", "pentagon", "octagon",
+               "star", "round-rectangle", "barrel", "vee", "rhomboid")
+REL_TYPES = ("TT", "BT", "NT", "AS", "EQ", "IN", "RT", "Inheritance")
+DEFAULT_NODE_TYPE = "Branch"
+DEFAULT_NODE_COLOR = "#2a9d8f"
+DEFAULT_NODE_SHAPE = "ellipse"
+DEFAULT_REL_TYPE = "AS"
+
+_HEX_COLOR = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+# Imenovane barve CSS (CSS Color Module Level 4), ki jih Cytoscape sprejme
+CSS_COLOR_NAMES = frozenset("""
+aliceblue antiquewhite aqua aquamarine azure beige bisque black blanchedalmond blue blueviolet brown burlywood cadetblue
+chartreuse chocolate coral cornflowerblue cornsilk crimson cyan darkblue darkcyan darkgoldenrod darkgray darkgreen darkgrey
+darkkhaki darkmagenta darkolivegreen darkorange darkorchid darkred darksalmon darkseagreen darkslateblue darkslategray
+darkslategrey darkturquoise darkviolet deeppink deepskyblue dimgray dimgrey dodgerblue firebrick floralwhite forestgreen
+fuchsia gainsboro ghostwhite gold goldenrod gray green greenyellow grey honeydew hotpink indianred indigo ivory khaki
+lavender lavenderblush lawngreen lemonchiffon lightblue lightcoral lightcyan lightgoldenrodyellow lightgray lightgreen
+lightgrey lightpink lightsalmon lightseagreen lightskyblue lightslategray lightslategrey lightsteelblue lightyellow lime
+limegreen linen magenta maroon mediumaquamarine mediumblue mediumorchid mediumpurple mediumseagreen mediumslateblue
+mediumspringgreen mediumturquoise mediumvioletred midnightblue mintcream mistyrose moccasin navajowhite navy oldlace olive
+olivedrab orange orangered orchid palegoldenrod palegreen paleturquoise palevioletred papayawhip peachpuff peru pink plum
+powderblue purple rebeccapurple red rosybrown royalblue saddlebrown salmon sandybrown seagreen seashell sienna silver
+skyblue slateblue slategray slategrey snow springgreen steelblue tan teal thistle tomato turquoise violet wheat white
+whitesmoke yellow yellowgreen
+""".split())
+_REL_LOOKUP = {r.lower(): r for r in REL_TYPES}
+_SHAPE_LOOKUP = {s.replace("-", "").replace(" ", ""): s for s in NODE_SHAPES}
+_SHAPE_LOOKUP.update({"3d": "diamond", "roundrectangle": "round-rectangle", "circle": "ellipse", "square": "rectangle"})
+
+# Števci napak pri razčlenjevanju (koliko pogosto model prekrši shemo)
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(key, n=1):
+    if n:
+        with _stats_lock: _stats[key] += n
+
+
+def parse_stats():
+    """Vrne kopijo števcev uspešnih in neuspešnih razčlenitev grafa."""
+    with _stats_lock: return dict(_stats)
+
+
+@dataclass
+class GraphNode:
+    id: str
+    label: str
+    type: str = DEFAULT_NODE_TYPE
+    color: str = DEFAULT_NODE_COLOR
+    shape: str = DEFAULT_NODE_SHAPE
+    concept: str = ""  # kanonični id pojma ontologije (sis.linking), prazno, če vozlišče ni povezano
+
+
+@dataclass
+class GraphEdge:
+    source: str
+    target: str
+    rel_type: str = DEFAULT_REL_TYPE
+
+
+@dataclass
+class SemanticGraph:
+    nodes: list = field(default_factory=list)
+    edges: list = field(default_factory=list)
+    salvaged: bool = False
+
+    def as_dict(self):
+        return {"nodes": [asdict(n) for n in self.nodes], "edges": [asdict(e) for e in self.edges]}
+
+    def node_pairs(self):
+        """Pari (id, oznaka) za anotacijo besedila."""
+        return [(n.id, n.label) for n in self.nodes]
+
+
+def _scan_objects(text):
+    """Zaporedoma dekodira JSON objekte v besedilu; okoliško prozo in ograje ``` preskoči."""
+    decoder = json.JSONDecoder()
+    idx = text.find("{")
+    while idx != -1:
+        try:
+            obj, end = decoder.raw_decode(text, idx)
+        except ValueError:
+            idx = text.find("{", idx + 1)
+            continue
+        yield obj
+        idx = text.find("{", end)
+
+
+def _clean_color(value):
+    """Šestnajstiška koda ali imenovana barva CSS (male črke); sicer None."""
+    color = str(value or "").strip()
+    if _HEX_COLOR.match(color): return color
+    return color.lower() if color.lower() in CSS_COLOR_NAMES else None
+
+
+def _clean_node(raw):
+    if not isinstance(raw, dict) or raw.get("id") in (None, ""): return None
+    node_id = str(raw["id"]).strip()
+    label = str(raw.get("label") or node_id).strip()
+    n_type = str(raw.get("type", "")).strip().capitalize()
+    color = _clean_color(raw.get("color"))
+    shape = _SHAPE_LOOKUP.get(str(raw.get("shape", "")).strip().lower().replace("-", "").replace(" ", ""))
+    repaired = (n_type not in NODE_TYPES) + (color is None) + (shape is None)
+    _count("repaired_fields", repaired)
+    return GraphNode(
+        id=node_id, label=label,
+        type=n_type if n_type in NODE_TYPES else DEFAULT_NODE_TYPE,
+        color=color or DEFAULT_NODE_COLOR,
+        shape=shape or DEFAULT_NODE_SHAPE,
+    )
+
+
+def _clean_edge(raw, known_ids):
+    if not isinstance(raw, dict): return None
+    source, target = str(raw.get("source", "")).strip(), str(raw.get("target", "")).strip()
+    if source not in known_ids or target not in known_ids: return None
+    rel = _REL_LOOKUP.get(str(raw.get("rel_type", "")).strip().lower())
+    if rel is None: _count("repaired_fields")
+    return GraphEdge(source=source, target=target, rel_type=rel or DEFAULT_REL_TYPE)
+
+
+def build_graph(raw_nodes, raw_edges, salvaged=False):
+    """Validira surova vozlišča in povezave po dokumentirani shemi."""
+    nodes, seen = [], set()
+    for raw in raw_nodes or []:
+        node = _clean_node(raw)
+        if node is None or node.id in seen:
+            _count("dropped_nodes")
+            continue
+        seen.add(node.id)
+        nodes.append(node)
+    edges = []
+    for raw in raw_edges or []:
+        edge = _clean_edge(raw, seen)
+        if edge is None: _count("dropped_edges")
+        else: edges.append(edge)
+    return SemanticGraph(nodes=nodes, edges=edges, salvaged=salvaged)
+
+
+def extract_graph(graph_tail):
+    """Enkrat razčleni rep `### SEMANTIC_GRAPH_JSON` v `SemanticGraph` (ali None).
+
+    Prvi celovit objekt z `nodes`/`edges` ima prednost; če je JSON odrezan,
+    rešimo posamezna vozlišča in povezave, ki so se dala dekodirati.
+    """
+    if graph_tail is None:
+        _count("no_marker")
+        return None
+    loose_nodes, loose_edges = [], []
+    for obj in _scan_objects(graph_tail):
+        if not isinstance(obj, dict): continue
+        # Model graf včasih ovije v dodaten objekt, npr. {"graph": {...}}
+        candidates = [obj] + [v for v in obj.values() if isinstance(v, dict)]
+        for cand in candidates:
+            if isinstance(cand.get("nodes"), list):
+                graph = build_graph(cand.get("nodes"), cand.get("edges"))
+                _count("ok" if graph.nodes else "empty_graph")
+                return graph if graph.nodes else None
+        if "source" in obj and "target" in obj: loose_edges.append(obj)
+        elif "id" in obj: loose_nodes.append(obj)
+    if loose_nodes:
+        _count("salvaged")
+        return build_graph(loose_nodes, loose_edges, salvaged=True)
+    _count("no_json")
+    return None
+
+
+def graph_elements(graph, sizes=None):
+    """Pretvori `SemanticGraph` v elemente za Cytoscape; `sizes` ({id: velikost}) nadomesti velikost po tipu."""
+    elements = []
+    for n in graph.nodes:
+        size = 100 if n.type == "Class" else (90 if n.type == "Root" else (70 if n.type == "Branch" else 50))
+        if sizes and n.id in sizes: size = sizes[n.id]
+        elements.append({"data": {
+            "id": n.id, "label": n.label, "color": n.color,
+            "size": size, "shape": n.shape, "z_index": 10 if n.type in ["Root", "Class"] else 1,
+            **({"concept": n.concept} if n.concept else {})
+        }})
+    for e in graph.edges:
+        elements.append({"data": {"source": e.source, "target": e.target, "rel_type": e.rel_type}})
+    return elements
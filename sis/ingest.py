@@ -0,0 +1,200 @@
+import codecs
+import hashlib
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sis.cache import DiskCache, cache_path
+from sis.ratelimit import call_with_retries, estimate_tokens
+
+# =========================================================
+# ZAJEM VELIKIH PRILOG (razrez po odstavkih -> map -> reduce)
+# =========================================================
+INGEST_MODEL = os.environ.get("SIS_INGEST_MODEL", "llama-3.1-8b-instant")
+CONTEXT_BUDGET_TOKENS = int(os.environ.get("SIS_CONTEXT_BUDGET", 6000))
+CHUNK_TOKENS = int(os.environ.get("SIS_CHUNK_TOKENS", 3000))
+SUMMARY_MAX_TOKENS = 600
+INGEST_WORKERS = int(os.environ.get("SIS_INGEST_WORKERS", 4))
+MAX_UPLOAD_BYTES = int(os.environ.get("SIS_MAX_UPLOAD_MB", 50)) * 1024 * 1024
+READ_BLOCK = 64 * 1024
+INGEST_CACHE_TTL = float(os.environ.get("SIS_INGEST_TTL", 30 * 24 * 3600))
+
+MAP_PROMPT = (
+    "Extract the key concepts, claims, definitions, named entities, methods and results from the text. "
+    "Answer with a dense bullet list in the language of the text, at most {words} words, no preamble."
+)
+REDUCE_PROMPT = (
+    "Merge these partial notes from one document into a single deduplicated bullet list of key concepts, "
+    "claims and relations, at most {words} words, no preamble."
+)
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ingest_cache():
+    """Predpomnilnik povzetkov kosov po vsebinskem hashu (ali None, če je izklopljen)."""
+    global _cache
+    if _cache is None and INGEST_CACHE_TTL > 0:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(cache_path("ingest.sqlite"), ttl=INGEST_CACHE_TTL, max_bytes=32 * 1024 * 1024)
+    return _cache
+
+
+def iter_paragraphs(stream, encoding="utf-8", block=READ_BLOCK):
+    """Bere binarni tok po blokih in sproti vrača odstavke (ločene s prazno vrstico).
+
+    Prelome iščemo le v novo dodanem delu (in v presledkih tik pred njim), besedilo
+    brez praznih vrstic pa režemo na kose do `CHUNK_TOKENS * 4` znakov, zato je
+    medpomnilnik omejen in čas linearen v velikosti toka.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    limit = CHUNK_TOKENS * 4
+    buffer, carry = "", ""
+    while True:
+        data = stream.read(block)
+        text = carry + decoder.decode(data or b"", final=not data)
+        # '\r' na koncu bloka počaka na morebitni '\n' iz naslednjega
+        carry = "\r" if data and text.endswith("\r") else ""
+        text = (text[:-1] if carry else text).replace("\r\n", "\n")
+        # Prelom se lahko začne na zadnjem '\n' starega dela, ki mu sledijo le presledki
+        start = len(buffer.rstrip(" \t"))
+        if start and buffer[start - 1] == "\n": start -= 1
+        buffer += text
+        pos = 0
+        for match in _PARAGRAPH_BREAK.finditer(buffer, start):
+            part = buffer[pos:match.start()].strip()
+            if part: yield part
+            pos = match.end()
+        buffer = buffer[pos:]
+        # Besedilo brez praznih vrstic: režemo pri zadnjem prelomu vrstice pred mejo (ali kar pri meji)
+        while len(buffer) > limit:
+            cut = buffer.rfind("\n", 0, limit) + 1 or limit
+            part = buffer[:cut].strip()
+            if part: yield part
+            buffer = buffer[cut:]
+        if not data:
+            if buffer.strip(): yield buffer.strip()
+            return
+
+
+def _split_oversized(paragraph, max_tokens):
+    """Predolg odstavek razreže po stavkih, skrajno pa po znakih."""
+    limit = max_tokens * 4
+    piece = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > limit:
+            if piece: yield piece; piece = ""
+            yield sentence[:limit]
+            sentence = sentence[limit:]
+        if piece and len(piece) + len(sentence) + 1 > limit:
+            yield piece
+            piece = ""
+        piece = f"{piece} {sentence}" if piece else sentence
+    if piece: yield piece
+
+
+def iter_chunks(paragraphs, max_tokens=CHUNK_TOKENS):
+    """Združuje odstavke v kose do `max_tokens`; meje kosov so vedno meje odstavkov."""
+    chunk, size = [], 0
+    for paragraph in paragraphs:
+        pieces = [paragraph] if estimate_tokens(paragraph) <= max_tokens else _split_oversized(paragraph, max_tokens)
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if chunk and size + tokens > max_tokens:
+                yield "\n\n".join(chunk)
+                chunk, size = [], 0
+            chunk.append(piece)
+            size += tokens
+    if chunk: yield "\n\n".join(chunk)
+
+
+def summarize(client, text, instruction, max_words, model=INGEST_MODEL, retry=True):
+    """En klic modela za povzetek kosa; rezultat se shrani pod hashem vsebine in navodila.
+
+    `retry=False`, kadar ponovne poskuse vodi razporejevalnik (`sis.scheduler`).
+    """
+    prompt = instruction.format(words=max_words)
+    key = hashlib.sha256(f"{model}\0{prompt}\0{text}".encode("utf-8")).hexdigest()
+    cache = get_ingest_cache()
+    hit = cache.get_fresh(key) if cache is not None else None
+    if hit: return hit["text"]
+
+    def call():
+        response = client.chat.completions.create(
+            model=model, temperature=0.2, max_tokens=SUMMARY_MAX_TOKENS,
+            messages=[{"role": "system", "content": prompt}, {"role": "user", "content": text}],
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    out = call_with_retries(call) if retry else call()
+    if cache is not None and out: cache.set(key, {"text": out})
+    return out
+
+
+def _summary_job(text, instruction, max_words, retry):
+    """Posel povzetka kot `fn(client)` za `submit`."""
+    return lambda client: summarize(client, text, instruction, max_words, retry=retry)
+
+
+def _parallel_summaries(client, texts, instruction, max_words, workers, submit=None):
+    if submit is not None:
+        pending = [submit(_summary_job(t, instruction, max_words, False)) for t in texts]
+        return [p.result() for p in pending]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda t: summarize(client, t, instruction, max_words), texts))
+
+
+def reduce_summaries(client, summaries, budget_tokens=CONTEXT_BUDGET_TOKENS, workers=INGEST_WORKERS, submit=None):
+    """Povzetke združuje v skupinah, dokler skupaj ne padejo pod proračun žetonov."""
+    while len(summaries) > 1 and sum(estimate_tokens(s) for s in summaries) > budget_tokens:
+        groups = list(iter_chunks(summaries, CHUNK_TOKENS))
+        if len(groups) >= len(summaries): break  # združevanje ne krči več
+        summaries = _parallel_summaries(client, groups, REDUCE_PROMPT, SUMMARY_MAX_TOKENS * 3 // 4, workers, submit)
+    text = "\n\n".join(summaries)
+    return text[:budget_tokens * 4]
+
+
+def ingest_context(stream, client, budget_tokens=CONTEXT_BUDGET_TOKENS, workers=INGEST_WORKERS,
+                   on_progress=None, encoding="utf-8", submit=None):
+    """Priloga -> kontekstni blok v proračunu žetonov.
+
+    Kratko prilogo vrne dobesedno (brez klicev modela); daljšo razreže po
+    odstavkih, kose vzporedno povzame (map) in povzetke združi (reduce).
+    `submit(fn)` odda posel `fn(client)` drugam (npr. v vrsto razporejevalnika)
+    in vrne objekt z `.result()`; brez njega kliče lasten bazen niti.
+    Vrne (besedilo, število kosov).
+    """
+    paragraphs = iter_paragraphs(stream, encoding)
+    head, size = [], 0
+    for paragraph in paragraphs:
+        head.append(paragraph)
+        size += estimate_tokens(paragraph)
+        if size > budget_tokens: break
+    else:
+        return "\n\n".join(head), 0
+
+    def all_paragraphs():
+        yield from head
+        yield from paragraphs
+
+    # Kose oddajamo sproti in jih v obdelavi držimo največ 2 × workers, da priloga ni v pomnilniku naenkrat
+    summaries, in_flight = [], deque()
+    retry = submit is None
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        send = submit or (lambda job: pool.submit(job, client))
+        for chunk in iter_chunks(all_paragraphs()):
+            in_flight.append(send(_summary_job(chunk, MAP_PROMPT, SUMMARY_MAX_TOKENS * 3 // 4, retry)))
+            if len(in_flight) >= 2 * workers:
+                summaries.append(in_flight.popleft().result())
+                if on_progress: on_progress(len(summaries))
+        while in_flight:
+            summaries.append(in_flight.popleft().result())
+            if on_progress: on_progress(len(summaries))
+    return reduce_summaries(client, summaries, budget_tokens, workers, submit), len(summaries)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from sis.cache import DiskCache, cache_path
+
+# =========================================================
+# STREŽNIŠKA POSTAVITEV GRAFA (NumPy, force-directed)
+# =========================================================
+HIERARCHY_RELS = ("TT", "BT", "NT")
+TYPE_LEVELS = {"Class": 0, "Root": 0, "Branch": 1, "Leaf": 2}
+IDEAL_EDGE_LENGTH = 120.0
+LEVEL_SPACING = 1.6 * IDEAL_EDGE_LENGTH
+LEVEL_PULL = 0.5           # moč sidranja na raven hierarhije
+REPULSION_BLOCK = 512      # vrstice na blok, da matrika razdalj ostane omejena
+
+LAYOUT_CACHE_MAX_ENTRIES = int(os.environ.get("SIS_LAYOUT_MAX_ENTRIES", 500))
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_disk = None
+
+
+def graph_hash(graph):
+    """Stabilen hash strukture grafa (vozlišča, tipi, povezave) za predpomnjenje postavitve."""
+    payload = json.dumps({
+        "nodes": sorted((n.id, n.type) for n in graph.nodes),
+        "edges": sorted((e.source, e.target, e.rel_type) for e in graph.edges),
+    }, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hierarchy_levels(graph):
+    """Ravni vozlišč po TT/BT/NT povezavah (BFS od korenov); nedosegljiva dobijo raven po tipu."""
+    index = {n.id: i for i, n in enumerate(graph.nodes)}
+    children = [[] for _ in graph.nodes]
+    has_parent = [False] * len(graph.nodes)
+    for e in graph.edges:
+        if e.rel_type in HIERARCHY_RELS:
+            children[index[e.source]].append(index[e.target])
+            has_parent[index[e.target]] = True
+    levels = [None] * len(graph.nodes)
+    queue = deque()
+    for i, n in enumerate(graph.nodes):
+        if n.type in ("Root", "Class") or (children[i] and not has_parent[i]):
+            levels[i] = 0
+            queue.append(i)
+    while queue:
+        u = queue.popleft()
+        for v in children[u]:
+            if levels[v] is None:
+                levels[v] = levels[u] + 1
+                queue.append(v)
+    return [lvl if lvl is not None else TYPE_LEVELS.get(n.type, 1) for lvl, n in zip(levels, graph.nodes)]
+
+
+def _initial_positions(levels, rng):
+    levels = np.asarray(levels, dtype=np.float64)
+    pos = np.zeros((len(levels), 2))
+    for lvl in np.unique(levels):
+        members = np.flatnonzero(levels == lvl)
+        pos[members, 0] = (np.arange(len(members)) - (len(members) - 1) / 2.0) * IDEAL_EDGE_LENGTH
+        pos[members, 1] = lvl * LEVEL_SPACING
+    pos += rng.normal(scale=IDEAL_EDGE_LENGTH * 0.05, size=pos.shape)
+    return pos
+
+
+def force_layout(levels, edge_index, iterations=None, seed=0):
+    """Fruchterman-Reingold z vektoriziranimi silami in sidranjem na ravni hierarhije.
+
+    `edge_index` je matrika oblike (m, 2) z indeksi vozlišč; vrne (n, 2) koordinate.
+    """
+    n = len(levels)
+    rng = np.random.default_rng(seed)
+    pos = _initial_positions(levels, rng)
+    if n < 2: return pos
+    k = IDEAL_EDGE_LENGTH
+    anchor_y = pos[:, 1].copy()
+    iterations = iterations or int(min(300, max(40, 4000 / math.sqrt(n))))
+    temperature = k * math.sqrt(n) * 0.5
+    cooling = 0.01 ** (1.0 / iterations)
+    src, dst = (edge_index[:, 0], edge_index[:, 1]) if len(edge_index) else (None, None)
+
+    for _ in range(iterations):
+        disp = np.zeros_like(pos)
+        for start in range(0, n, REPULSION_BLOCK):
+            delta = pos[start:start + REPULSION_BLOCK, None, :] - pos[None, :, :]
+            dist2 = np.einsum("ijk,ijk->ij", delta, delta) + 1e-2
+            disp[start:start + REPULSION_BLOCK] += np.einsum("ijk,ij->ik", delta, (k * k) / dist2)
+        if src is not None:
+            delta = pos[src] - pos[dst]
+            pull = delta * (np.linalg.norm(delta, axis=1, keepdims=True) / k)
+            np.add.at(disp, src, -pull)
+            np.add.at(disp, dst, pull)
+        disp[:, 1] += LEVEL_PULL * (anchor_y - pos[:, 1])
+        length = np.linalg.norm(disp, axis=1, keepdims=True) + 1e-9
+        pos += disp / length * np.minimum(length, temperature)
+        temperature *= cooling
+    return pos - pos.mean(axis=0)
+
+
+def _get_disk_cache():
+    global _disk
+    if _disk is None and LAYOUT_CACHE_MAX_ENTRIES > 0:
+        with _memory_lock:
+            if _disk is None:
+                _disk = DiskCache(cache_path("layout.sqlite"), max_entries=LAYOUT_CACHE_MAX_ENTRIES)
+    return _disk
+
+
+def compute_layout(graph, seed=0):
+    """Vrne {id: (x, y)} za graf; rezultat je predpomnjen po hashu grafa (RAM + disk)."""
+    key = graph_hash(graph)
+    with _memory_lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+    disk = _get_disk_cache()
+    positions = disk.get_fresh(key) if disk is not None else None
+    if positions is None:
+        index = {n.id: i for i, n in enumerate(graph.nodes)}
+        edge_index = np.array([(index[e.source], index[e.target]) for e in graph.edges if e.source != e.target],
+                              dtype=np.intp).reshape(-1, 2)
+        coords = force_layout(hierarchy_levels(graph), edge_index, seed=seed)
+        positions = {n.id: [round(float(x), 1), round(float(y), 1)] for n, (x, y) in zip(graph.nodes, coords)}
+        if disk is not None: disk.set(key, positions)
+    with _memory_lock:
+        _memory[key] = positions
+        while len(_memory) > 64: _memory.popitem(last=False)
+    return positions
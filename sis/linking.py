@@ -0,0 +1,129 @@
+import math
+import os
+from dataclasses import replace
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+from sis.metrics import count
+from sis.store import canonical_label
+
+# =========================================================
+# POVEZOVANJE VOZLIŠČ Z ONTOLOGIJO (znakovni n-grami, TF-IDF)
+# =========================================================
+# Najmanjša kosinusna podobnost; nižji prag povezuje tudi le sorodne oznake (npr. "Statistics" -> statistical analysis)
+LINK_THRESHOLD = float(os.environ.get("SIS_LINK_THRESHOLD", 0.8))
+# Fasete so kratke in splošne ('quantum'), zato povezava z njimi zahteva večjo podobnost
+KIND_THRESHOLDS = {"facet": float(os.environ.get("SIS_LINK_FACET_THRESHOLD", 0.85))}
+NGRAM = 3
+LINK_BLOCK_ROWS = 2048  # vrstice poizvedb na en produkt matrik (omeji porabo pomnilnika)
+
+
+def concept_id(kind, name):
+    """Kanonični id pojma ontologije, npr. 'method:formal proof'."""
+    return f"{kind}:{canonical_label(name)}"
+
+
+def _grams(label):
+    text = f" {canonical_label(label)} "
+    return [text[i:i + NGRAM] for i in range(max(1, len(text) - NGRAM + 1))]
+
+
+class ConceptIndex:
+    """Pojmi ontologije kot L2-normirane vrstice TF-IDF nad znakovnimi trigrami.
+
+    Matrika pojmov je zgrajena enkrat (transponirana, CSR); oznake vseh
+    vozlišč grafa se vektorizirajo v eno redko matriko in točkujejo z enim
+    produktom matrik po blokih vrstic.
+    """
+
+    def __init__(self, ontology):
+        concepts = [("field", f) for f in ontology.fields]
+        for kind, term_kind in (("method", "methods"), ("tool", "tools"), ("facet", "facets")):
+            concepts += [(kind, ontology.name(tid)) for tid in ontology.fields_by_term[term_kind]]
+        concepts += [("paradigm", p) for p in ontology.paradigms] + [("approach", a) for a in ontology.approaches]
+        self.ids = list(dict.fromkeys(concept_id(k, n) for k, n in concepts))
+        self.names = {}
+        for kind, name in concepts: self.names.setdefault(concept_id(kind, name), name)
+
+        self.vocab = {}
+        rows, cols = [], []
+        for r, cid in enumerate(self.ids):
+            for g in _grams(self.names[cid]):
+                rows.append(r)
+                cols.append(self.vocab.setdefault(g, len(self.vocab)))
+        counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                                   shape=(len(self.ids), len(self.vocab)))
+        counts.sum_duplicates()
+        df = np.bincount(counts.indices, minlength=len(self.vocab))
+        # Glajeni IDF; n-gram, ki ga ni v ontologiji, dobi največjo težo (df = 0)
+        self.idf = (np.log((1 + len(self.ids)) / (1 + df)) + 1.0).astype(np.float32)
+        self.unseen_idf = np.float32(math.log(1 + len(self.ids)) + 1.0)
+        self.matrix_t = _normalize(counts @ sparse.diags(self.idf)).T.tocsr()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vectorize(self, labels):
+        """Oznake -> L2-normirana redka matrika TF-IDF (stolpci nad slovarjem ontologije).
+
+        Neznani n-grami ne prispevajo k podobnosti, štejejo pa v normo,
+        zato oznaka z veliko tujega besedila ne dobi umetno visoke podobnosti.
+        """
+        rows, cols, extra = [], [], {}
+        vocab_size = len(self.vocab)
+        for r, label in enumerate(labels):
+            for g in _grams(label):
+                col = self.vocab.get(g)
+                if col is None: col = vocab_size + extra.setdefault(g, len(extra))
+                rows.append(r)
+                cols.append(col)
+        counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                                   shape=(len(labels), vocab_size + len(extra)))
+        counts.sum_duplicates()
+        weights = np.concatenate([self.idf, np.full(len(extra), self.unseen_idf, dtype=np.float32)])
+        return _normalize(counts @ sparse.diags(weights)).tocsr()[:, :vocab_size]
+
+    def match(self, labels, threshold=LINK_THRESHOLD):
+        """Najboljši pojem za vsako oznako: seznam (id pojma ali None, podobnost).
+
+        Prag je najmanj `threshold`, za vrste pojmov iz `KIND_THRESHOLDS` pa strožji.
+        """
+        if not labels or not self.ids: return [(None, 0.0)] * len(labels)
+        vectors = self.vectorize(labels)
+        out = []
+        for start in range(0, len(labels), LINK_BLOCK_ROWS):
+            scores = (vectors[start:start + LINK_BLOCK_ROWS] @ self.matrix_t).tocsr()
+            best = np.asarray(scores.argmax(axis=1)).ravel()
+            top = scores.max(axis=1).toarray().ravel()
+            out += [(self.ids[b] if s >= self._threshold(self.ids[b], threshold) else None, float(s))
+                    for b, s in zip(best, top)]
+        return out
+
+    @staticmethod
+    def _threshold(cid, threshold):
+        return max(threshold, KIND_THRESHOLDS.get(cid.split(":", 1)[0], threshold))
+
+
+def _normalize(matrix):
+    matrix = matrix.tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).astype(np.float32) @ matrix
+
+
+@lru_cache(maxsize=4)
+def load_concept_index(ontology):
+    """Indeks pojmov za ontologijo, zgrajen enkrat na proces."""
+    return ConceptIndex(ontology)
+
+
+def link_graph(graph, index, threshold=LINK_THRESHOLD):
+    """Vozliščem, ki se ujemajo s pojmom ontologije, pripiše kanonični id (`GraphNode.concept`)."""
+    if graph is None or not graph.nodes: return graph
+    matches = index.match([n.label for n in graph.nodes], threshold)
+    graph.nodes = [replace(n, concept=cid or "") for n, (cid, _) in zip(graph.nodes, matches)]
+    count("link.nodes", len(matches))
+    count("link.linked", sum(1 for cid, _ in matches if cid))
+    return graph
@@ -0,0 +1,171 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =========================================================
+# MERITVE: ČASOVNI RAZPONI FAZ, ŠTEVCI IN POGOLTNJENE NAPAKE
+# =========================================================
+METRICS_LOG = os.environ.get("SIS_METRICS_LOG", "")      # pot do JSONL dnevnika ali '-' za stderr
+METRICS_PORT = int(os.environ.get("SIS_METRICS_PORT", 0))  # 0 = brez HTTP točke /metrics
+RECENT_SAMPLES = 1024
+
+_counters = Counter()
+_histograms = {}
+_lock = threading.Lock()
+_trace = contextvars.ContextVar("sis_trace", default=None)
+_log = logging.getLogger("sis.metrics")
+_log_ready = False
+_server = None
+
+
+class _Histogram:
+    """Število, vsota, maksimum in zadnjih `RECENT_SAMPLES` vrednosti za percentile."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self):
+        ordered = sorted(self.recent)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+        return {"count": self.count, "sum": round(self.total, 3), "p50": round(pick(0.5), 3),
+                "p95": round(pick(0.95), 3), "max": round(self.max, 3)}
+
+
+def _emit(event):
+    """Zapiše dogodek kot vrstico JSON, če je strukturiran dnevnik vklopljen."""
+    global _log_ready
+    if not METRICS_LOG: return
+    if not _log_ready:
+        with _lock:
+            if not _log_ready:
+                handler = logging.StreamHandler(sys.stderr) if METRICS_LOG == "-" else logging.FileHandler(METRICS_LOG, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                _log.addHandler(handler)
+                _log.setLevel(logging.INFO)
+                _log.propagate = False
+                _log_ready = True
+    _log.info(json.dumps(dict(event, ts=round(time.time(), 3)), ensure_ascii=False, default=str))
+
+
+def count(name, n=1):
+    if n:
+        with _lock: _counters[name] += n
+
+
+def observe(name, value, **attrs):
+    """Zabeleži vrednost (npr. trajanje v ms ali število žetonov) v histogram in trenutno sled."""
+    with _lock:
+        _histograms.setdefault(name, _Histogram()).add(value)
+    trace = _trace.get()
+    if trace is not None: trace.append(dict(attrs, name=name, value=round(value, 3)))
+    _emit(dict(attrs, event="observe", name=name, value=round(value, 3)))
+
+
+@contextmanager
+def span(name, **attrs):
+    """Izmeri trajanje bloka v milisekundah (tudi ob izjemi)."""
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        observe(f"{name}.ms", (time.perf_counter() - started) * 1000.0, **attrs)
+
+
+def record_error(where):
+    """Prešteje napako, ki jo klicatelj pogoltne (kliče se znotraj bloka `except`)."""
+    exc = sys.exc_info()[1]
+    count(f"errors.{where}")
+    trace = _trace.get()
+    if trace is not None: trace.append({"name": f"errors.{where}", "error": type(exc).__name__ if exc else None})
+    _emit({"event": "error", "where": where, "error": type(exc).__name__ if exc else None, "message": str(exc)[:200]})
+
+
+@contextmanager
+def collect():
+    """Zbere vse razpone in napake tega konteksta (tudi iz niti, ki kontekst podedujejo) v seznam."""
+    trace = []
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def start_trace():
+    """Začne novo sled v trenutnem kontekstu (npr. za en zagon skripte) in jo vrne."""
+    trace = []
+    _trace.set(trace)
+    return trace
+
+
+def snapshot():
+    """Trenutno stanje števcev, histogramov in števcev razčlenjevanja grafa."""
+    from sis.graph import parse_stats
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: h.summary() for name, h in _histograms.items()}
+    counters.update({f"graph.{k}": v for k, v in parse_stats().items()})
+    return {"counters": counters, "histograms": histograms}
+
+
+def render_prometheus():
+    """Stanje v besedilnem formatu Prometheus."""
+    snap = snapshot()
+    metric = lambda name: "sis_" + name.replace(".", "_").replace("-", "_")
+    lines = []
+    for name, value in sorted(snap["counters"].items()):
+        lines += [f"# TYPE {metric(name)}_total counter", f"{metric(name)}_total {value}"]
+    for name, h in sorted(snap["histograms"].items()):
+        base = metric(name)
+        lines += [f"# TYPE {base} summary", f'{base}{{quantile="0.5"}} {h["p50"]}', f'{base}{{quantile="0.95"}} {h["p95"]}',
+                  f"{base}_sum {h['sum']}", f"{base}_count {h['count']}"]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, ctype = json.dumps(snapshot()).encode("utf-8"), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, ctype = render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Enkrat na proces zažene HTTP točko /metrics (Prometheus) in /metrics.json; 0 jo izklopi."""
+    global _server
+    if not port or _server is not None: return _server
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            except OSError:
+                return None  # vrata že zasedena (npr. drug proces aplikacije)
+            threading.Thread(target=_server.serve_forever, name="sis-metrics", daemon=True).start()
+    return _server
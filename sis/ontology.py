@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+from functools import lru_cache
+
+# =========================================================
+# ONTOLOŠKA SHRAMBA: ENKRATNO PREVAJANJE + INVERZNI INDEKSI
+# =========================================================
+DEFAULT_SOURCE = os.environ.get(
+    "SIS_ONTOLOGY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "knowledge_base.json")
+)
+FIELD_TERM_KINDS = ("methods", "tools", "facets")
+ENTRY_CATEGORIES = ("mental approaches", "User profiles", "Scientific paradigms", "Structural models")
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fields (name TEXT PRIMARY KEY, cat TEXT);
+CREATE TABLE IF NOT EXISTS field_terms (field TEXT NOT NULL, kind TEXT NOT NULL, term TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (category TEXT NOT NULL, name TEXT NOT NULL, description TEXT, position INTEGER);
+CREATE INDEX IF NOT EXISTS idx_field_terms_field ON field_terms(field);
+"""
+
+
+def _kb_from_sqlite(path):
+    """Sestavi slovar v obliki KNOWLEDGE_BASE iz SQLite tezavra."""
+    conn = sqlite3.connect(path)
+    try:
+        kb = {"mental approaches": [], "User profiles": {}, "Scientific paradigms": {}, "Structural models": {},
+              "Science fields": {}}
+        for category, name, desc in conn.execute(
+                "SELECT category, name, description FROM entries ORDER BY category, position, rowid"):
+            if category == "mental approaches": kb[category].append(name)
+            elif category == "User profiles": kb[category][name] = {"description": desc or ""}
+            elif category in kb: kb[category][name] = desc or ""
+        for name, cat in conn.execute("SELECT name, cat FROM fields ORDER BY name"):
+            kb["Science fields"][name] = {"cat": cat or "", "methods": [], "tools": [], "facets": []}
+        for field, kind, term in conn.execute("SELECT field, kind, term FROM field_terms ORDER BY rowid"):
+            if field in kb["Science fields"] and kind in FIELD_TERM_KINDS:
+                kb["Science fields"][field][kind].append(term)
+        return kb
+    finally:
+        conn.close()
+
+
+def export_sqlite(kb, path):
+    """Zapiše slovar v obliki KNOWLEDGE_BASE v SQLite tezaver (za velike, zunanje vire)."""
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executescript(_SQLITE_SCHEMA)
+            for pos, name in enumerate(kb.get("mental approaches", [])):
+                conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?)", ("mental approaches", name, None, pos))
+            for category in ENTRY_CATEGORIES[1:]:
+                for pos, (name, desc) in enumerate(kb.get(category, {}).items()):
+                    desc = desc.get("description", "") if isinstance(desc, dict) else desc
+                    conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?)", (category, name, desc, pos))
+            for name, spec in kb.get("Science fields", {}).items():
+                conn.execute("INSERT OR REPLACE INTO fields VALUES (?, ?)", (name, spec.get("cat", "")))
+                conn.executemany("INSERT INTO field_terms VALUES (?, ?, ?)",
+                                 [(name, kind, term) for kind in FIELD_TERM_KINDS for term in spec.get(kind, [])])
+    finally:
+        conn.close()
+
+
+class Ontology:
+    """Prevedena, indeksirana ontologija z interniranimi nizi.
+
+    Vsak niz dobi celoštevilski id; indeksi polje→metode/orodja/fasete in
+    obratni (metoda→polja, orodje→polja, faseta→polja, kategorija→polja) so
+    izračunani enkrat, zato izbirniki v vmesniku samo berejo pripravljene sezname.
+    """
+
+    def __init__(self, kb):
+        self.knowledge_base = kb
+        self._strings = []
+        self._ids = {}
+        self.profiles = list(kb.get("User profiles", {}))
+        self.paradigms = list(kb.get("Scientific paradigms", {}))
+        self.models = list(kb.get("Structural models", {}))
+        self.approaches = list(kb.get("mental approaches", []))
+
+        fields = kb.get("Science fields", {})
+        self.fields = sorted(fields)
+        self.field_ids = {name: self.intern(name) for name in self.fields}
+        self.terms_by_field = {kind: {} for kind in FIELD_TERM_KINDS}
+        self.fields_by_term = {kind: {} for kind in FIELD_TERM_KINDS}
+        self.fields_by_category = {}
+        for name in self.fields:
+            fid = self.field_ids[name]
+            spec = fields[name]
+            self.fields_by_category.setdefault(self.intern(spec.get("cat", "")), []).append(fid)
+            for kind in FIELD_TERM_KINDS:
+                tids = tuple(dict.fromkeys(self.intern(t) for t in spec.get(kind, [])))
+                self.terms_by_field[kind][fid] = tids
+                for tid in tids:
+                    self.fields_by_term[kind].setdefault(tid, []).append(fid)
+        self._union_cache = {}
+
+    def intern(self, s):
+        """Vrne celoštevilski id niza (isti niz ima vedno isti id)."""
+        sid = self._ids.get(s)
+        if sid is None:
+            sid = self._ids[s] = len(self._strings)
+            self._strings.append(s)
+        return sid
+
+    def name(self, sid):
+        return self._strings[sid]
+
+    def lookup(self, s):
+        """Id niza ali None, če ga ontologija ne pozna."""
+        return self._ids.get(s)
+
+    def terms_for(self, kind, field_names):
+        """Urejena unija metod / orodij / faset za izbrana polja (rezultat je predpomnjen)."""
+        key = (kind, frozenset(field_names))
+        hit = self._union_cache.get(key)
+        if hit is None:
+            tids = set()
+            for name in key[1]:
+                fid = self.field_ids.get(name)
+                if fid is not None: tids.update(self.terms_by_field[kind][fid])
+            hit = self._union_cache[key] = sorted(self._strings[t] for t in tids)
+        return hit
+
+    def methods_for(self, field_names): return self.terms_for("methods", field_names)
+
+    def tools_for(self, field_names): return self.terms_for("tools", field_names)
+
+    def facets_for(self, field_names): return self.terms_for("facets", field_names)
+
+    def fields_for(self, kind, term):
+        """Polja, ki uporabljajo dano metodo / orodje / faseto."""
+        tid = self._ids.get(term)
+        return [self._strings[f] for f in self.fields_by_term[kind].get(tid, [])] if tid is not None else []
+
+    def fields_in_category(self, category):
+        cid = self._ids.get(category)
+        return [self._strings[f] for f in self.fields_by_category.get(cid, [])] if cid is not None else []
+
+    def field_category(self, field_name):
+        return self.knowledge_base["Science fields"].get(field_name, {}).get("cat", "")
+
+    def describe(self, category, name):
+        """Opis vnosa kategorije (profil, paradigma, model) za prikaz v raziskovalcu."""
+        desc = self.knowledge_base.get(category, {}).get(name, "")
+        return desc.get("description", "") if isinstance(desc, dict) else desc
+
+
+@lru_cache(maxsize=4)
+def load_ontology(source=DEFAULT_SOURCE):
+    """Naloži in prevede ontologijo iz JSON ali SQLite vira (enkrat na proces za vsak vir)."""
+    if source.endswith((".sqlite", ".db")):
+        kb = _kb_from_sqlite(source)
+    else:
+        with open(source, encoding="utf-8") as fh:
+            kb = json.load(fh)
+    return Ontology(kb)
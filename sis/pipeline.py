@@ -0,0 +1,140 @@
+import time
+from dataclasses import dataclass, field, fields
+
+from sis.biblio import fetch_author_bibliographies
+from sis.graph import extract_graph
+from sis.linking import link_graph, load_concept_index
+from sis.metrics import count, observe, span
+from sis.ontology import load_ontology
+from sis.prompt import CONTEXT_SEPARATOR, compile_prompt, resolve_logic
+from sis.rank import load_rank_thesaurus, ranked_context
+from sis.ratelimit import estimate_tokens
+from sis.synthesis import (SYNTHESIS_MAX_TOKENS, SYNTHESIS_MODEL, SYNTHESIS_TEMPERATURE, load_cached_synthesis,
+                           record_usage, split_synthesis_output, store_synthesis, stream_synthesis)
+from sis.thesaurus import load_thesaurus
+
+# =========================================================
+# CEVOVOD SINTEZE BREZ VMESNIKA (poziv -> bibliografija -> LLM -> graf)
+# =========================================================
+
+
+@dataclass
+class SynthesisConfig:
+    """Celotna konfiguracija ene sinteze (privzete vrednosti so enake kot v vmesniku)."""
+    query: str
+    authors: str = ""
+    profiles: list = field(default_factory=lambda: ["Adventurers"])
+    sciences: list = field(default_factory=lambda: ["Physics", "Computer Science", "Linguistics"])
+    expertise: str = "Expert"
+    models: list = field(default_factory=lambda: ["Concepts"])
+    paradigms: list = field(default_factory=lambda: ["Rationalism"])
+    goal: str = "Scientific Research"
+    approaches: list = field(default_factory=lambda: ["Perspective shifting"])
+    methods: list = field(default_factory=list)
+    tools: list = field(default_factory=list)
+    context_text: str = ""
+
+    @classmethod
+    def from_dict(cls, data):
+        """Iz slovarja (npr. vrstice JSONL); `inquiry` je sopomenka za `query`, neznani ključi se prezrejo."""
+        data = dict(data)
+        if "query" not in data and "inquiry" in data: data["query"] = data.pop("inquiry")
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def final_query(self):
+        if not self.context_text: return self.query
+        return self.query + CONTEXT_SEPARATOR + self.context_text
+
+
+@dataclass
+class SynthesisResult:
+    markdown: str
+    graph_tail: str
+    graph: object
+    biblio: str
+    logic_type: str
+    ranked: dict
+    messages: list
+    cached: bool = False
+    elapsed: float = 0.0
+    perspectives: list = field(default_factory=list)
+    prompt: dict = field(default_factory=dict)
+
+
+def build_messages(cfg, biblio, ontology=None):
+    """Sestavi sporočila za model; vrne (messages, logic_type, ranked)."""
+    messages, logic_type, ranked, _ = compile_messages(cfg, biblio, ontology)
+    return messages, logic_type, ranked
+
+
+def compile_messages(cfg, biblio, ontology=None):
+    """Kot `build_messages`, vrne pa še poročilo o žetonih poziva (razdelki, proračun, skrajšave)."""
+    with span("prompt.build"):
+        compiled, logic_type, ranked = _compile(cfg, biblio, ontology or load_ontology())
+    report = compiled.report()
+    observe("prompt.system_tokens", report["system_tokens"])
+    observe("prompt.user_tokens", report["user_tokens"])
+    if compiled.trimmed: count("prompt.trimmed")
+    messages = [{"role": "system", "content": compiled.system}, {"role": "user", "content": compiled.user}]
+    return messages, logic_type, ranked, report
+
+
+def _compile(cfg, biblio, ontology):
+    ranker = load_rank_thesaurus(ontology)
+    logic = resolve_logic(cfg.final_query())
+    ranked = ranker.rank(ranker.config_vector(
+        cfg.sciences, cfg.profiles, cfg.paradigms, cfg.models, cfg.approaches, cfg.expertise, cfg.goal
+    ))
+    compiled = compile_prompt(
+        cfg, biblio, logic,
+        thesaurus_context=load_thesaurus(ontology).describe_selection(cfg.sciences),
+        ranked_focus=ranked_context(ranked),
+    )
+    return compiled, logic[0], ranked
+
+
+def complete(client, messages, stream=False, on_text=None, max_tokens=SYNTHESIS_MAX_TOKENS):
+    """En klic modela; vrne celotno besedilo odgovora (s pretakanjem ali brez)."""
+    with span("llm.total", stream=stream):
+        if stream:
+            text_out = stream_synthesis(client, messages, on_text=on_text, max_tokens=max_tokens).full_text
+            # Pretok ne vrača vedno `usage`, zato izhodne žetone ocenimo lokalno
+            observe("llm.completion_tokens_est", estimate_tokens(text_out))
+            return text_out
+        response = client.chat.completions.create(
+            model=SYNTHESIS_MODEL, messages=messages,
+            temperature=SYNTHESIS_TEMPERATURE, max_tokens=max_tokens
+        )
+    if getattr(response, "usage", None): record_usage(response.usage)
+    return response.choices[0].message.content
+
+
+def is_cached(cfg, biblio, ontology=None):
+    """Ali je sinteza za to konfiguracijo že v predpomnilniku (takrat posla ni treba uvrstiti v vrsto)."""
+    messages, _, _ = build_messages(cfg, biblio, ontology)
+    return load_cached_synthesis(messages) is not None
+
+
+def run_synthesis(cfg, client, biblio=None, use_cache=True, stream=False, on_text=None, ontology=None):
+    """Izvede celoten cevovod za eno konfiguracijo in vrne `SynthesisResult`."""
+    started = time.monotonic()
+    if biblio is None:
+        biblio = fetch_author_bibliographies(cfg.authors) if cfg.authors else ""
+    messages, logic_type, ranked, prompt = compile_messages(cfg, biblio, ontology)
+    text_out = load_cached_synthesis(messages) if use_cache else None
+    cached = text_out is not None
+    count("synthesis.cache_hit" if cached else "synthesis.cache_miss")
+    if not cached:
+        text_out = complete(client, messages, stream=stream, on_text=on_text)
+        store_synthesis(messages, text_out)
+    with span("graph.parse"):
+        markdown, graph_tail = split_synthesis_output(text_out)
+        graph = extract_graph(graph_tail)
+    with span("graph.link"):
+        graph = link_graph(graph, load_concept_index(ontology or load_ontology()))
+    return SynthesisResult(
+        markdown=markdown, graph_tail=graph_tail, graph=graph, biblio=biblio,
+        logic_type=logic_type, ranked=ranked, messages=messages, cached=cached,
+        elapsed=time.monotonic() - started, prompt=prompt,
+    )
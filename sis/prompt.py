@@ -0,0 +1,206 @@
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sis.ingest import CONTEXT_BUDGET_TOKENS
+from sis.ratelimit import estimate_tokens
+from sis.synthesis import GRAPH_MARKER
+
+# =========================================================
+# SISTEMSKI POZIV: ARHITEKTURNA LOGIKA + KONTEKST KONFIGURACIJE
+# =========================================================
+LOGIC_MODES = {
+    "strict": ("Strict hierarchical logic",
+               "Uporabi IZKLJUČNO hierarhične relacije: TT (Top Term), BT (Broader Term), NT (Narrower Term). Fokus na vertikalni taksonomiji."),
+    "relational": ("Relational logic",
+                   "Uporabi IZKLJUČNO lateralne relacije: AS (Associative), EQ (Equivalent), IN (Inheritance/Class). Fokus na mrežni povezanosti."),
+    "associative": ("Hierarchical associative logic",
+                    "Integriraj CELOTEN nabor relacij: Hierarhične (TT, BT, NT) za strukturo in asociativne (AS, EQ, IN) za lateralne povezave."),
+}
+
+# Proračun žetonov (lokalna ocena) za sistemski poziv; priloga ima proračun zajema (SIS_CONTEXT_BUDGET)
+PROMPT_BUDGET_TOKENS = int(os.environ.get("SIS_PROMPT_BUDGET", 1500))
+CONTEXT_SEPARATOR = "\n\n--- ADDITIONAL CONTEXT FROM UPLOADED FILE ---\n"
+
+# --- Statični deli poziva (vsako navodilo natanko enkrat) ---
+_ROLE = "You are the SIS Synthesizer. Write an exhaustive interdisciplinary dissertation (1500+ words)."
+_STRUCTURE = """STRUCTURE (mandatory graph skeleton; tag every edge TT, BT, NT, AS, EQ, IN, RT or Inheritance):
+1. Root: Authors --TT--> User profiles, Science fields, Expertise level.
+2. Science fields --BT--> Expertise level --NT--> Structural models.
+3. Structural models --AS--> Scientific paradigms.
+4. Scientific paradigms --RT--> mental approaches, methodologies and specific tools.
+5. Scientific paradigms --AS--> Context/Goal."""
+_FORMAT = f"""FORMAT:
+- Text: 100% deep research, causal analysis and innovative problem-solving synergy. Never list or explain nodes, edges, properties, shapes, colors or the JSON schema.
+- Shapes: follow shape preferences in the inquiry (triangle, rectangle, hexagon, 3D/diamond); default 'ellipse'.
+- Graph: a dense network of ~30 interconnected nodes; every science field and structural model gets several specific Leaf nodes.
+- End with '{GRAPH_MARKER}' followed by valid JSON only: {{"nodes": [{{"id": "n1", "label": "Text", "type": "Root|Branch|Leaf|Class", "color": "#hex", "shape": "triangle|rectangle|ellipse|diamond"}}], "edges": [{{"source": "n1", "target": "n2", "rel_type": "BT|NT|AS|Inheritance|EQ|TT|IN"}}]}}"""
+
+_BIB_HEADER = re.compile(r"^--- (?:ORCID|SCHOLAR) BIBLIOGRAPHY: (.+?) ---$")
+_BIB_ENTRY = re.compile(r"^- \[(.*?)\] (.+)$")
+_TERM = re.compile(r"[^\W\d_]{4,}")
+
+
+def resolve_logic(final_query):
+    """Izbere arhitekturno logiko po ključnih frazah v poizvedbi: vrne (logic_type, logic_desc)."""
+    q_lower = final_query.lower()
+    if "striktna hierarhična logika" in q_lower: return LOGIC_MODES["strict"]
+    if "relacijska logika" in q_lower: return LOGIC_MODES["relational"]
+    return LOGIC_MODES["associative"]
+
+
+def query_terms(*texts):
+    """Vsebinske besede (4+ črk) iz poizvedbe in polj za rangiranje virov in konteksta."""
+    return frozenset(t.casefold() for text in texts for t in _TERM.findall(text or ""))
+
+
+@lru_cache(maxsize=256)
+def config_fragment(profiles, sciences, expertise, models, paradigms, goal, approaches, methods, tools):
+    """Vse dimenzije konfiguracije kot strnjene vrstice (predpomnjeno po konfiguraciji)."""
+    rows = (("User profiles", profiles), ("Science fields", sciences), ("Expertise level", (expertise,)),
+            ("Structural models", models), ("Scientific paradigms", paradigms), ("Context/Goal", (goal,)),
+            ("Mental approaches", approaches), ("Methodologies", methods), ("Specific tools", tools))
+    lines = [f"- {label}: {', '.join(v for v in values if v)}" for label, values in rows if any(values)]
+    return "CONFIGURATION (tailor depth, vocabulary and emphasis to all of it):\n" + "\n".join(lines) if lines else ""
+
+
+def parse_biblio(biblio):
+    """Bibliografski niz -> [(glava avtorja, [(leto, naslov)])]."""
+    authors = []
+    for line in (biblio or "").splitlines():
+        line = line.strip()
+        header = _BIB_HEADER.match(line)
+        if header:
+            authors.append((header.group(1), []))
+            continue
+        entry = _BIB_ENTRY.match(line)
+        if entry and authors: authors[-1][1].append((entry.group(1), entry.group(2)))
+    return authors
+
+
+def _entry_score(year, title, terms):
+    overlap = len(query_terms(title) & terms)
+    recency = int(year) / 10000.0 if year.isdigit() else 0.0
+    return overlap + recency
+
+
+@lru_cache(maxsize=128)
+def biblio_fragment(biblio, terms, budget):
+    """Bibliografija, skrčena na `budget` žetonov: vnosi po ujemanju s poizvedbo in novosti,
+    izmenično po avtorjih, da vsak avtor dobi delež. Vrne (besedilo, ohranjeni, vsi)."""
+    authors = parse_biblio(biblio)
+    total = sum(len(entries) for _, entries in authors)
+    if not authors: return "", 0, 0
+    ranked = [sorted(entries, key=lambda e: _entry_score(e[0], e[1], terms), reverse=True) for _, entries in authors]
+    kept = [[] for _ in authors]
+    used = estimate_tokens("CONTEXT AUTHORS:") + sum(estimate_tokens(f"{name}:") for name, _ in authors)
+    for depth in range(max(len(r) for r in ranked)):
+        for i, entries in enumerate(ranked):
+            if depth >= len(entries): continue
+            year, title = entries[depth]
+            cost = estimate_tokens(f"[{year}] {title}; ")
+            if used + cost > budget: continue
+            kept[i].append(entries[depth])
+            used += cost
+    lines = [f"- {name}: " + "; ".join(f"[{y}] {t}" for y, t in entries) for (name, _), entries in zip(authors, kept)]
+    return "CONTEXT AUTHORS:\n" + "\n".join(lines), sum(len(k) for k in kept), total
+
+
+def trim_context(context_text, terms, budget=CONTEXT_BUDGET_TOKENS):
+    """Priloženi kontekst v proračunu: odstavki z največ ujemanji s poizvedbo, v izvirnem vrstnem redu."""
+    if estimate_tokens(context_text) <= budget: return context_text
+    paragraphs = [p for p in re.split(r"\n\s*\n", context_text) if p.strip()]
+    order = sorted(range(len(paragraphs)), key=lambda i: (-len(query_terms(paragraphs[i]) & terms), i))
+    keep, used = set(), 0
+    for i in order:
+        cost = estimate_tokens(paragraphs[i])
+        if used + cost <= budget:
+            keep.add(i)
+            used += cost
+    return "\n\n".join(paragraphs[i] for i in sorted(keep))
+
+
+def dedupe_lines(text):
+    """Odstrani ponovljene vrstice navodil (primerjava brez velikosti črk in presledkov)."""
+    seen, out = set(), []
+    for line in text.splitlines():
+        key = " ".join(line.casefold().split())
+        if key and key in seen: continue
+        if key: seen.add(key)
+        out.append(line)
+    return "\n".join(out)
+
+
+@dataclass
+class CompiledPrompt:
+    """Sestavljena sporočila in poročilo o porabi žetonov po razdelkih."""
+    system: str
+    user: str
+    sections: dict = field(default_factory=dict)
+    trimmed: dict = field(default_factory=dict)
+    budget: int = PROMPT_BUDGET_TOKENS
+
+    @property
+    def system_tokens(self):
+        return estimate_tokens(self.system)
+
+    @property
+    def user_tokens(self):
+        return estimate_tokens(self.user)
+
+    def report(self):
+        return {"system_tokens": self.system_tokens, "user_tokens": self.user_tokens,
+                "total_tokens": self.system_tokens + self.user_tokens, "budget": self.budget,
+                "sections": dict(self.sections), "trimmed": dict(self.trimmed)}
+
+
+def compile_prompt(cfg, biblio, logic, thesaurus_context="", ranked_focus="", budget=PROMPT_BUDGET_TOKENS,
+                   context_budget=CONTEXT_BUDGET_TOKENS):
+    """Sestavi sistemski poziv iz celotne konfiguracije pod proračunom žetonov.
+
+    Obvezni razdelki (vloga, logika, struktura, oblika, konfiguracija) gredo
+    vedno; tezaver in rangirni fokus le, če je prostor; bibliografija dobi
+    preostanek, razvrščena po ujemanju s poizvedbo.
+    """
+    logic_type, logic_desc = logic
+    terms = query_terms(cfg.query, " ".join(cfg.sciences))
+    sections = [
+        ("role", _ROLE),
+        ("logic", f"MANDATORY ARCHITECTURAL LOGIC: {logic_type}\n{logic_desc}"),
+        ("structure", _STRUCTURE),
+        ("configuration", config_fragment(tuple(cfg.profiles), tuple(cfg.sciences), cfg.expertise, tuple(cfg.models),
+                                          tuple(cfg.paradigms), cfg.goal, tuple(cfg.approaches), tuple(cfg.methods),
+                                          tuple(cfg.tools))),
+        ("format", _FORMAT),
+    ]
+    used = sum(estimate_tokens(text) for _, text in sections)
+    optional = [("thesaurus", f"THESAURUS CONTEXT: {thesaurus_context}" if thesaurus_context else ""),
+                ("ranked_focus", f"RANKED FOCUS (multi-dimensional rank thesaurus): {ranked_focus}" if ranked_focus else "")]
+    compiled = CompiledPrompt(system="", user="", budget=budget)
+    for pos, (name, text) in enumerate(optional, start=3):
+        if not text: continue
+        if used + estimate_tokens(text) > budget:
+            compiled.trimmed[name] = "dropped"
+            continue
+        sections.insert(pos, (name, text))
+        used += estimate_tokens(text)
+    bib_text, kept, total = biblio_fragment(biblio or "", terms, max(0, budget - used))
+    if bib_text: sections.insert(len(sections) - 1, ("bibliography", bib_text))
+    if kept < total: compiled.trimmed["bibliography"] = f"{kept}/{total} entries"
+
+    compiled.system = dedupe_lines("\n\n".join(text for _, text in sections if text))
+    compiled.sections = {name: estimate_tokens(text) for name, text in sections if text}
+    context = trim_context(cfg.context_text, terms, context_budget) if cfg.context_text else ""
+    if context != cfg.context_text:
+        compiled.trimmed["context"] = f"{estimate_tokens(context)}/{estimate_tokens(cfg.context_text)} tokens"
+    compiled.user = cfg.query + CONTEXT_SEPARATOR + context if context else cfg.query
+    return compiled
+
+
+def perspective_directive(kind, name, words, nodes):
+    """Dodatek k sistemskemu pozivu za en krak razvejane sinteze (ena perspektiva)."""
+    return (f"\n\nFAN-OUT PERSPECTIVE (overrides length and density above): {kind}: {name}.\n"
+            f"- Write a focused sub-dissertation of about {words} words strictly from this perspective.\n"
+            f"- Generate a semantic graph of about {nodes} nodes; name shared concepts with their plain canonical "
+            f"names so they can be merged with other perspectives.")
@@ -0,0 +1,155 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+# =========================================================
+# MULTIDIMENZIONALNI RANGIRNI TEZAVER (vektorsko točkovanje)
+# =========================================================
+CONCEPT_KINDS = ("fields", "methods", "tools", "facets")
+CATEGORIES = ("Formal", "Natural", "Social", "Applied", "Humanities")
+
+# Uteži blokov: ujemanje s polji, afiniteta do kategorij, afiniteta do vrste pojma
+W_FIELD, W_CATEGORY, W_KIND = 1.0, 0.5, 0.3
+
+# Afinitete dimenzij konfiguracije -> kategorije polj / vrste pojmov
+PARADIGM_CATEGORIES = {
+    "Empiricism": {"Natural": 1.0, "Applied": 0.6},
+    "Rationalism": {"Formal": 1.0, "Humanities": 0.4},
+    "Constructivism": {"Social": 1.0, "Humanities": 0.7},
+    "Positivism": {"Natural": 0.8, "Formal": 0.6},
+    "Pragmatism": {"Applied": 1.0, "Social": 0.4},
+}
+PROFILE_KINDS = {
+    "Adventurers": {"facets": 1.0, "fields": 0.5},
+    "Applicators": {"tools": 1.0, "methods": 0.7},
+    "Know-it-alls": {"fields": 1.0, "facets": 0.6},
+    "Observers": {"methods": 1.0, "tools": 0.5},
+}
+MODEL_KINDS = {
+    "Causal Connections": {"methods": 1.0},
+    "Principles & Relations": {"fields": 1.0},
+    "Episodes & Sequences": {"methods": 0.7},
+    "Facts & Characteristics": {"tools": 1.0},
+    "Generalizations": {"fields": 0.7, "facets": 0.5},
+    "Glossary": {"facets": 1.0},
+    "Concepts": {"facets": 0.8, "fields": 0.4},
+}
+APPROACH_KINDS = {
+    "Induction": {"methods": 0.6, "tools": 0.4},
+    "Deduction": {"fields": 0.6},
+    "Hierarchy": {"fields": 0.5},
+    "Whole and part": {"facets": 0.5},
+    "Abstraction and elimination": {"fields": 0.5},
+    "Addition and composition": {"tools": 0.5},
+    "Similarity and difference": {"facets": 0.5},
+}
+EXPERTISE_KINDS = {
+    "Novice": {"fields": 1.0, "facets": 0.5},
+    "Intermediate": {"methods": 0.6, "facets": 0.6},
+    "Expert": {"methods": 1.0, "tools": 0.8},
+}
+GOAL_AFFINITY = {
+    "Scientific Research": {"methods": 1.0},
+    "Problem Solving": {"tools": 1.0, "Applied": 0.6},
+    "Educational": {"fields": 1.0, "facets": 0.5},
+    "Policy Making": {"Social": 1.0, "facets": 0.4},
+}
+
+
+def _split_categories(cat):
+    return [c.strip() for c in (cat or "").split("/") if c.strip() in CATEGORIES]
+
+
+class RankThesaurus:
+    """Vsak pojem (polje, metoda, orodje, faseta) je redka vrstica uteži nad
+    prostorom [polja | kategorije | vrste]; konfiguracija je vektor v istem
+    prostoru, zato je razvrstitev celotnega tezavra en sam produkt matrike z vektorjem.
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        fields = ontology.fields
+        self.field_col = {name: i for i, name in enumerate(fields)}
+        self.cat_col = {c: len(fields) + i for i, c in enumerate(CATEGORIES)}
+        self.kind_col = {k: len(fields) + len(CATEGORIES) + i for i, k in enumerate(CONCEPT_KINDS)}
+        self.dim = len(fields) + len(CATEGORIES) + len(CONCEPT_KINDS)
+
+        names, rows, cols, vals = [], [], [], []
+        self.kind_slices = {}
+
+        def add_concept(name, kind, member_fields):
+            r = len(names)
+            names.append(name)
+            cats = sorted({c for f in member_fields for c in _split_categories(ontology.field_category(f))})
+            for f in member_fields:
+                rows.append(r); cols.append(self.field_col[f]); vals.append(W_FIELD / len(member_fields))
+            for c in cats:
+                rows.append(r); cols.append(self.cat_col[c]); vals.append(W_CATEGORY / len(cats))
+            rows.append(r); cols.append(self.kind_col[kind]); vals.append(W_KIND)
+
+        start = 0
+        for f in fields: add_concept(f, "fields", [f])
+        self.kind_slices["fields"] = slice(start, len(names))
+        for kind in CONCEPT_KINDS[1:]:
+            start = len(names)
+            for tid, fids in ontology.fields_by_term[kind].items():
+                add_concept(ontology.name(tid), kind, [ontology.name(f) for f in fids])
+            self.kind_slices[kind] = slice(start, len(names))
+        self.names = names
+        self.matrix = sparse.csr_matrix((vals, (rows, cols)), shape=(len(names), self.dim), dtype=np.float32)
+
+    def config_vector(self, sciences=(), profiles=(), paradigms=(), models=(), approaches=(),
+                      expertise=None, goal=None):
+        """Vektor konfiguracije: izbrana polja + povprečne afinitete posameznih dimenzij."""
+        q = np.zeros(self.dim, dtype=np.float32)
+        for f in sciences:
+            if f in self.field_col: q[self.field_col[f]] = 1.0
+        groups = [
+            [PARADIGM_CATEGORIES.get(p, {}) for p in paradigms],
+            [PROFILE_KINDS.get(p, {}) for p in profiles],
+            [MODEL_KINDS.get(m, {}) for m in models],
+            [APPROACH_KINDS.get(a, {}) for a in approaches],
+            [EXPERTISE_KINDS.get(expertise, {})],
+            [GOAL_AFFINITY.get(goal, {})],
+        ]
+        for group in groups:
+            group = [g for g in group if g]
+            for affinity in group:
+                for target, w in affinity.items():
+                    col = self.cat_col.get(target, self.kind_col.get(target))
+                    q[col] += w / len(group)
+        return q
+
+    def score(self, queries):
+        """Točke vseh pojmov za eno (vektor) ali več konfiguracij (matrika n_konfig × dim)."""
+        return np.asarray(self.matrix @ np.atleast_2d(queries).T).T
+
+    def rank(self, query, k=5):
+        """Top-k pojmov za vsako dimenzijo (polja, metode, orodja, fasete) kot [(ime, točke)]."""
+        scores = self.score(query)[0]
+        ranked = {}
+        for kind, sl in self.kind_slices.items():
+            block = scores[sl]
+            if block.size == 0:
+                ranked[kind] = []
+                continue
+            top = np.argpartition(-block, min(k, block.size) - 1)[:k]
+            top = top[np.argsort(-block[top], kind="stable")]
+            ranked[kind] = [(self.names[sl.start + i], float(block[i])) for i in top if block[i] > 0]
+        return ranked
+
+
+def ranked_context(ranked, per_kind=5):
+    """Strnjen opis razvrstitve za sistemski poziv."""
+    parts = []
+    for kind in CONCEPT_KINDS:
+        items = ranked.get(kind, [])[:per_kind]
+        if items: parts.append(f"{kind}: " + ", ".join(f"{name} ({score:.2f})" for name, score in items))
+    return "; ".join(parts)
+
+
+@lru_cache(maxsize=4)
+def load_rank_thesaurus(ontology):
+    """Rangirni tezaver za ontologijo, zgrajen enkrat na proces."""
+    return RankThesaurus(ontology)
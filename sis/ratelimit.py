@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+
+# =========================================================
+# OMEJEVANJE HITROSTI IN PONOVNI POSKUSI (429 / 5xx)
+# =========================================================
+RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+
+def estimate_tokens(text):
+    """Groba lokalna ocena števila žetonov (≈ 4 znaki na žeton)."""
+    return len(text or "") // 4 + 1
+
+
+class TokenBucket:
+    """Vedro žetonov za omejitev porabe na minuto; `acquire` blokira, dokler ni dovolj kapacitete."""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens):
+        # Zahteva, večja od kapacitete, bi sicer čakala v nedogled
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                wait = (tokens - self.available) / self.rate
+            time.sleep(min(wait, 5.0))
+
+
+def status_code(exc):
+    """HTTP status iz napake odjemalca (openai / requests), če obstaja."""
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def is_retryable(exc):
+    """Ali je napako smiselno ponoviti (omejitev hitrosti, napaka strežnika, prekinjena povezava)."""
+    code = status_code(exc)
+    if code is not None: return code in RETRY_STATUS
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout")
+
+
+def retry_after(exc):
+    """Sekunde iz glave Retry-After, če jo je strežnik poslal."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """Eksponentni zamik s polnim naključnim tresenjem (full jitter)."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(fn, retries=5, base_delay=1.0, max_delay=60.0, on_retry=None):
+    """Pokliče `fn()`; ob 429/5xx/prekinitvi ponovi z zamikom (Retry-After ima prednost)."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= retries or not is_retryable(exc): raise
+            delay = retry_after(exc)
+            delay = backoff_delay(attempt, base_delay, max_delay) if delay is None else min(delay, max_delay)
+            if on_retry: on_retry(attempt, exc, delay)
+            time.sleep(delay)
+            attempt += 1
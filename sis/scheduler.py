@@ -0,0 +1,296 @@
+import contextvars
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from sis.metrics import count, observe
+from sis.ratelimit import backoff_delay, is_retryable, retry_after, status_code
+
+# =========================================================
+# PROCESNI RAZPOREJEVALNIK SINTEZ (pravična vrsta + tempo po glavah)
+# =========================================================
+LANE_CONCURRENCY = 4        # hkratni klici na en API ključ
+MAX_RETRIES = 5
+# Ključe vnašajo uporabniki: nedejavne vrste (in njihove niti ter povezave) sproščamo
+LANE_IDLE_SECONDS = float(os.environ.get("SIS_LANE_IDLE", 600))
+MAX_LANES = int(os.environ.get("SIS_MAX_LANES", 32))
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value):
+    """Pretvori trajanje iz glave (npr. '2m59.56s', '7.66s', '120ms') v sekunde."""
+    if not value: return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = _DURATION.findall(value)
+        return sum(float(n) * _UNITS[u] for n, u in parts) if parts else None
+
+
+class RateLimitState:
+    """Stanje omejitev ponudnika iz glav x-ratelimit-* in Retry-After, deljeno za en ključ."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.resume_at = 0.0
+
+    def observe(self, headers):
+        """Posodobi stanje iz glav odgovora (kliče se za vsak HTTP odgovor odjemalca)."""
+        now = time.monotonic()
+        with self._lock:
+            if headers.get("x-ratelimit-remaining-requests") is not None:
+                self.remaining_requests = int(float(headers["x-ratelimit-remaining-requests"]))
+            if headers.get("x-ratelimit-remaining-tokens") is not None:
+                self.remaining_tokens = int(float(headers["x-ratelimit-remaining-tokens"]))
+            # Ko je kvota izčrpana, počakamo do ponastavitve, namesto da bi tvegali 429
+            if self.remaining_requests == 0:
+                reset = parse_reset(headers.get("x-ratelimit-reset-requests"))
+                if reset: self.resume_at = max(self.resume_at, now + reset)
+            if self.remaining_tokens == 0:
+                reset = parse_reset(headers.get("x-ratelimit-reset-tokens"))
+                if reset: self.resume_at = max(self.resume_at, now + reset)
+            wait = parse_reset(headers.get("retry-after"))
+            if wait: self.resume_at = max(self.resume_at, now + wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def pause_remaining(self):
+        return max(0.0, self.resume_at - time.monotonic())
+
+    def wait_turn(self):
+        """Blokira, dokler ponudnik spet ne sprejema zahtev."""
+        while True:
+            remaining = self.pause_remaining()
+            if remaining <= 0: return
+            time.sleep(min(remaining, 1.0))
+
+
+class Ticket:
+    """Posel v vrsti: stanje, delno pretočeno besedilo in končni rezultat."""
+
+    def __init__(self, session_id, fn, lane):
+        self.session_id = session_id
+        self.fn = fn
+        self.lane = lane
+        self.context = contextvars.copy_context()  # sled meritev seje, ki je posel oddala
+        self.state = "queued"
+        self.partial = ""
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self._result = None
+        self._error = None
+        self._done = threading.Event()
+
+    def set_partial(self, text):
+        self.partial = text
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self):
+        self._done.wait()
+        if self._error is not None: raise self._error
+        return self._result
+
+
+class _Lane:
+    """Ena vrsta na API ključ: pravično krožno jemanje po sejah in omejeno število delavcev."""
+
+    def __init__(self, client, rate, concurrency):
+        self.client = client
+        self.rate = rate
+        self.concurrency = concurrency
+        self.queues = {}
+        self.rotation = deque()
+        self.running = 0
+        self.avg_duration = 20.0
+        self.cond = threading.Condition()
+        self.workers = []
+        self.last_used = time.monotonic()
+        self.closed = False
+
+    def _ensure_workers(self):
+        # Kliče se pod `cond`: delavec, ki je medtem odšel zaradi nedejavnosti, se nadomesti
+        while len(self.workers) < self.concurrency:
+            t = threading.Thread(target=self._work, name=f"sis-scheduler-{len(self.workers)}", daemon=True)
+            self.workers.append(t)
+            t.start()
+
+    def push(self, ticket):
+        with self.cond:
+            queue = self.queues.setdefault(ticket.session_id, deque())
+            if not queue: self.rotation.append(ticket.session_id)
+            queue.append(ticket)
+            self.last_used = time.monotonic()
+            self._ensure_workers()
+            self.cond.notify()
+
+    def idle_for(self, now):
+        """Sekunde od zadnje uporabe; None, dokler ima vrsta čakajoče ali tekoče posle."""
+        with self.cond:
+            if self.rotation or self.running: return None
+            return now - self.last_used
+
+    def close(self):
+        """Ustavi delavce in zapre povezave odjemalca (le za nedejavno vrsto)."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+    def _pop(self):
+        session = self.rotation.popleft()
+        queue = self.queues[session]
+        ticket = queue.popleft()
+        if queue: self.rotation.append(session)
+        else: del self.queues[session]
+        return ticket
+
+    def order(self):
+        """Vrstni red čakajočih poslov, kot ga bodo delavci prevzeli (krožno po sejah)."""
+        with self.cond:
+            queues = {s: list(q) for s, q in self.queues.items()}
+            rotation = list(self.rotation)
+        ordered = []
+        while rotation:
+            session = rotation.pop(0)
+            ordered.append(queues[session].pop(0))
+            if queues[session]: rotation.append(session)
+        return ordered
+
+    def _work(self):
+        while True:
+            with self.cond:
+                while not self.rotation:
+                    # Delavec brez dela po `LANE_IDLE_SECONDS` odide; `push` ga po potrebi nadomesti
+                    if self.closed or not self.cond.wait(LANE_IDLE_SECONDS) and not self.rotation:
+                        self.workers.remove(threading.current_thread())
+                        return
+                ticket = self._pop()
+                self.running += 1
+            try:
+                self._run(ticket)
+            finally:
+                with self.cond:
+                    self.running -= 1
+                    self.last_used = time.monotonic()
+                    if ticket.started_at is not None:
+                        took = time.monotonic() - ticket.started_at
+                        self.avg_duration = 0.8 * self.avg_duration + 0.2 * took
+
+    def _run(self, ticket):
+        ticket.started_at = time.monotonic()
+        ticket.context.run(observe, "scheduler.queue_wait.ms", (ticket.started_at - ticket.enqueued_at) * 1000.0)
+        while True:
+            self.rate.wait_turn()
+            ticket.state = "running"
+            ticket.attempts += 1
+            try:
+                ticket._result = ticket.context.run(ticket.fn, self.client, ticket)
+                break
+            except Exception as exc:
+                if ticket.attempts > MAX_RETRIES or not is_retryable(exc):
+                    ticket._error = exc
+                    break
+                delay = retry_after(exc)
+                delay = backoff_delay(ticket.attempts - 1) if delay is None else delay
+                # 429 ustavi celotno vrsto za ta ključ, ne le tega posla
+                count(f"scheduler.retry.{status_code(exc) or type(exc).__name__}")
+                if status_code(exc) == 429: self.rate.pause(delay)
+                else: time.sleep(delay)
+                ticket.partial = ""
+                ticket.state = "retrying"
+        ticket.state = "failed" if ticket._error is not None else "done"
+        ticket._done.set()
+
+
+class SynthesisScheduler:
+    """Procesno deljen razporejevalnik: en odjemalec in ena vrsta na API ključ."""
+
+    def __init__(self, concurrency=LANE_CONCURRENCY):
+        self.concurrency = concurrency
+        self._lanes = {}
+        self._lock = threading.RLock()
+
+    def _lane(self, api_key, base_url):
+        lane_key = hashlib.sha256(f"{base_url}|{api_key}".encode("utf-8")).hexdigest()
+        with self._lock:
+            self._evict(keep=lane_key)
+            lane = self._lanes.get(lane_key)
+            if lane is None:
+                from openai import DefaultHttpxClient, OpenAI
+                rate = RateLimitState()
+                http_client = DefaultHttpxClient(event_hooks={"response": [lambda r: rate.observe(r.headers)]})
+                # Ponovne poskuse vodi razporejevalnik, zato jih odjemalec ne podvaja
+                client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+                lane = self._lanes[lane_key] = _Lane(client, rate, self.concurrency)
+            lane.last_used = time.monotonic()
+            return lane
+
+    def _evict(self, keep=None):
+        """Zapre vrste, nedejavne dlje od `LANE_IDLE_SECONDS`, in najdlje nedejavne nad `MAX_LANES`."""
+        now = time.monotonic()
+        idle = sorted(((t, k) for k, lane in self._lanes.items() if k != keep
+                       for t in [lane.idle_for(now)] if t is not None), reverse=True)
+        excess = len(self._lanes) - MAX_LANES + (keep not in self._lanes)
+        for rank, (idle_time, key) in enumerate(idle):
+            if idle_time < LANE_IDLE_SECONDS and rank >= excess: break
+            self._lanes.pop(key).close()
+            count("scheduler.lane_evicted")
+
+    def lanes(self):
+        """Število odprtih vrst (API ključev) v procesu."""
+        with self._lock:
+            return len(self._lanes)
+
+    def submit(self, session_id, api_key, base_url, fn):
+        """Doda posel `fn(client, ticket)` v vrsto seje; vrne `Ticket`."""
+        # Pod zaklepom: vrsta s poslom ni nedejavna, zato je vmes nihče ne more zapreti
+        with self._lock:
+            lane = self._lane(api_key, base_url)
+            ticket = Ticket(session_id, fn, lane)
+            lane.push(ticket)
+        return ticket
+
+    def position(self, ticket):
+        """Mesto v vrsti (1 = naslednji), 0 če se posel že izvaja ali je končan."""
+        if ticket.state != "queued": return 0
+        order = ticket.lane.order()
+        return order.index(ticket) + 1 if ticket in order else 0
+
+    def estimated_wait(self, ticket):
+        """Ocena čakanja v sekundah glede na mesto v vrsti, povprečno trajanje in morebitno pavzo."""
+        lane = ticket.lane
+        pos = self.position(ticket)
+        if pos == 0: return 0.0
+        ahead = pos - 1 - max(0, lane.concurrency - lane.running)
+        rounds = 0 if ahead < 0 else ahead // lane.concurrency + 1
+        return rounds * lane.avg_duration + lane.rate.pause_remaining()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Vrne razporejevalnik, deljen med vsemi sejami procesa."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None: _scheduler = SynthesisScheduler()
+    return _scheduler
@@ -0,0 +1,100 @@
+import base64
+from functools import lru_cache
+
+# =========================================================
+# STATIČNI DELI VMESNIKA (zgrajeni enkrat na proces, ne ob vsakem zagonu skripte)
+# =========================================================
+APP_CSS = """
+<style>
+    .semantic-node-highlight {
+        color: #2a9d8f;
+        font-weight: bold;
+        border-bottom: 2px solid #2a9d8f;
+        padding: 0 2px;
+        background-color: #f0fdfa;
+        border-radius: 4px;
+        transition: all 0.3s ease;
+        text-decoration: none !important;
+    }
+    .semantic-node-highlight:hover {
+        background-color: #ccfbf1;
+        color: #264653;
+        border-bottom: 2px solid #e76f51;
+    }
+    .author-search-link {
+        color: #1d3557;
+        font-weight: bold;
+        text-decoration: none;
+        border-bottom: 1px double #457b9d;
+        padding: 0 1px;
+    }
+    .author-search-link:hover {
+        color: #e63946;
+        background-color: #f1faee;
+    }
+    .google-icon {
+        font-size: 0.75em;
+        vertical-align: super;
+        margin-left: 2px;
+        color: #457b9d;
+        opacity: 0.8;
+    }
+    .stMarkdown {
+        line-height: 1.8;
+        font-size: 1.05em;
+    }
+</style>
+"""
+
+# --- LOGOTIP: 3D RELIEF (Embedded SVG) ---
+SVG_3D_RELIEF = """
+<svg width="240" height="240" viewBox="0 0 240 240" xmlns="http://www.w3.org/2000/svg">
+    <defs>
+        <filter id="reliefShadow" x="-20%" y="-20%" width="150%" height="150%">
+            <feDropShadow dx="4" dy="4" stdDeviation="3" flood-color="#000" flood-opacity="0.4"/>
+        </filter>
+        <linearGradient id="pyramidSide" x1="0%" y1="0%" x2="100%" y2="100%">
+            <stop offset="0%" style="stop-color:#e0e0e0;stop-opacity:1" />
+            <stop offset="100%" style="stop-color:#bdbdbd;stop-opacity:1" />
+        </linearGradient>
+        <linearGradient id="treeGrad" x1="0%" y1="0%" x2="0%" y2="100%">
+            <stop offset="0%" style="stop-color:#66bb6a;stop-opacity:1" />
+            <stop offset="100%" style="stop-color:#2e7d32;stop-opacity:1" />
+        </linearGradient>
+    </defs>
+    <circle cx="120" cy="120" r="100" fill="#f0f0f0" stroke="#000000" stroke-width="4" filter="url(#reliefShadow)" />
+    <path d="M120 40 L50 180 L120 200 Z" fill="url(#pyramidSide)" />
+    <path d="M120 40 L190 180 L120 200 Z" fill="#9e9e9e" />
+    <rect x="116" y="110" width="8" height="70" rx="2" fill="#5d4037" />
+    <circle cx="120" cy="85" r="30" fill="url(#treeGrad)" filter="url(#reliefShadow)" />
+    <circle cx="95" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
+    <circle cx="145" cy="125" r="22" fill="#43a047" filter="url(#reliefShadow)" />
+    <rect x="70" y="170" width="20" height="12" rx="2" fill="#1565c0" filter="url(#reliefShadow)" />
+    <rect x="150" y="170" width="20" height="12" rx="2" fill="#c62828" filter="url(#reliefShadow)" />
+    <rect x="110" y="185" width="20" height="12" rx="2" fill="#f9a825" filter="url(#reliefShadow)" />
+</svg>
+"""
+LOGO_HTML = ('<div style="text-align:center"><img src="data:image/svg+xml;base64,'
+             + base64.b64encode(SVG_3D_RELIEF.encode("utf-8")).decode("utf-8") + '" width="220"></div>')
+
+USER_GUIDE = """
+1. **API Key**: Enter your key to connect the AI engine. It is NOT stored on the server.
+2. **Minimal Config**: Physics, CS, and Linguistics are pre-selected.
+3. **Authors**: Provide author names to fetch ORCID metadata.
+4. **Inquiry**: Submit a complex query for an exhaustive dissertation.
+5. **Semantic Graph**: Explore colorful nodes interconnected via TT, BT, NT logic.
+6. **Shapes & 3D**: Request triangles, rectangles or 3D bodies in your inquiry.
+7. **Export PNG**: Use the 💾 button to save the graph to your local disk.
+"""
+
+
+@lru_cache(maxsize=4)
+def explorer_sections(ontology):
+    """Vsebina razširitev 'Knowledge Explorer' kot [(naslov, markdown)]; en element na razširitev namesto vrstice na vnos."""
+    return [
+        ("👤 User Profiles", "\n\n".join(f"**{p}**: {ontology.describe('User profiles', p)}" for p in ontology.profiles)),
+        ("🧠 mental approaches", "\n\n".join(f"• {a}" for a in ontology.approaches)),
+        ("🌍 Scientific paradigms", "\n\n".join(f"**{p}**: {ontology.describe('Scientific paradigms', p)}" for p in ontology.paradigms)),
+        ("🔬 Science fields", "\n\n".join(f"• **{f}**" for f in ontology.fields)),
+        ("🏗️ Structural models", "\n\n".join(f"**{m}**: {ontology.describe('Structural models', m)}" for m in ontology.models)),
+    ]
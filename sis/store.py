@@ -0,0 +1,304 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from sis.cache import cache_path
+from sis.graph import GraphEdge, GraphNode, SemanticGraph
+
+# =========================================================
+# TRAJNI KUMULATIVNI GRAF ZNANJA (SQLite, inkrementalno zlivanje)
+# =========================================================
+GRAPH_STORE_PATH = os.environ.get("SIS_GRAPH_STORE", "")
+NEIGHBORHOOD_LIMIT = 300
+
+# Poizvedbe in avtorji so zasebni za sejo: `session` omeji izvor vozlišč na sinteze iste seje
+_SYNTHESES = """
+CREATE TABLE IF NOT EXISTS syntheses (
+    id INTEGER PRIMARY KEY,
+    inquiry TEXT,
+    authors TEXT,
+    graph_hash TEXT,
+    created_at REAL NOT NULL,
+    session TEXT,
+    UNIQUE (session, graph_hash)
+)"""
+_SCHEMA = _SYNTHESES + """;
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    canon TEXT NOT NULL UNIQUE,
+    label TEXT NOT NULL,
+    type TEXT, color TEXT, shape TEXT,
+    mentions INTEGER NOT NULL DEFAULT 0,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    concept TEXT
+);
+CREATE TABLE IF NOT EXISTS edges (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    rel TEXT NOT NULL,
+    mentions INTEGER NOT NULL DEFAULT 0,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (src, dst, rel)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_edges_dst ON edges(dst);
+CREATE TABLE IF NOT EXISTS synonyms (
+    alias TEXT PRIMARY KEY,
+    canon TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS node_sources (
+    node INTEGER NOT NULL,
+    synthesis INTEGER NOT NULL,
+    PRIMARY KEY (node, synthesis)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edge_sources (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    rel TEXT NOT NULL,
+    synthesis INTEGER NOT NULL,
+    PRIMARY KEY (src, dst, rel, synthesis)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_node_sources_synthesis ON node_sources(synthesis);
+"""
+_CONCEPT_INDEX = "CREATE INDEX IF NOT EXISTS idx_nodes_concept ON nodes(concept) WHERE concept IS NOT NULL"
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def canonical_label(label):
+    """Normalizirana oblika oznake: NFKC, male črke, '&' -> 'and', ločila in presledki strnjeni."""
+    text = unicodedata.normalize("NFKC", label or "").casefold().replace("&", " and ")
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def node_key(node):
+    """Identiteta vozlišča v shrambi: kanonična oznaka (pojem ontologije je atribut, ne ključ)."""
+    return canonical_label(node.label)
+
+
+class GraphStore:
+    """En rastoč graf znanja iz vseh sintez.
+
+    Vozlišča so ključena po kanonični oznaki (po razrešitvi sopomenk),
+    povezave po (izvor, cilj, relacija); vsako zlivanje je ena transakcija
+    upsertov po indeksih, zato je cena sorazmerna velikosti novega grafa.
+    Povezan pojem ontologije je le atribut (stolpec `concept`): povezovanje je
+    približno, zato vozlišč ne zliva; sopomenke nastanejo samo z `add_synonym`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+            conn.execute(_CONCEPT_INDEX)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn):
+        """Starejše shrambe: doda stolpec `concept` (vozlišča, ključena po pojmu, dobijo sopomenko po oznaki)
+        in sintezam stolpec `session` (obstoječe sinteze ostanejo brez seje)."""
+        if not any(col[1] == "concept" for col in conn.execute("PRAGMA table_info(nodes)")):
+            conn.execute("ALTER TABLE nodes ADD COLUMN concept TEXT")
+            conn.executemany("INSERT OR IGNORE INTO synonyms (alias, canon) VALUES (?, ?)",
+                             [(canonical_label(label), canon) for canon, label in conn.execute("SELECT canon, label FROM nodes")
+                              if canonical_label(label) and canonical_label(label) != canon])
+        if not any(col[1] == "session" for col in conn.execute("PRAGMA table_info(syntheses)")):
+            # Edinstvenost `graph_hash` velja odslej na sejo, zato tabelo prepišemo
+            conn.execute("ALTER TABLE syntheses RENAME TO syntheses_old")
+            conn.execute(_SYNTHESES)
+            conn.execute("INSERT INTO syntheses (id, inquiry, authors, graph_hash, created_at) "
+                         "SELECT id, inquiry, authors, graph_hash, created_at FROM syntheses_old")
+            conn.execute("DROP TABLE syntheses_old")
+
+    # --- sopomenke ---
+    def add_synonym(self, alias, canonical):
+        """Registrira sopomenko: oznaka `alias` se odslej zlije v vozlišče `canonical`."""
+        alias_c, canon_c = canonical_label(alias), self.resolve(canonical)
+        if not alias_c or alias_c == canon_c: return
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO synonyms (alias, canon) VALUES (?, ?)", (alias_c, canon_c))
+
+    def resolve(self, label):
+        """Kanonični ključ oznake po normalizaciji in razrešitvi sopomenk."""
+        canon = canonical_label(label)
+        row = self._conn().execute("SELECT canon FROM synonyms WHERE alias = ?", (canon,)).fetchone()
+        return row[0] if row else canon
+
+    def _resolve_many(self, conn, canons):
+        found = {}
+        canons = list(set(canons))
+        for i in range(0, len(canons), 500):
+            part = canons[i:i + 500]
+            found.update(conn.execute(
+                f"SELECT alias, canon FROM synonyms WHERE alias IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return found
+
+    def _ids_for(self, conn, canons):
+        ids = {}
+        canons = list(set(canons))
+        for i in range(0, len(canons), 500):
+            part = canons[i:i + 500]
+            ids.update((c, i_) for i_, c in conn.execute(
+                f"SELECT id, canon FROM nodes WHERE canon IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return ids
+
+    # --- zlivanje ---
+    def merge(self, graph, inquiry="", authors="", graph_key=None, session=None):
+        """Zlije `SemanticGraph` v shrambo; vrne (id sinteze, novih vozlišč, novih povezav).
+
+        Isti graf (enak `graph_key`) se v isti seji zlije samo enkrat, zato ponovni
+        zagon ne napihuje števcev. Poizvedba in avtorji so vidni le seji `session`.
+        """
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            if graph_key is not None:
+                row = conn.execute("SELECT id FROM syntheses WHERE graph_hash = ? AND session IS ?",
+                                   (graph_key, session)).fetchone()
+                if row: return row[0], 0, 0
+            synthesis = conn.execute(
+                "INSERT INTO syntheses (inquiry, authors, graph_hash, created_at, session) VALUES (?, ?, ?, ?, ?)",
+                (inquiry, authors, graph_key, now, session),
+            ).lastrowid
+
+            raw = {n.id: node_key(n) for n in graph.nodes if node_key(n)}
+            aliases = self._resolve_many(conn, raw.values())
+            canon_of = {nid: aliases.get(c, c) for nid, c in raw.items()}
+            first = {}
+            for n in graph.nodes:
+                if n.id in canon_of: first.setdefault(canon_of[n.id], n)
+            new_nodes = len(first) - len(self._ids_for(conn, first))
+            conn.executemany(
+                "INSERT INTO nodes (canon, label, type, color, shape, mentions, first_seen, last_seen, concept) "
+                "VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT(canon) DO UPDATE SET mentions = mentions + 1, last_seen = excluded.last_seen, "
+                "concept = COALESCE(concept, excluded.concept)",
+                [(c, n.label, n.type, n.color, n.shape, now, now, n.concept or None) for c, n in first.items()],
+            )
+            ids = self._ids_for(conn, canon_of.values())
+
+            edges = {(ids[canon_of[e.source]], ids[canon_of[e.target]], e.rel_type)
+                     for e in graph.edges if e.source in canon_of and e.target in canon_of}
+            edges = {e for e in edges if e[0] != e[1]}  # sopomenki, zliti v isto vozlišče
+            new_edges = sum(1 for e in edges if conn.execute(
+                "SELECT 1 FROM edges WHERE src = ? AND dst = ? AND rel = ?", e).fetchone() is None)
+            conn.executemany(
+                "INSERT INTO edges (src, dst, rel, mentions, first_seen, last_seen) VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT(src, dst, rel) DO UPDATE SET mentions = mentions + 1, last_seen = excluded.last_seen",
+                [(s, d, r, now, now) for s, d, r in edges],
+            )
+            conn.executemany("INSERT OR IGNORE INTO node_sources (node, synthesis) VALUES (?, ?)",
+                             [(i, synthesis) for i in set(ids.values())])
+            conn.executemany("INSERT OR IGNORE INTO edge_sources (src, dst, rel, synthesis) VALUES (?, ?, ?, ?)",
+                             [(s, d, r, synthesis) for s, d, r in edges])
+        return synthesis, new_nodes, new_edges
+
+    # --- poizvedbe ---
+    def search(self, text, limit=20):
+        """Vozlišča, katerih kanonična oznaka vsebuje `text`, po številu omemb."""
+        canon = canonical_label(text)
+        if not canon: return []
+        rows = self._conn().execute(
+            "SELECT label, mentions FROM nodes WHERE canon LIKE ? ORDER BY mentions DESC, canon LIMIT ?",
+            (f"%{canon}%", limit),
+        ).fetchall()
+        return rows
+
+    def neighborhood(self, labels, depth=1, limit=NEIGHBORHOOD_LIMIT):
+        """Podgraf okoli podanih oznak do globine `depth` (v obe smeri) kot `SemanticGraph`."""
+        conn = self._conn()
+        seeds = self._ids_for(conn, [self.resolve(l) for l in labels])
+        seen = set(seeds.values())
+        frontier = list(seen)
+        for _ in range(depth):
+            if not frontier or len(seen) >= limit: break
+            nxt = []
+            for i in range(0, len(frontier), 500):
+                part = frontier[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT dst FROM edges WHERE src IN ({marks}) UNION SELECT src FROM edges WHERE dst IN ({marks})",
+                    part + part,
+                ).fetchall()
+                for (n,) in rows:
+                    if n not in seen and len(seen) < limit:
+                        seen.add(n)
+                        nxt.append(n)
+            frontier = nxt
+        return self.subgraph(seen)
+
+    def subgraph(self, node_ids):
+        """Vozlišča in vse povezave med njimi kot `SemanticGraph` (id vozlišča = 'k<id>')."""
+        conn = self._conn()
+        node_ids = list(node_ids)
+        nodes, edges = [], []
+        for i in range(0, len(node_ids), 400):
+            part = node_ids[i:i + 400]
+            marks = ",".join("?" * len(part))
+            for nid, label, ntype, color, shape, concept in conn.execute(
+                    f"SELECT id, label, type, color, shape, concept FROM nodes WHERE id IN ({marks})", part):
+                nodes.append(GraphNode(f"k{nid}", label, ntype, color, shape, concept or ""))
+        if node_ids:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS sel (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM sel")
+            conn.executemany("INSERT INTO sel (id) VALUES (?)", [(n,) for n in node_ids])
+            for s, d, r in conn.execute(
+                    "SELECT e.src, e.dst, e.rel FROM edges e JOIN sel a ON a.id = e.src JOIN sel b ON b.id = e.dst"):
+                edges.append(GraphEdge(f"k{s}", f"k{d}", r))
+            conn.execute("DELETE FROM sel")
+            conn.commit()
+        return SemanticGraph(nodes=nodes, edges=edges)
+
+    def provenance(self, label, session=None, limit=20):
+        """Sinteze (poizvedba, avtorji, čas) seje `session`, ki so prispevale vozlišče."""
+        row = self._conn().execute("SELECT id FROM nodes WHERE canon = ?", (self.resolve(label),)).fetchone()
+        if row is None: return []
+        return self._conn().execute(
+            "SELECT s.inquiry, s.authors, s.created_at FROM node_sources ns JOIN syntheses s ON s.id = ns.synthesis "
+            "WHERE ns.node = ? AND s.session IS ? ORDER BY s.created_at DESC LIMIT ?", (row[0], session, limit),
+        ).fetchall()
+
+    def same_concept(self, label, limit=20):
+        """Druge oznake, povezane z istim pojmom ontologije (predlogi sopomenk za potrditev)."""
+        conn = self._conn()
+        row = conn.execute("SELECT id, concept FROM nodes WHERE canon = ?", (self.resolve(label),)).fetchone()
+        if row is None or not row[1]: return []
+        return [r[0] for r in conn.execute(
+            "SELECT label FROM nodes WHERE concept = ? AND id != ? ORDER BY mentions DESC LIMIT ?", (row[1], row[0], limit))]
+
+    def stats(self):
+        conn = self._conn()
+        return {
+            "nodes": conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0],
+            "edges": conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0],
+            "syntheses": conn.execute("SELECT COUNT(*) FROM syntheses").fetchone()[0],
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_graph_store():
+    """Vrne procesno deljeno shrambo kumulativnega grafa."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None: _store = GraphStore(GRAPH_STORE_PATH or cache_path("knowledge_graph.sqlite"))
+    return _store
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sis.cache import DiskCache, cache_path
+from sis.metrics import observe
+
+# =========================================================
+# SINTEZA: KLIC MODELA IN PRETAKANJE ŽETONOV
+# =========================================================
+GROQ_BASE_URL = os.environ.get("SIS_LLM_BASE_URL", "https://api.groq.com/openai/v1")
+SYNTHESIS_MODEL = "llama-3.3-70b-versatile"
+SYNTHESIS_TEMPERATURE = 0.6
+SYNTHESIS_MAX_TOKENS = 4000
+GRAPH_MARKER = "### SEMANTIC_GRAPH_JSON"
+
+# Vsebinsko naslovljen predpomnilnik rezultatov (TTL 0 ga izklopi)
+SYNTHESIS_CACHE_TTL = float(os.environ.get("SIS_SYNTHESIS_TTL", 7 * 24 * 3600))
+SYNTHESIS_CACHE_MAX_BYTES = int(os.environ.get("SIS_SYNTHESIS_MAX_BYTES", 64 * 1024 * 1024))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def synthesis_cache_key(messages, model=SYNTHESIS_MODEL, temperature=SYNTHESIS_TEMPERATURE):
+    """SHA-256 nad modelom, temperaturo ter sistemskim in uporabniškim sporočilom."""
+    payload = json.dumps({"model": model, "temperature": temperature, "messages": messages},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_synthesis_cache():
+    """Vrne procesno deljen predpomnilnik sintez (ali None, če je izklopljen)."""
+    global _cache
+    if _cache is None and SYNTHESIS_CACHE_TTL > 0:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(cache_path("synthesis.sqlite"), ttl=SYNTHESIS_CACHE_TTL, max_bytes=SYNTHESIS_CACHE_MAX_BYTES)
+                _cache.evict(max_age=SYNTHESIS_CACHE_TTL)
+    return _cache
+
+
+def load_cached_synthesis(messages, model=SYNTHESIS_MODEL, temperature=SYNTHESIS_TEMPERATURE):
+    """Vrne shranjen celoten odgovor modela za enako konfiguracijo ali None."""
+    cache = get_synthesis_cache()
+    if cache is None: return None
+    hit = cache.get_fresh(synthesis_cache_key(messages, model, temperature))
+    return hit["text"] if hit else None
+
+
+def store_synthesis(messages, text_out, model=SYNTHESIS_MODEL, temperature=SYNTHESIS_TEMPERATURE):
+    """Shrani celoten odgovor modela pod vsebinskim ključem."""
+    cache = get_synthesis_cache()
+    if cache is None or not text_out: return
+    cache.set(synthesis_cache_key(messages, model, temperature), {"text": text_out, "model": model})
+
+
+def split_synthesis_output(text_out, marker=GRAPH_MARKER):
+    """Razdeli celoten odgovor na markdown disertacije in rep z grafom (None, če oznake ni)."""
+    parts = text_out.split(marker)
+    return parts[0], (parts[1] if len(parts) > 1 else None)
+
+
+class GraphMarkerSplitter:
+    """Sproti deli tok žetonov na besedilo za izris in rep z grafom.
+
+    Konec medpomnilnika, ki bi lahko bil začetek oznake, zadržimo, dokler
+    naslednji žetoni ne pokažejo, ali gre res za oznako.
+    """
+
+    def __init__(self, marker=GRAPH_MARKER):
+        self.marker = marker
+        self.text = ""
+        self.graph_tail = None
+        self._pending = ""
+
+    @property
+    def in_graph(self):
+        return self.graph_tail is not None
+
+    def feed(self, delta):
+        """Doda košček toka; vrne True, če se je besedilo za izris podaljšalo."""
+        if not delta: return False
+        if self.in_graph:
+            self.graph_tail += delta
+            return False
+        self._pending += delta
+        idx = self._pending.find(self.marker)
+        if idx >= 0:
+            self.text += self._pending[:idx]
+            self.graph_tail = self._pending[idx + len(self.marker):]
+            self._pending = ""
+            return idx > 0
+        keep = 0
+        for k in range(min(len(self.marker) - 1, len(self._pending)), 0, -1):
+            if self.marker.startswith(self._pending[-k:]):
+                keep = k
+                break
+        emit = self._pending[:len(self._pending) - keep]
+        self._pending = self._pending[len(self._pending) - keep:]
+        self.text += emit
+        return bool(emit)
+
+    def close(self):
+        """Zaključi tok: zadržan ostanek brez oznake pripada besedilu."""
+        if not self.in_graph:
+            self.text += self._pending
+            self._pending = ""
+
+    @property
+    def full_text(self):
+        if self.in_graph: return self.text + self.marker + self.graph_tail
+        return self.text + self._pending
+
+
+def record_usage(usage):
+    """Zabeleži porabo žetonov iz odgovora modela (polje `usage`)."""
+    for field in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, field, None)
+        if value: observe(f"llm.{field}", value)
+
+
+def stream_synthesis(client, messages, on_text=None, min_paint_interval=0.08, max_tokens=SYNTHESIS_MAX_TOKENS):
+    """Pretaka odgovor modela in sproti kliče `on_text(besedilo)` do oznake grafa.
+
+    Vrne zaključen `GraphMarkerSplitter` z besedilom in rezerviranim repom grafa.
+    """
+    started = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=SYNTHESIS_MODEL, messages=messages,
+        temperature=SYNTHESIS_TEMPERATURE, max_tokens=max_tokens, stream=True
+    )
+    splitter = GraphMarkerSplitter()
+    last_paint = 0.0
+    first_token = False
+    for chunk in stream:
+        if getattr(chunk, "usage", None): record_usage(chunk.usage)
+        if not chunk.choices: continue
+        if not first_token and chunk.choices[0].delta.content:
+            first_token = True
+            observe("llm.ttft.ms", (time.perf_counter() - started) * 1000.0)
+        grew = splitter.feed(chunk.choices[0].delta.content)
+        now = time.monotonic()
+        if grew and on_text and now - last_paint >= min_paint_interval:
+            on_text(splitter.text)
+            last_paint = now
+    splitter.close()
+    if on_text: on_text(splitter.text)
+    return splitter
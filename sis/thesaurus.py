@@ -0,0 +1,228 @@
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# =========================================================
+# POLIHIERARHIČNI TEZAVER: CSR SOSEDNOSTI PO TIPU RELACIJE
+# =========================================================
+HIERARCHY_DOWN = ("TT", "NT")      # nadrejeni -> podrejeni
+HIERARCHY_UP = ("BT",)             # podrejeni -> nadrejeni
+SYMMETRIC_RELS = ("AS", "EQ")
+DIRECTED_RELS = ("IN",)
+ROOT_TERM = "SIS Knowledge"
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def _csr(n, src, dst):
+    """Zgradi CSR (indptr, indices) iz parov; podvojene povezave odstrani."""
+    if len(src) == 0:
+        return np.zeros(n + 1, dtype=np.int64), _EMPTY
+    keys = np.unique(np.asarray(src, dtype=np.int64) * n + np.asarray(dst, dtype=np.int64))
+    src, dst = keys // n, keys % n
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst.astype(np.int32)
+
+
+def _gather(indptr, indices, frontier):
+    """Vektorizirano zbere sosede vseh vozlišč v `frontier` (z možnimi ponovitvami)."""
+    starts, ends = indptr[frontier], indptr[frontier + 1]
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0: return _EMPTY
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return indices[offsets + np.arange(total)]
+
+
+class ThesaurusGraph:
+    """Tezaver s kompaktnimi celoštevilskimi id-ji in CSR matrikami za vsak tip relacije.
+
+    Hierarhija je shranjena dvakrat (navzdol `down`, navzgor `up`), da sta
+    zaprtji predhodnikov in naslednikov enako hitri; AS/EQ sta simetrični.
+    """
+
+    def __init__(self, labels, edges):
+        self.labels = list(labels)
+        self.n = len(self.labels)
+        self._index = {}
+        for i, label in enumerate(self.labels):
+            self._index.setdefault(label.casefold(), i)
+        pairs = {"down": ([], []), "AS": ([], []), "EQ": ([], []), "IN": ([], [])}
+        for s, t, rel in edges:
+            if s == t: continue
+            if rel in HIERARCHY_DOWN: pairs["down"][0].append(s); pairs["down"][1].append(t)
+            elif rel in HIERARCHY_UP: pairs["down"][0].append(t); pairs["down"][1].append(s)
+            elif rel in SYMMETRIC_RELS:
+                pairs[rel][0].extend((s, t)); pairs[rel][1].extend((t, s))
+            else: pairs["IN"][0].append(s); pairs["IN"][1].append(t)
+        self.adj = {name: _csr(self.n, src, dst) for name, (src, dst) in pairs.items()}
+        self.adj["up"] = _csr(self.n, pairs["down"][1], pairs["down"][0])
+
+    # --- iskanje pojmov ---
+    def find(self, label):
+        """Id pojma po oznaki (neobčutljivo na velikost črk) ali None."""
+        return self._index.get((label or "").strip().casefold())
+
+    def label(self, i):
+        return self.labels[i]
+
+    def neighbors(self, i, rel):
+        indptr, indices = self.adj[rel]
+        return indices[indptr[i]:indptr[i + 1]]
+
+    def broader(self, i): return self.neighbors(i, "up")
+
+    def narrower(self, i): return self.neighbors(i, "down")
+
+    # --- prehodi ---
+    def _bfs(self, sources, rels, max_hops=None):
+        """Večizvorni BFS po uniji relacij; vrne matriko razdalj (-1 = nedosegljivo)."""
+        dist = np.full(self.n, -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        dist[frontier] = 0
+        hop = 0
+        while frontier.size and (max_hops is None or hop < max_hops):
+            hop += 1
+            nxt = np.concatenate([_gather(*self.adj[r], frontier) for r in rels])
+            nxt = np.unique(nxt)
+            nxt = nxt[dist[nxt] < 0]
+            dist[nxt] = hop
+            frontier = nxt.astype(np.int64)
+        return dist
+
+    def ancestors(self, i):
+        """Vsi nadrejeni pojmi (tranzitivno zaprtje BT)."""
+        dist = self._bfs([i], ("up",))
+        return np.flatnonzero(dist > 0)
+
+    def descendants(self, i):
+        """Vsi podrejeni pojmi (tranzitivno zaprtje NT)."""
+        dist = self._bfs([i], ("down",))
+        return np.flatnonzero(dist > 0)
+
+    def lowest_common_broader(self, a, b):
+        """Najbližji skupni nadrejeni pojem (najmanjša vsota razdalj), ali None."""
+        da, db = self._bfs([a], ("up",)), self._bfs([b], ("up",))
+        common = np.flatnonzero((da >= 0) & (db >= 0))
+        if common.size == 0: return None
+        return int(common[np.argmin(da[common] + db[common])])
+
+    def associative_neighborhood(self, i, k=2, rels=SYMMETRIC_RELS):
+        """Pojmi v največ `k` skokih po asociativnih relacijah: {id: razdalja}."""
+        dist = self._bfs([i], rels, max_hops=k)
+        hits = np.flatnonzero(dist > 0)
+        return dict(zip(hits.tolist(), dist[hits].tolist()))
+
+    def path(self, a, b, rels=("up", "down", "AS", "EQ", "IN")):
+        """Najkrajša pot med pojmoma po izbranih relacijah (seznam id-jev) ali None."""
+        if a == b: return [a]
+        parent = np.full(self.n, -1, dtype=np.int64)
+        parent[a] = a
+        frontier = np.array([a], dtype=np.int64)
+        while frontier.size:
+            nxt_parts, par_parts = [], []
+            for r in rels:
+                indptr, indices = self.adj[r]
+                counts = indptr[frontier + 1] - indptr[frontier]
+                nxt_parts.append(_gather(indptr, indices, frontier))
+                par_parts.append(np.repeat(frontier, counts))
+            nxt = np.concatenate(nxt_parts).astype(np.int64)
+            par = np.concatenate(par_parts)
+            fresh = parent[nxt] < 0
+            nxt, par = nxt[fresh], par[fresh]
+            nxt, first = np.unique(nxt, return_index=True)
+            parent[nxt] = par[first]
+            if parent[b] >= 0:
+                route = [b]
+                while route[-1] != a: route.append(int(parent[route[-1]]))
+                return route[::-1]
+            frontier = nxt
+        return None
+
+    # --- validacija povezav iz modela ---
+    def classify_edge(self, source_label, target_label, rel_type):
+        """Oceni povezavo iz LLM grafa glede na tezaver.
+
+        Vrne 'unknown' (pojma nista v tezavru), 'confirmed', 'inverted'
+        (hierarhija v nasprotni smeri) ali 'new' (skladna, a tezavru neznana).
+        """
+        s, t = self.find(source_label), self.find(target_label)
+        if s is None or t is None: return "unknown"
+        if rel_type in HIERARCHY_DOWN + HIERARCHY_UP:
+            if rel_type in HIERARCHY_UP: s, t = t, s
+            if self._bfs([s], ("down",))[t] > 0: return "confirmed"
+            if self._bfs([t], ("down",))[s] > 0: return "inverted"
+            return "new"
+        if rel_type in SYMMETRIC_RELS and t in self.associative_neighborhood(s, k=1, rels=(rel_type,)):
+            return "confirmed"
+        return "new"
+
+    def validate_graph(self, graph):
+        """Števci razvrstitev vseh povezav `SemanticGraph` glede na tezaver."""
+        labels = {n.id: n.label for n in graph.nodes}
+        return Counter(self.classify_edge(labels[e.source], labels[e.target], e.rel_type) for e in graph.edges)
+
+    def describe_selection(self, labels):
+        """Kratek opis izbranih pojmov za poziv: nadrejeni pojmi in najbližji skupni nadrejeni."""
+        ids = [i for i in (self.find(lbl) for lbl in labels) if i is not None]
+        if not ids: return ""
+        parts = []
+        for i in ids:
+            bt = ", ".join(self.labels[j] for j in self.broader(i))
+            parts.append(f"{self.labels[i]} [BT {bt}]" if bt else self.labels[i])
+        common = ids[0]
+        for i in ids[1:]:
+            common = self.lowest_common_broader(common, i) if common is not None else None
+        if common is not None and len(ids) > 1:
+            parts.append(f"common broader term: {self.labels[common]}")
+        return "; ".join(parts)
+
+
+def thesaurus_from_ontology(ontology):
+    """Zgradi polihierarhični tezaver iz ontologije.
+
+    Koren --TT--> vrhnji pojmi kategorij; kategorija polja --NT--> polje
+    (mešane kategorije, npr. "Natural/Social", dajo več staršev); polje --NT-->
+    metode, orodja in fasete, ki so zaradi deljenja med polji polihierarhične.
+    """
+    labels, index, edges = [], {}, []
+
+    def node(label):
+        i = index.get(label)
+        if i is None:
+            i = index[label] = len(labels)
+            labels.append(label)
+        return i
+
+    root = node(ROOT_TERM)
+    for category in ("User profiles", "Scientific paradigms", "Structural models", "mental approaches"):
+        top = node(category)
+        edges.append((root, top, "TT"))
+        members = ontology.approaches if category == "mental approaches" else ontology.knowledge_base.get(category, {})
+        for name in members:
+            edges.append((top, node(name), "NT"))
+    fields_top = node("Science fields")
+    edges.append((root, fields_top, "TT"))
+    for field in ontology.fields:
+        f = node(field)
+        for cat in filter(None, (c.strip() for c in ontology.field_category(field).split("/"))):
+            c = node(cat if cat == "Humanities" else f"{cat} sciences")
+            edges.append((fields_top, c, "NT"))
+            edges.append((c, f, "NT"))
+        for kind in ("methods", "tools", "facets"):
+            for tid in ontology.terms_by_field[kind][ontology.field_ids[field]]:
+                edges.append((f, node(ontology.name(tid)), "NT"))
+    # Polja, ki si delijo metodo ali orodje, so asociativno povezana
+    for kind in ("methods", "tools"):
+        for fids in ontology.fields_by_term[kind].values():
+            for a, b in zip(fids, fids[1:]):
+                edges.append((node(ontology.name(a)), node(ontology.name(b)), "AS"))
+    return ThesaurusGraph(labels, edges)
+
+
+@lru_cache(maxsize=4)
+def load_thesaurus(ontology):
+    """Tezaver za ontologijo, zgrajen enkrat na proces."""
+    return thesaurus_from_ontology(ontology)
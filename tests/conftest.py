@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Predpomnilniki in shramba grafa v začasni mapi; nastaviti jih je treba pred uvozom `sis`
+os.environ.setdefault("SIS_CACHE_DIR", tempfile.mkdtemp(prefix="sis-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
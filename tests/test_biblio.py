@@ -0,0 +1,43 @@
+import threading
+from types import SimpleNamespace
+
+import sis.biblio as biblio
+from sis.metrics import _trace, collect
+
+
+class _Session:
+    def __init__(self, on_get=None):
+        self.urls, self.on_get = [], on_get
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if self.on_get: self.on_get()
+        body = {"result": [{"orcid-identifier": {"path": "0000-0001"}}]}
+        return SimpleNamespace(status_code=200, headers={}, json=lambda: body, raise_for_status=lambda: None)
+
+
+def test_cancel_stops_lookup_before_next_http_call():
+    cancel = threading.Event()
+    session = _Session(on_get=cancel.set)
+    assert biblio.lookup_author("Ada Lovelace", session=session, cache=False, cancel=cancel) == ""
+    assert len(session.urls) == 1  # ORCID iskanje, brez zapisa
+
+
+def test_prefetch_aborts_running_lookup_outside_the_run_trace(monkeypatch):
+    started, seen = threading.Event(), {}
+
+    def fake_lookup(auth, cancel=None):
+        seen["trace"] = _trace.get()
+        started.set()
+        seen["cancelled"] = cancel.wait(5)
+        return ""
+
+    monkeypatch.setattr(biblio, "lookup_author", fake_lookup)
+    prefetch = biblio.BiblioPrefetch()
+    with collect():
+        prefetch.update("Ada Lovelace")
+        assert started.wait(5)
+        running = prefetch.futures["Ada Lovelace"]
+        prefetch.update("")
+    running.result(5)
+    assert seen == {"trace": None, "cancelled": True}
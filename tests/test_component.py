@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+import sis.component as component
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SIS_ApplicationPrivate.py")
+
+
+def test_static_assets_are_served_with_cache_headers():
+    routes = pytest.importorskip("streamlit.web.server.starlette.starlette_routes")
+    from starlette.applications import Starlette
+    from starlette.testclient import TestClient
+
+    class Registry:
+        def get_component_path(self, name):
+            return component.FRONTEND_DIR
+
+    client = TestClient(Starlette(routes=routes.create_component_routes(Registry(), None)))
+    headers = {f: client.get(f"/component/sis.component.sis_cytoscape/{f}").headers.get("cache-control")
+               for f in ("index.html", "sis_graph.js", "sis_graph.css")}
+    assert headers == {"index.html": "no-cache", "sis_graph.js": "public", "sis_graph.css": "public"}
+
+
+def test_app_stops_at_startup_without_vendored_library(monkeypatch, tmp_path):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setattr(component, "CYTOSCAPE_FILE", str(tmp_path / "cytoscape.min.js"))
+    monkeypatch.setattr(component, "COMPONENT_ENABLED", True)
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    assert not at.exception
+    assert "cytoscape.min.js" in at.error[0].value
+    assert not at.text_area
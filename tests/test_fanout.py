@@ -0,0 +1,55 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from sis.fanout import merge_graphs, run_fanout
+from sis.graph import GraphEdge, GraphNode, SemanticGraph
+from sis.pipeline import SynthesisConfig
+from sis.synthesis import GRAPH_MARKER
+
+
+def test_merge_graphs_dedups_nodes_and_edges():
+    a = SemanticGraph(nodes=[GraphNode("1", "Entropy", "Root"), GraphNode("2", "Information")],
+                      edges=[GraphEdge("1", "2", "NT")])
+    b = SemanticGraph(nodes=[GraphNode("7", "entropy", "Root"), GraphNode("8", "Information!")],
+                      edges=[GraphEdge("7", "8", "NT"), GraphEdge("8", "7", "AS")])
+    graph = merge_graphs([a, None, b], hub_label="Q")
+    assert [n.label for n in graph.nodes] == ["Q", "Entropy", "Information"]
+    assert [(e.source, e.target, e.rel_type) for e in graph.edges] == [
+        ("n1", "n2", "NT"), ("n0", "n1", "TT"), ("n2", "n1", "AS")]
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        name = messages[0]["content"].split("FAN-OUT PERSPECTIVE")[-1].split(": ")[2].split(".")[0]
+        self.calls.append(name)
+        if name == "Physics" and self.calls.count(name) == 1: raise RuntimeError("429")
+        text = f"# {name}\n\nBody.\n{GRAPH_MARKER}\n" + '{"nodes": [{"id": "a", "label": "%s", "type": "Root"}], "edges": []}' % name
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+def test_fanout_submits_and_retries_each_branch():
+    client, submitted, painted = _FakeClient(), [], []
+
+    def submit(job):
+        # Kot razporejevalnik: vsak krak je lasten posel, neuspel krak se ponovi sam
+        submitted.append(job)
+        future = Future()
+        for _ in range(2):
+            try:
+                future.set_result(job(client))
+                break
+            except RuntimeError:
+                continue
+        return future
+
+    cfg = SynthesisConfig(query="Q", sciences=["Physics", "Linguistics"])
+    result = run_fanout(cfg, None, use_cache=False, on_text=painted.append, submit=submit)
+    assert len(submitted) == 2
+    assert sorted(client.calls) == ["Linguistics", "Physics", "Physics"]
+    assert result.perspectives == ["Physics", "Linguistics"]
+    assert {"Physics", "Linguistics"} <= {n.label for n in result.graph.nodes}
+    assert painted and "Perspective: Linguistics" in painted[-1]
@@ -0,0 +1,31 @@
+from sis.graph import DEFAULT_NODE_COLOR, DEFAULT_NODE_SHAPE, DEFAULT_NODE_TYPE, extract_graph
+
+
+def test_fields_are_repaired_to_the_schema():
+    graph = extract_graph('```json\n{"graph": {"nodes": ['
+                          '{"id": "a", "label": "A", "type": "root", "color": null, "shape": "circle"},'
+                          '{"id": "b", "color": "Tomato", "shape": "blob", "type": "weird"},'
+                          '{"id": "c", "color": "banana"}, {"id": "d", "color": "#ABC"}, {"label": "no id"}],'
+                          '"edges": [{"source": "a", "target": "b", "rel_type": "nt"},'
+                          '{"source": "a", "target": "zzz"}, {"source": "b", "target": "c", "rel_type": "??"}]}}\n```')
+    assert [(n.id, n.label, n.type, n.color, n.shape) for n in graph.nodes] == [
+        ("a", "A", "Root", DEFAULT_NODE_COLOR, "ellipse"),
+        ("b", "b", DEFAULT_NODE_TYPE, "tomato", DEFAULT_NODE_SHAPE),
+        ("c", "c", DEFAULT_NODE_TYPE, DEFAULT_NODE_COLOR, DEFAULT_NODE_SHAPE),
+        ("d", "d", DEFAULT_NODE_TYPE, "#ABC", DEFAULT_NODE_SHAPE),
+    ]
+    assert [(e.source, e.target, e.rel_type) for e in graph.edges] == [("a", "b", "NT"), ("b", "c", "AS")]
+    assert not graph.salvaged
+
+
+def test_truncated_json_is_salvaged():
+    graph = extract_graph('{"nodes": [{"id": "a", "label": "A"}, {"id": "b", "label": "B"}], '
+                          '"edges": [{"source": "a", "target": "b", "rel_type": "BT"}, {"source": "b", "tar')
+    assert graph.salvaged
+    assert [n.label for n in graph.nodes] == ["A", "B"]
+    assert [(e.source, e.target, e.rel_type) for e in graph.edges] == [("a", "b", "BT")]
+
+
+def test_missing_marker_or_json_gives_no_graph():
+    assert extract_graph(None) is None
+    assert extract_graph("no graph here") is None
@@ -0,0 +1,18 @@
+from sis.linking import ConceptIndex
+from sis.ontology import load_ontology
+
+_index = None
+
+
+def _match(labels):
+    global _index
+    _index = _index or ConceptIndex(load_ontology())
+    return [cid for cid, _ in _index.match(labels)]
+
+
+def test_exact_and_close_labels_link():
+    assert _match(["Formal proofs", "Physics"]) == ["method:formal proof", "field:physics"]
+
+
+def test_loosely_related_labels_do_not_link():
+    assert _match(["Statistics", "Linguistic theory", "Concept 3 synthesis", "Quantum computing"]) == [None] * 4
@@ -0,0 +1,57 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from sis.scheduler import RateLimitState, Ticket, _Lane
+
+
+def _lane(concurrency=0):
+    # Brez delavcev (concurrency=0), dokler jih test ne zažene
+    return _Lane(client=None, rate=RateLimitState(), concurrency=concurrency)
+
+
+def _start(lane, workers):
+    with lane.cond:
+        lane.concurrency = workers
+        lane._ensure_workers()
+        lane.cond.notify_all()
+
+
+def test_sessions_are_served_round_robin():
+    lane, ran = _lane(), []
+    tickets = [Ticket(session, lambda client, t, name=name: ran.append(name), lane)
+               for session, name in [("s1", "a"), ("s1", "b"), ("s2", "c"), ("s3", "d"), ("s1", "e"), ("s2", "f")]]
+    for ticket in tickets: lane.push(ticket)
+    assert [t.fn.__defaults__[0] for t in lane.order()] == ["a", "c", "d", "b", "f", "e"]
+    _start(lane, 1)
+    for ticket in tickets: assert ticket.wait(5)
+    assert ran == ["a", "c", "d", "b", "f", "e"]
+    lane.close()
+
+
+class _RateLimited(Exception):
+    status_code = 429
+    response = SimpleNamespace(status_code=429, headers={"retry-after": "0.3"})
+
+
+def test_429_pauses_the_whole_lane():
+    lane, failed, started = _lane(), threading.Event(), {}
+
+    def flaky(client, ticket):
+        if ticket.attempts == 1:
+            started["failed"] = time.monotonic()
+            failed.set()
+            raise _RateLimited()
+        return "ok"
+
+    first = Ticket("s1", flaky, lane)
+    lane.push(first)
+    _start(lane, 2)
+    assert failed.wait(5)
+    while lane.rate.pause_remaining() == 0: time.sleep(0.005)
+    other = Ticket("s2", lambda client, t: started.setdefault("other", time.monotonic()), lane)
+    lane.push(other)
+    assert first.result() == "ok" and first.attempts == 2
+    other.result()
+    assert started["other"] - started["failed"] >= 0.25
+    lane.close()
@@ -0,0 +1,75 @@
+import sqlite3
+
+from sis.graph import GraphEdge, GraphNode, SemanticGraph
+from sis.store import GraphStore
+
+
+def _store(tmp_path):
+    return GraphStore(str(tmp_path / "kg.sqlite"))
+
+
+def test_labels_linked_to_one_concept_stay_separate(tmp_path):
+    store = _store(tmp_path)
+    graph = SemanticGraph(
+        nodes=[GraphNode("a", "Statistics", concept="method:statistical analysis"),
+               GraphNode("b", "Statistical analysis", concept="method:statistical analysis")],
+        edges=[GraphEdge("a", "b", "NT")],
+    )
+    _, new_nodes, new_edges = store.merge(graph, inquiry="q")
+    assert (new_nodes, new_edges) == (2, 1)
+    sub = store.neighborhood(["Statistics"])
+    assert sorted(n.label for n in sub.nodes) == ["Statistical analysis", "Statistics"]
+    assert [e.rel_type for e in sub.edges] == ["NT"]
+    assert store.same_concept("Statistics") == ["Statistical analysis"]
+
+
+def test_exact_canonical_label_merges(tmp_path):
+    store = _store(tmp_path)
+    store.merge(SemanticGraph(nodes=[GraphNode("a", "Formal Proofs")], edges=[]), inquiry="q1")
+    _, new_nodes, _ = store.merge(SemanticGraph(nodes=[GraphNode("x", "formal  proofs!")], edges=[]), inquiry="q2")
+    assert new_nodes == 0
+    assert store.search("formal") == [("Formal Proofs", 2)]
+    assert len(store.provenance("FORMAL PROOFS")) == 2
+
+
+def test_synonym_only_after_confirmation(tmp_path):
+    store = _store(tmp_path)
+    store.merge(SemanticGraph(nodes=[GraphNode("a", "Linguistics", concept="field:linguistics")], edges=[]))
+    store.merge(SemanticGraph(nodes=[GraphNode("b", "Linguistic theory", concept="field:linguistics")], edges=[]))
+    assert store.stats()["nodes"] == 2
+    store.add_synonym("Semantics of language", "Linguistics")
+    _, new_nodes, _ = store.merge(SemanticGraph(nodes=[GraphNode("c", "Semantics of language")], edges=[]))
+    assert new_nodes == 0
+    assert store.search("linguistics") == [("Linguistics", 2)]
+
+
+def test_merge_is_idempotent_per_graph_key(tmp_path):
+    store = _store(tmp_path)
+    graph = SemanticGraph(nodes=[GraphNode("a", "A"), GraphNode("b", "B")], edges=[GraphEdge("a", "b", "AS")])
+    first = store.merge(graph, graph_key="h1")
+    assert store.merge(graph, graph_key="h1") == (first[0], 0, 0)
+    assert store.stats() == {"nodes": 2, "edges": 1, "syntheses": 1}
+
+
+def test_provenance_is_private_to_the_session(tmp_path):
+    store = _store(tmp_path)
+    graph = SemanticGraph(nodes=[GraphNode("a", "Entropy")], edges=[])
+    store.merge(graph, inquiry="mine", authors="A. Author", graph_key="h1", session="s1")
+    _, new_nodes, _ = store.merge(graph, inquiry="theirs", graph_key="h1", session="s2")
+    assert new_nodes == 0
+    assert [p[:2] for p in store.provenance("Entropy", session="s1")] == [("mine", "A. Author")]
+    assert [p[0] for p in store.provenance("Entropy", session="s2")] == ["theirs"]
+    assert store.provenance("Entropy") == []
+
+
+def test_legacy_syntheses_table_is_migrated(tmp_path):
+    path = str(tmp_path / "kg.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE syntheses (id INTEGER PRIMARY KEY, inquiry TEXT, authors TEXT, "
+                 "graph_hash TEXT UNIQUE, created_at REAL NOT NULL)")
+    conn.execute("INSERT INTO syntheses (inquiry, graph_hash, created_at) VALUES ('old', 'h1', 0)")
+    conn.commit()
+    conn.close()
+    store = GraphStore(path)
+    store.merge(SemanticGraph(nodes=[GraphNode("a", "A")], edges=[]), graph_key="h1", session="s1")
+    assert store.stats()["syntheses"] == 2
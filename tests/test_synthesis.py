@@ -0,0 +1,26 @@
+from sis.synthesis import GRAPH_MARKER, GraphMarkerSplitter, split_synthesis_output
+
+
+def _feed(chunks):
+    splitter = GraphMarkerSplitter()
+    painted = [splitter.text for chunk in chunks if splitter.feed(chunk)]
+    splitter.close()
+    return splitter, painted
+
+
+def test_marker_split_across_chunks_is_never_painted():
+    text = f"# Title\nBody.\n{GRAPH_MARKER}\n{{\"nodes\": []}}"
+    for size in (1, 3, 7, len(GRAPH_MARKER) - 1):
+        splitter, painted = _feed([text[i:i + size] for i in range(0, len(text), size)])
+        assert splitter.text == "# Title\nBody.\n"
+        assert splitter.graph_tail == '\n{"nodes": []}'
+        assert splitter.full_text == text
+        assert all("###" not in p for p in painted)
+        assert (splitter.text, splitter.graph_tail) == split_synthesis_output(text)
+
+
+def test_marker_prefix_without_marker_is_released_on_close():
+    splitter, painted = _feed(["Intro ", "### SEMANTIC", "_GRAPH"])
+    assert splitter.text == "Intro ### SEMANTIC_GRAPH"
+    assert not splitter.in_graph
+    assert painted == ["Intro "]